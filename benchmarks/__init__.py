@@ -0,0 +1 @@
+"""性能基准测试脚本（python -m benchmarks.<name> 运行）"""
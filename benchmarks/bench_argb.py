@@ -0,0 +1,83 @@
+"""
+ARGB写出基准 - 对比逐像素 struct.pack 循环与向量化写出
+
+用法:
+    python -m benchmarks.bench_argb [--repeat N]
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from core.argb_codec import write_argb, read_argb, decode_argb
+
+
+def _legacy_write(output_path: str, mat: np.ndarray):
+    """旧实现：逐像素 struct.pack 写出（仅用于对比）"""
+    mat = np.rot90(mat, 2).astype(np.uint8)
+    h, w = mat.shape[:2]
+    channels = mat.shape[-1] if len(mat.shape) == 3 else 1
+    with open(output_path, "wb") as f:
+        for y in range(h):
+            for x in range(w):
+                if channels == 4:
+                    b, g, r, a = mat[y, x]
+                elif channels == 3:
+                    b, g, r = mat[y, x]
+                    a = 255
+                else:
+                    b = g = r = mat[y, x]
+                    a = 255
+                f.write(struct.pack("BBBB", b, g, r, a))
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ARGB写出基准")
+    parser.add_argument("--repeat", type=int, default=3, help="新实现重复次数（取最优）")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'分辨率':<12}{'通道':>6}{'旧实现(s)':>12}{'新实现(ms)':>12}{'加速比':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.argb")
+        fast_path = os.path.join(tmp, "fast.argb")
+
+        for name, spec in RESOLUTION_SPECS.items():
+            w, h = spec["width"], spec["height"]
+            for channels in (3, 4):
+                mat = rng.integers(0, 256, (h, w, channels), dtype=np.uint8)
+
+                legacy = _time(lambda: _legacy_write(legacy_path, mat), 1)
+                fast = _time(lambda: write_argb(fast_path, mat), args.repeat)
+
+                with open(legacy_path, "rb") as a, open(fast_path, "rb") as b:
+                    if a.read() != b.read():
+                        raise AssertionError(f"{name} {channels}通道 输出不一致")
+
+                # 回读校验
+                restored = decode_argb(read_argb(fast_path, w, h))
+                assert np.array_equal(restored[:, :, :3], mat[:, :, :3])
+
+                print(f"{name:<12}{channels:>6}{legacy:>12.2f}{fast * 1000:>12.2f}"
+                      f"{legacy / fast:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
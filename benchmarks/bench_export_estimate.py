@@ -0,0 +1,96 @@
+"""
+导出估算准确度基准 - 对比试运行的预测与实际导出的耗时和输出大小
+
+在合成测试片（ffmpeg testsrc2）上，对每个分辨率规格和导出引擎：
+  1. ExportEngine.estimate() 试运行，记录预测的耗时、输出大小和试运行本身的耗时
+  2. ExportEngine.run() 实际导出，记录实际耗时和 loop.mp4 大小
+报告预测误差；任何一项误差超过阈值时失败。
+
+用法:
+    python -m benchmarks.bench_export_estimate [--seconds 20] [--threads 0] [--max-error 0.5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from core.export_engine import (
+    ExportEngine, ExportOptions, ExportTask, ExportType, VideoExportEngine, VideoExportParams,
+    find_ffmpeg
+)
+
+FPS = 30
+SOURCE_SIZE = (1280, 720)
+
+
+def _make_clip(ffmpeg: str, path: str, seconds: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}:rate={FPS}",
+        "-t", str(seconds), "-c:v", "libx264", "-g", str(FPS * 2), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _error(predicted: float, actual: float) -> float:
+    return (predicted - actual) / actual if actual > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出估算准确度基准")
+    parser.add_argument("--seconds", type=int, default=20, help="测试片时长（秒）")
+    parser.add_argument("--threads", type=int, default=0, help="CPU 预算，0 表示全部核心")
+    parser.add_argument("--max-error", type=float, default=0.5, help="允许的最大相对误差")
+    args = parser.parse_args()
+
+    engine = ExportEngine()
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    total_frames = args.seconds * FPS
+    print(f"{total_frames} 帧，CPU {os.cpu_count()} 核")
+    print(f"{'分辨率':<10}{'引擎':<14}{'试运行(s)':>10}{'预测(s)':>9}{'实际(s)':>9}{'误差':>8}"
+          f"{'预测(KB)':>10}{'实际(KB)':>10}{'误差':>8}")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.seconds)
+
+        for name in RESOLUTION_SPECS:
+            for export_engine in VideoExportEngine:
+                params = VideoExportParams(
+                    video_path=source, cropbox=(438, 0, 405, 720),
+                    start_frame=0, end_frame=total_frames, fps=FPS, resolution=name
+                )
+                tasks = [ExportTask(ExportType.LOOP_VIDEO, "loop.mp4", params)]
+                output_dir = os.path.join(tmp, f"{export_engine.value}_{name}")
+                options = ExportOptions(engine=export_engine, cpu_budget=args.threads, use_cache=False)
+
+                engine.setup(tasks, output_dir, resolution=name, options=options)
+                estimate = engine.estimate()
+                predicted = estimate.artifacts[0]
+
+                engine.setup(tasks, output_dir, resolution=name, options=options)
+                start = time.perf_counter()
+                engine.run()
+                actual_seconds = time.perf_counter() - start
+                actual_bytes = os.path.getsize(os.path.join(output_dir, "loop.mp4"))
+
+                time_error = _error(predicted.seconds, actual_seconds)
+                size_error = _error(predicted.output_bytes, actual_bytes)
+                failed |= abs(time_error) > args.max_error or abs(size_error) > args.max_error
+                print(f"{name:<10}{export_engine.value:<14}{estimate.elapsed:>10.2f}"
+                      f"{predicted.seconds:>9.2f}{actual_seconds:>9.2f}{time_error:>+8.0%}"
+                      f"{predicted.output_bytes / 1024:>10.0f}{actual_bytes / 1024:>10.0f}{size_error:>+8.0%}")
+    if failed:
+        raise AssertionError(f"预测误差超过 {args.max_error:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+解码帧缓存基准 - 对比逐帧后退时每一步取帧的耗时
+
+在合成测试片（默认 1080p）的中间位置，从某帧开始逐帧后退，比较：
+  - 无缓存：每一步定位（关键帧索引）+ read()，与预览组件原实现相同
+  - 帧缓存：每一步先查 FrameCache（正在预热时等待），未命中才解码，并在后台预热相邻帧
+（两种方式的取帧之间都留出一个显示间隔，让预热线程有机会运行）
+并校验缓存返回的帧与直接解码逐像素一致。
+
+用法:
+    python -m benchmarks.bench_frame_cache [--size 1920x1080] [--steps 30] [--gop 60]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.export_engine import find_ffmpeg
+from core.frame_cache import FrameCache
+from core.keyframe_index import load_keyframe_index
+from core.preview_decoder import seek_capture
+
+FPS = 30
+SECONDS = 10
+DISPLAY_INTERVAL = 1 / FPS  # 两次按键之间的间隔
+
+
+def _make_clip(ffmpeg: str, path: str, size: str, gop: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={FPS}",
+        "-t", str(SECONDS), "-c:v", "libx264", "-preset", "ultrafast",
+        "-g", str(gop), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+class _Stepper:
+    """模拟预览组件的取帧：cap 定位 + read()，可选先查缓存"""
+
+    def __init__(self, path: str, index, cache=None):
+        self.cap = cv2.VideoCapture(path)
+        self.position = 0
+        self.index = index
+        self.cache = cache
+
+    def frame(self, i: int) -> np.ndarray:
+        if self.cache is not None:
+            frame = self.cache.get(i)
+            if frame is None:
+                frame = self.cache.wait(i)
+            if frame is not None:
+                self.cache.warm(i)
+                return frame
+        self.position = seek_capture(self.cap, self.position, i, self.index)
+        ok, frame = self.cap.read()
+        if not ok:
+            raise RuntimeError(f"读取第 {i} 帧失败")
+        self.position = i + 1
+        if self.cache is not None:
+            self.cache.put(i, frame)
+            self.cache.warm(i)
+        return frame
+
+
+def _step_back(stepper: _Stepper, start: int, steps: int):
+    times = []
+    frames = {}
+    for i in range(start, start - steps, -1):
+        t = time.perf_counter()
+        frames[i] = stepper.frame(i)
+        times.append(time.perf_counter() - t)
+        time.sleep(DISPLAY_INTERVAL)
+    return np.array(times) * 1000, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解码帧缓存基准")
+    parser.add_argument("--size", default="1920x1080", help="测试片分辨率")
+    parser.add_argument("--steps", type=int, default=30, help="后退步数")
+    parser.add_argument("--gop", type=int, default=60, help="测试片关键帧间隔（帧）")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.size, args.gop)
+        index = load_keyframe_index(source, ffmpeg)
+        start = index.frame_count // 2
+
+        print(f"{args.size}，GOP {args.gop}，从第 {start} 帧后退 {args.steps} 步，CPU {os.cpu_count()} 核")
+        print(f"{'方式':<8}{'均值(ms)':>10}{'P95(ms)':>10}{'最大(ms)':>10}{'总计(s)':>10}")
+        plain_times, plain_frames = _step_back(_Stepper(source, index), start, args.steps)
+
+        cache = FrameCache(source, index.frame_count)
+        cache.keyframe_index = index
+        cached_times, cached_frames = _step_back(_Stepper(source, index, cache), start, args.steps)
+        for name, times in (("无缓存", plain_times), ("帧缓存", cached_times)):
+            print(f"{name:<8}{times.mean():>10.2f}{np.percentile(times, 95):>10.2f}"
+                  f"{times.max():>10.2f}{times.sum() / 1000:>10.2f}")
+        print(cache.stats.summary() + f"，预热 {cache.stats.warmed} 帧")
+        cache.close(wait=True)
+
+        mismatched = [i for i in plain_frames if not np.array_equal(plain_frames[i], cached_frames[i])]
+        if mismatched:
+            raise AssertionError(f"缓存帧与直接解码不一致: {mismatched[:5]}")
+
+
+if __name__ == "__main__":
+    main()
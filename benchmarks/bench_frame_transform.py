@@ -0,0 +1,119 @@
+"""
+帧变换基准 - 对比逐步变换（旧实现）与预计算变换计划的吞吐量和内存分配
+
+对每个分辨率规格和旋转角度，在 1920x1080 源帧上分别运行：
+  - 逐步变换：整帧旋转 → 裁剪 → 缩放 → 180度旋转 → np.zeros 补边 + hstack/vstack
+  - 变换计划：FrameTransformPlan，输出缓冲区复用
+报告帧率、每帧临时内存分配峰值（tracemalloc），并校验两者输出一致（允许缩放取整误差）。
+
+用法:
+    python -m benchmarks.bench_frame_transform [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from core.ffmpeg_filter_graph import rotate_cropbox
+from core.frame_transform import FrameTransformPlan
+
+SOURCE_SIZE = (1920, 1080)
+CROPBOX = (660, 0, 608, 1080)  # 原始坐标系下，约 9:16
+ROTATIONS = (0, 90, 180, 270)
+# 允许的最大像素差：先缩放后旋转与先旋转后缩放的定点取整不同
+MAX_PIXEL_DIFF = 2
+
+
+def legacy_transform(rotation: int, spec) -> Callable[[np.ndarray], np.ndarray]:
+    """旧实现：每帧生成多份中间副本"""
+    rx, ry, rw, rh = rotate_cropbox(CROPBOX, rotation, *SOURCE_SIZE)
+    codes = {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+    target_w, target_h = spec["width"], spec["height"]
+
+    def transform(frame: np.ndarray) -> np.ndarray:
+        if rotation in codes:
+            frame = cv2.rotate(frame, codes[rotation])
+        frame = cv2.resize(frame[ry:ry + rh, rx:rx + rw], (target_w, target_h))
+        if spec["rotate_180"]:
+            frame = cv2.rotate(frame, cv2.ROTATE_180)
+        if spec["padding_side"] == "right":
+            padding = np.zeros((target_h, spec["padded_width"] - target_w, 3), dtype=np.uint8)
+            frame = np.hstack([frame, padding])
+        elif spec["padding_side"] == "bottom":
+            padding = np.zeros((spec["padded_height"] - target_h, target_w, 3), dtype=np.uint8)
+            frame = np.vstack([frame, padding])
+        return frame
+
+    return transform
+
+
+def _throughput(transform, release, frames, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        release(transform(frames[i % len(frames)]))
+    return count / (time.perf_counter() - start)
+
+
+def _transient_bytes(transform, release, frames, count: int) -> float:
+    """每帧变换期间相对调用前的内存峰值增量（字节）"""
+    total = 0
+    tracemalloc.start()
+    try:
+        for i in range(count):
+            frame = frames[i % len(frames)]
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            output = transform(frame)
+            total += tracemalloc.get_traced_memory()[1] - before
+            release(output)
+            del output
+    finally:
+        tracemalloc.stop()
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧变换基准")
+    parser.add_argument("--frames", type=int, default=300, help="每项测试的帧数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    width, height = SOURCE_SIZE
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    discard = lambda frame: None  # noqa: E731
+
+    print(f"源帧 {width}x{height}，裁剪框 {CROPBOX}，每项 {args.frames} 帧，OpenCV 线程 {cv2.getNumThreads()}")
+    print(f"{'分辨率':<10}{'旋转':>5}{'旧(fps)':>10}{'计划(fps)':>11}{'加速比':>8}"
+          f"{'旧(KiB/帧)':>12}{'计划(KiB/帧)':>14}{'缓冲区':>7}  校验")
+    failed = False
+    for name, spec in RESOLUTION_SPECS.items():
+        for rotation in ROTATIONS:
+            legacy = legacy_transform(rotation, spec)
+            plan = FrameTransformPlan(SOURCE_SIZE, rotation, CROPBOX, spec)
+
+            output = plan(frames[0])
+            diff = int(np.abs(output.astype(np.int16) - legacy(frames[0])).max())
+            plan.release(output)
+            failed |= diff > MAX_PIXEL_DIFF
+
+            legacy_fps = _throughput(legacy, discard, frames, args.frames)
+            plan_fps = _throughput(plan, plan.release, frames, args.frames)
+            legacy_bytes = _transient_bytes(legacy, discard, frames, min(args.frames, 50))
+            plan_bytes = _transient_bytes(plan, plan.release, frames, min(args.frames, 50))
+            print(f"{name:<10}{rotation:>5}{legacy_fps:>10.1f}{plan_fps:>11.1f}"
+                  f"{plan_fps / legacy_fps:>7.2f}x{legacy_bytes / 1024:>12.0f}{plan_bytes / 1024:>14.1f}"
+                  f"{plan.allocated_buffers:>7}  {'通过' if diff <= MAX_PIXEL_DIFF else '失败'} (差 {diff})")
+    if failed:
+        raise AssertionError("变换计划输出与旧实现不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+关键帧索引定位基准 - 对比不同入点下读到第一帧的延迟
+
+在合成测试片（默认 10 分钟）上，分别在 10%、50%、90% 处取入点，比较：
+  - 顺序解码：从头解码并丢弃入点之前的帧（select 滤镜），同时作为帧内容的基准
+  - OpenCV 定位：cap.set(CAP_PROP_POS_FRAMES) 后 read()
+  - 关键帧索引：从入点前最近的关键帧解码，trim 精确丢弃多余帧
+并校验关键帧索引读到的帧与顺序解码逐像素一致。
+
+用法:
+    python -m benchmarks.bench_keyframe_seek [--seconds 600] [--gop 250]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.export_engine import find_ffmpeg
+from core.keyframe_index import build_keyframe_index, iter_indexed_frames, load_keyframe_index
+
+FPS = 30
+SOURCE_SIZE = (640, 360)
+POSITIONS = (0.1, 0.5, 0.9)
+
+
+def _make_clip(ffmpeg: str, path: str, seconds: int, gop: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}:rate={FPS}",
+        "-t", str(seconds), "-c:v", "libx264", "-preset", "ultrafast", "-bf", "2",
+        "-g", str(gop), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _sequential_frame(ffmpeg: str, path: str, frame: int) -> np.ndarray:
+    """从头解码到第 frame 帧"""
+    width, height = SOURCE_SIZE
+    result = subprocess.run([
+        ffmpeg, "-loglevel", "error", "-i", path,
+        "-vf", f"select=eq(n\\,{frame})", "-fps_mode", "passthrough", "-frames:v", "1",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-"
+    ], capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(height, width, 3)
+
+
+def _opencv_frame(path: str, frame: int) -> np.ndarray:
+    cap = cv2.VideoCapture(path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame)
+        ret, image = cap.read()
+        if not ret:
+            raise RuntimeError(f"OpenCV 读取第 {frame} 帧失败")
+        return image
+    finally:
+        cap.release()
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键帧索引定位基准")
+    parser.add_argument("--seconds", type=int, default=600, help="测试片时长（秒）")
+    parser.add_argument("--gop", type=int, default=250, help="测试片关键帧间隔（帧）")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        print(f"生成 {args.seconds}s 测试片 ({SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}, GOP {args.gop})...")
+        _make_clip(ffmpeg, source, args.seconds, args.gop)
+
+        build_seconds, index = _timed(build_keyframe_index, source, ffmpeg)
+        load_keyframe_index(source, ffmpeg)  # 写入索引文件
+        print(f"建立索引 {build_seconds:.2f}s：{index.frame_count} 帧，{len(index.keyframes)} 个关键帧")
+
+        print(f"{'入点':<16}{'顺序解码(s)':>12}{'OpenCV(s)':>12}{'索引(s)':>10}  校验")
+        failed = False
+        for position in POSITIONS:
+            frame = int(index.frame_count * position)
+            sequential, expected = _timed(_sequential_frame, ffmpeg, source, frame)
+            opencv, opencv_image = _timed(_opencv_frame, source, frame)
+            indexed, indexed_image = _timed(
+                lambda: next(iter_indexed_frames(ffmpeg, source, index, frame, 1, SOURCE_SIZE))
+            )
+            exact = np.array_equal(indexed_image, expected)
+            failed |= not exact
+            opencv_note = "" if np.array_equal(opencv_image, expected) else "，OpenCV 帧不一致"
+            label = f"{position:.0%} (帧 {frame})"
+            print(f"{label:<16}{sequential:>12.3f}{opencv:>12.3f}{indexed:>10.3f}  "
+                  f"{'通过' if exact else '失败'}{opencv_note}")
+        if failed:
+            raise AssertionError("关键帧索引读到的帧与顺序解码不一致")
+
+
+if __name__ == "__main__":
+    main()
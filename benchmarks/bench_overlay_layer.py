@@ -0,0 +1,91 @@
+"""
+叠加图层基准 - 对比逐帧绘制叠加UI与合成缓存的预乘图层
+
+对 RESOLUTION_SPECS 中的每种分辨率，比较：
+  - 逐帧绘制：每帧复制后重新绘制半透明矩形、文字、条码、旋转文字等（原实现）
+  - 缓存图层：首帧编译预乘 BGRA 图层，之后每帧只做一次合成
+  - 批量合成：对 (N, H, W, 3) 帧序列原地合成（导出烧录叠加UI的方式，不复制帧）
+并校验两者输出的最大像素差（编译时的舍入误差，应不超过 2）。
+
+用法:
+    python -m benchmarks.bench_overlay_layer [--frames 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS, microseconds_to_frames
+from config.epconfig import ArknightsOverlayOptions
+from core.overlay_renderer import OverlayRenderer
+
+FPS = 30
+MAX_PIXEL_ERROR = 2
+
+
+def _time_per_frame(func, frames) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        func(frame)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="叠加图层基准")
+    parser.add_argument("--frames", type=int, default=50, help="每种方式渲染的帧数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    options = ArknightsOverlayOptions(
+        operator_name="AMIYA", top_left_rhodes="RHODES ISLAND",
+        top_right_bar_text="PRTS", color="#18d1ff"
+    )
+    print(f"{'分辨率':<12}{'逐帧绘制(ms)':>14}{'编译(ms)':>10}{'缓存图层(ms)':>14}"
+          f"{'批量合成(ms)':>14}{'加速比':>9}{'最大误差':>10}")
+
+    for name, spec in RESOLUTION_SPECS.items():
+        w, h = spec["width"], spec["height"]
+        # 几帧不同内容轮流使用，避免只测到缓存命中的同一块内存
+        frames = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(4)]
+        frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+        legacy_renderer = OverlayRenderer()
+
+        def legacy(frame):
+            result = frame.copy()
+            legacy_renderer.draw_arknights_overlay(result, options)
+            return result
+
+        renderer = OverlayRenderer()
+        start = time.perf_counter()
+        renderer.get_arknights_layer(options, w, h)
+        compile_time = time.perf_counter() - start
+
+        legacy_time = _time_per_frame(legacy, frames)
+        layer_time = _time_per_frame(lambda f: renderer.render_arknights_overlay(f, options), frames)
+        stack = np.stack(frames)
+        start = time.perf_counter()
+        # start_index 取叠加UI开始显示的帧号，使每一帧都参与合成
+        renderer.composite_arknights_batch(
+            stack, options, FPS, microseconds_to_frames(options.appear_time, FPS)
+        )
+        batch_time = (time.perf_counter() - start) / len(stack)
+
+        error = max(
+            int(np.abs(legacy(f).astype(np.int16) - renderer.render_arknights_overlay(f, options)).max())
+            for f in frames[:4]
+        )
+        if error > MAX_PIXEL_ERROR:
+            raise AssertionError(f"{name} 图层合成与逐帧绘制相差 {error}")
+
+        print(f"{name:<12}{legacy_time * 1000:>14.2f}{compile_time * 1000:>10.1f}"
+              f"{layer_time * 1000:>14.2f}{batch_time * 1000:>14.2f}"
+              f"{legacy_time / batch_time:>8.1f}x{error:>10}")
+
+
+if __name__ == "__main__":
+    main()
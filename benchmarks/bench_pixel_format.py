@@ -0,0 +1,112 @@
+"""
+编码器输入像素格式基准 - 对比管道送入 bgr24 与 I420 (yuv420p) 的端到端导出耗时
+
+在合成测试片（ffmpeg testsrc2）上，对每个分辨率规格用管道引擎分别以两种像素格式导出，
+记录耗时和管道数据量，并比较两次导出解码后的画面 PSNR（仅色度下采样方式不同）。
+
+用法:
+    python -m benchmarks.bench_pixel_format [--seconds 10] [--threads 0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS, get_resolution_spec
+from core.export_engine import (
+    EncoderPixelFormat, ExportEngine, ExportOptions, ExportTask, ExportType, VideoExportParams,
+    find_ffmpeg
+)
+from core.frame_transform import output_frame_size
+
+FPS = 30
+SOURCE_SIZE = (1280, 720)
+MIN_PSNR = 40.0
+
+
+def _make_clip(ffmpeg: str, path: str, seconds: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}:rate={FPS}",
+        "-t", str(seconds), "-c:v", "libx264", "-g", str(FPS), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _decode(ffmpeg: str, path: str) -> np.ndarray:
+    return np.frombuffer(subprocess.run([
+        ffmpeg, "-loglevel", "error", "-i", path, "-f", "rawvideo", "-pix_fmt", "yuv420p", "-"
+    ], capture_output=True, check=True).stdout, dtype=np.uint8)
+
+
+def _psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _export(engine: ExportEngine, output_dir: str, params: VideoExportParams,
+            options: ExportOptions) -> float:
+    engine.setup([ExportTask(ExportType.LOOP_VIDEO, "loop.mp4", params)], output_dir,
+                 resolution=params.resolution, options=options)
+    start = time.perf_counter()
+    engine.run()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="编码器输入像素格式基准")
+    parser.add_argument("--seconds", type=int, default=10, help="测试片时长（秒）")
+    parser.add_argument("--threads", type=int, default=0, help="CPU 预算，0 表示全部核心")
+    args = parser.parse_args()
+
+    engine = ExportEngine()
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    total_frames = args.seconds * FPS
+    print(f"{total_frames} 帧，CPU {os.cpu_count()} 核，两遍编码各写一次管道")
+    print(f"{'分辨率':<12}{'bgr24(s)':>10}{'I420(s)':>10}{'加速比':>8}"
+          f"{'bgr24(MiB)':>12}{'I420(MiB)':>11}  PSNR")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.seconds)
+
+        for name in RESOLUTION_SPECS:
+            params = VideoExportParams(
+                video_path=source, cropbox=(438, 0, 405, 720),
+                start_frame=0, end_frame=total_frames, fps=FPS, resolution=name
+            )
+            frame_w, frame_h = output_frame_size(get_resolution_spec(name))
+            results = {}
+            for pixel_format in EncoderPixelFormat:
+                output_dir = os.path.join(tmp, f"{pixel_format.value}_{name}")
+                options = ExportOptions(
+                    cpu_budget=args.threads, use_cache=False, pixel_format=pixel_format
+                )
+                results[pixel_format] = (
+                    _export(engine, output_dir, params, options),
+                    _decode(ffmpeg, os.path.join(output_dir, "loop.mp4"))
+                )
+
+            bgr_seconds, bgr_frames = results[EncoderPixelFormat.BGR24]
+            i420_seconds, i420_frames = results[EncoderPixelFormat.I420]
+            # 两遍编码各经管道写一次全部帧
+            bgr_mib = 2 * total_frames * frame_w * frame_h * 3 / 2 ** 20
+            psnr = _psnr(bgr_frames, i420_frames) if bgr_frames.size == i420_frames.size else 0.0
+            failed |= psnr < MIN_PSNR
+            print(f"{name:<12}{bgr_seconds:>10.2f}{i420_seconds:>10.2f}"
+                  f"{bgr_seconds / i420_seconds:>7.2f}x{bgr_mib:>12.0f}{bgr_mib / 2:>11.0f}  {psnr:.2f} dB")
+    if failed:
+        raise AssertionError(f"I420 导出与 bgr24 导出差异过大（PSNR < {MIN_PSNR} dB）")
+
+
+if __name__ == "__main__":
+    main()
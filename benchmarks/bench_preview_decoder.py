@@ -0,0 +1,128 @@
+"""
+预览播放基准 - 对比界面线程同步解码与后台预解码
+
+在合成测试片（默认 1080p）上按视频帧率播放固定时长，比较：
+  - 同步解码：定时器回调里 read() + 旋转（原实现），播放速度受解码速度限制
+  - 后台预解码：定时器回调只从 PreviewDecoder 取到期帧，解码跟不上时按时钟丢帧
+报告界面线程每次回调的耗时、实际播放速度（播放头前进的帧数 / 墙上时间）和丢帧数。
+
+用法:
+    python -m benchmarks.bench_preview_decoder [--size 1920x1080] [--seconds 5] [--rotation 90]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.export_engine import find_ffmpeg
+from core.preview_decoder import PreviewDecoder, rotate_frame
+
+FPS = 30
+
+
+def _make_clip(ffmpeg: str, path: str, size: str, seconds: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={FPS}",
+        "-vf", "noise=alls=6:allf=t", "-t", str(seconds),
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", str(FPS * 2), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _play_sync(path: str, rotation: int, duration: float):
+    """原实现：每次回调读取下一帧，回调耗时超过帧间隔时播放变慢"""
+    cap = cv2.VideoCapture(path)
+    interval = 1.0 / FPS
+    tick_times = []
+    frames = 0
+    start = time.perf_counter()
+    next_tick = start
+    while time.perf_counter() - start < duration:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        tick_start = time.perf_counter()
+        ok, frame = cap.read()
+        if not ok:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = cap.read()
+        rotate_frame(frame, rotation)
+        frames += 1
+        tick_end = time.perf_counter()
+        tick_times.append(tick_end - tick_start)
+        # QTimer 不补发错过的回调：下一次回调在本次结束之后
+        next_tick = max(next_tick + interval, tick_end)
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return tick_times, frames, elapsed, 0
+
+
+def _play_decoder(path: str, rotation: int, duration: float, total_frames: int, frame_bytes: int):
+    """后台预解码：回调以半帧间隔轮询到期帧"""
+    decoder = PreviewDecoder(path, FPS, total_frames, frame_bytes)
+    interval = 0.5 / FPS
+    tick_times = []
+    decoder.start(0, rotation)
+    start = time.perf_counter()
+    next_tick = start
+    last_index = 0
+    advanced = 0
+    while time.perf_counter() - start < duration:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        tick_start = time.perf_counter()
+        entry = decoder.take_due_frame()
+        tick_times.append(time.perf_counter() - tick_start)
+        if entry is not None:
+            advanced += (entry[0] - last_index) % total_frames
+            last_index = entry[0]
+        next_tick += interval
+    elapsed = time.perf_counter() - start
+    stats = decoder.stats
+    decoder.close()
+    return tick_times, advanced, elapsed, stats.dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预览播放基准")
+    parser.add_argument("--size", default="1920x1080", help="测试片分辨率")
+    parser.add_argument("--seconds", type=int, default=5, help="测试片时长（秒）")
+    parser.add_argument("--play-seconds", type=float, default=4.0, help="每种方式播放的墙上时间（秒）")
+    parser.add_argument("--rotation", type=int, default=90, choices=(0, 90, 180, 270), help="预览旋转角度")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    width, height = (int(v) for v in args.size.split("x"))
+    total_frames = args.seconds * FPS
+    print(f"{args.size} @ {FPS} FPS，旋转 {args.rotation}°，播放 {args.play_seconds:g} 秒，CPU {os.cpu_count()} 核")
+    print(f"{'方式':<10}{'回调均值(ms)':>14}{'回调P95(ms)':>13}{'回调最大(ms)':>14}{'播放速度':>10}{'丢帧':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.size, args.seconds)
+        runs = {
+            "同步解码": _play_sync(source, args.rotation, args.play_seconds),
+            "后台预解码": _play_decoder(
+                source, args.rotation, args.play_seconds, total_frames, width * height * 3
+            ),
+        }
+        for name, (tick_times, frames, elapsed, dropped) in runs.items():
+            ticks = np.array(tick_times) * 1000
+            speed = frames / elapsed / FPS
+            print(f"{name:<10}{ticks.mean():>14.2f}{np.percentile(ticks, 95):>13.2f}"
+                  f"{ticks.max():>14.2f}{speed:>10.2f}x{dropped:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+自动码率基准 - 检查按存储预算/画质下限选出的码率是否兑现
+
+在合成测试片（ffmpeg testsrc2 叠加噪声，编码难度接近实拍）上，对每组目标：
+  1. 以 RateTarget 导出 loop.mp4，记录选出的码率和预测画质
+  2. 实际输出大小与该视频分到的大小预算对比（不得超出）
+  3. 实际画质（整段与变换后的参考画面对比）与预测画质对比
+第二轮相同目标的导出应直接使用试编码缓存，报告两轮耗时。
+
+用法:
+    python -m benchmarks.bench_rate_tuner [--seconds 10] [--metric psnr] [--max-quality-error 2.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import get_device_slot_count, get_resolution_spec
+from core.export_engine import (
+    ExportEngine, ExportOptions, ExportTask, ExportType, VideoExportParams, find_ffmpeg
+)
+from core.ffmpeg_runner import rawvideo_input_args
+from core.rate_tuner import QualityMetric, RateTarget
+
+FPS = 30
+SOURCE_SIZE = (1280, 720)
+RESOLUTION = "360x640"
+
+# 各指标的 (设备存储预算 MB, 画质下限)：只限大小、只限画质、两者冲突（预算优先）
+TARGETS = {
+    QualityMetric.PSNR: [(3, 0.0), (6, 0.0), (0, 38.0), (0, 42.0), (3, 45.0)],
+    QualityMetric.VMAF: [(3, 0.0), (6, 0.0), (0, 85.0), (0, 93.0), (3, 97.0)],
+}
+
+
+def _make_clip(ffmpeg: str, path: str, seconds: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}:rate={FPS}",
+        "-vf", "noise=alls=6:allf=t", "-t", str(seconds),
+        "-c:v", "libx264", "-crf", "16", "-g", str(FPS * 2), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _measure_output_quality(
+    engine: ExportEngine,
+    params: VideoExportParams,
+    output_path: str,
+    metric: QualityMetric
+) -> float:
+    """整段变换后的参考画面与导出结果对比"""
+    spec = get_resolution_spec(params.resolution)
+    plan = engine._make_frame_transform(params, spec)
+    reference = [plan(frame) for frame in engine._iter_source_frames(params)]
+    frame_w, frame_h = plan.frame_size
+    input_args = rawvideo_input_args(frame_w, frame_h, params.fps, plan.pix_fmt)
+    return engine._measure_quality(
+        output_path, input_args, reference, metric, (spec["width"], spec["height"]), os.cpu_count() or 1
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自动码率基准")
+    parser.add_argument("--seconds", type=int, default=10, help="测试片时长（秒）")
+    parser.add_argument("--metric", choices=[m.name.lower() for m in QualityMetric], default="psnr",
+                        help="画质指标")
+    parser.add_argument("--max-quality-error", type=float, default=2.0,
+                        help="预测画质与实际画质允许的最大偏差")
+    args = parser.parse_args()
+    metric = QualityMetric[args.metric.upper()]
+
+    engine = ExportEngine()
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    total_frames = args.seconds * FPS
+    print(f"{total_frames} 帧 @ {RESOLUTION}，指标 {metric.name}，CPU {os.cpu_count()} 核")
+    print(f"{'预算(MB)':>9}{'下限':>7}{'码率(kbps)':>12}{'预算(KB)':>10}{'实际(KB)':>10}"
+          f"{'预测画质':>10}{'实际画质':>10}{'首次(s)':>9}{'缓存(s)':>9}")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.seconds)
+        params = VideoExportParams(
+            video_path=source, cropbox=(438, 0, 405, 720),
+            start_frame=0, end_frame=total_frames, fps=FPS, resolution=RESOLUTION
+        )
+        # 试编码缓存以源文件路径和修改时间为键，临时生成的测试片第一轮必然重新测量
+        tasks = [ExportTask(ExportType.LOOP_VIDEO, "loop.mp4", params)]
+
+        for budget_mb, floor in TARGETS[metric]:
+            target = RateTarget(budget_mb * 1024 * 1024, floor, metric)
+            options = ExportOptions(use_cache=False, rate_target=target)
+            output_dir = os.path.join(tmp, f"out_{budget_mb}_{floor:g}")
+            output_path = os.path.join(output_dir, "loop.mp4")
+
+            elapsed = []
+            for _ in range(2):
+                engine.setup(tasks, output_dir, resolution=RESOLUTION, options=options)
+                start = time.perf_counter()
+                engine.run()
+                elapsed.append(time.perf_counter() - start)
+            decision = next(iter(engine.rate_decisions.values()))
+
+            actual_bytes = os.path.getsize(output_path)
+            actual_quality = _measure_output_quality(engine, params, output_path, metric)
+            slot_bytes = target.storage_budget_bytes // get_device_slot_count()
+            over_budget = slot_bytes > 0 and actual_bytes > slot_bytes
+            quality_error = abs(decision.predicted_quality - actual_quality)
+            failed |= over_budget or quality_error > args.max_quality_error
+            print(f"{budget_mb:>9}{floor:>7g}{decision.bitrate_kbps:>12}"
+                  f"{(slot_bytes / 1024 if slot_bytes else float('nan')):>10.0f}{actual_bytes / 1024:>10.0f}"
+                  f"{decision.predicted_quality:>10.2f}{actual_quality:>10.2f}"
+                  f"{elapsed[0]:>9.2f}{elapsed[1]:>9.2f}"
+                  + ("  超出预算" if over_budget else ""))
+    if failed:
+        raise AssertionError(f"超出大小预算，或画质预测偏差超过 {args.max_quality_error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+分段并行编码基准 - 对比单进程2pass编码与按 GOP 分段并发编码后拼接
+
+在合成测试片（ffmpeg testsrc2）上，对每个分辨率规格分别导出一次整段编码和一次分段编码，
+记录耗时，并校验分段拼接结果的帧数与整段编码一致、关键帧只落在 GOP 边界上。
+
+用法:
+    python -m benchmarks.bench_segmented_encode [--seconds 20] [--segments 4] [--threads 0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from core.export_engine import (
+    ExportEngine, ExportTask, ExportType, ExportOptions, VideoExportEngine, VideoExportParams,
+    find_ffmpeg
+)
+from core.segmented_encode import gop_frames, plan_segments
+
+FPS = 30
+SOURCE_SIZE = (1280, 720)
+
+
+def _make_clip(ffmpeg: str, path: str, seconds: int):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={SOURCE_SIZE[0]}x{SOURCE_SIZE[1]}:rate={FPS}",
+        "-t", str(seconds), "-c:v", "libx264", "-g", str(FPS), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _keyframes(ffmpeg: str, path: str) -> Tuple[int, List[int]]:
+    """解码输出文件，返回关键帧序号（用 showinfo 滤镜，不依赖 ffprobe）"""
+    result = subprocess.run([
+        ffmpeg, "-hide_banner", "-i", path, "-vf", "showinfo", "-f", "null", "-"
+    ], capture_output=True, text=True, check=True)
+    frames = []
+    keyframes = []
+    for line in result.stderr.splitlines():
+        if "Parsed_showinfo" in line and " n:" in line:
+            index = int(line.split(" n:")[1].split()[0])
+            frames.append(index)
+            if "iskey:1" in line:
+                keyframes.append(index)
+    return len(frames), keyframes
+
+
+def _export(engine: ExportEngine, output_dir: str, params: VideoExportParams,
+            options: ExportOptions) -> float:
+    engine.setup([ExportTask(ExportType.LOOP_VIDEO, "loop.mp4", params)], output_dir,
+                 resolution=params.resolution, options=options)
+    start = time.perf_counter()
+    engine.run()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分段并行编码基准")
+    parser.add_argument("--seconds", type=int, default=20, help="测试片时长（秒）")
+    parser.add_argument("--segments", type=int, default=max(2, min(8, os.cpu_count() or 2)),
+                        help="最大分段数")
+    parser.add_argument("--threads", type=int, default=0, help="CPU 预算，0 表示全部核心")
+    parser.add_argument("--engine", choices=[e.value for e in VideoExportEngine],
+                        default=VideoExportEngine.PIPELINE.value)
+    args = parser.parse_args()
+
+    engine = ExportEngine()
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    total_frames = args.seconds * FPS
+    segments = plan_segments(0, total_frames, FPS, args.segments)
+    if not segments:
+        raise SystemExit("测试片太短，无法分段")
+    print(f"{total_frames} 帧，GOP {gop_frames(FPS)}，分 {len(segments)} 段，"
+          f"CPU {os.cpu_count()} 核，引擎 {args.engine}")
+    print(f"{'分辨率':<12}{'整段(s)':>10}{'分段(s)':>10}{'加速比':>8}  校验")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        _make_clip(ffmpeg, source, args.seconds)
+
+        for name in RESOLUTION_SPECS:
+            params = VideoExportParams(
+                video_path=source, cropbox=(280, 0, 405, 720),
+                start_frame=0, end_frame=total_frames, fps=FPS, resolution=name
+            )
+            base = ExportOptions(
+                engine=VideoExportEngine(args.engine), cpu_budget=args.threads, use_cache=False
+            )
+            single_dir = os.path.join(tmp, f"single_{name}")
+            segmented_dir = os.path.join(tmp, f"segmented_{name}")
+            single = _export(engine, single_dir, params, base)
+            segmented = _export(
+                engine, segmented_dir, params, replace(base, segment_count=args.segments)
+            )
+
+            single_frames, _ = _keyframes(ffmpeg, os.path.join(single_dir, "loop.mp4"))
+            frames, keyframes = _keyframes(ffmpeg, os.path.join(segmented_dir, "loop.mp4"))
+            gop = gop_frames(FPS)
+            ok = frames == single_frames and all(k % gop == 0 for k in keyframes)
+            check = f"{'通过' if ok else '失败'}（{frames} 帧，关键帧 {len(keyframes)}）"
+            print(f"{name:<12}{single:>10.2f}{segmented:>10.2f}{single / segmented:>7.2f}x  {check}")
+            if not ok:
+                raise AssertionError(f"{name} 分段输出校验失败: {frames}/{single_frames} 帧, {keyframes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+序列预览基准 - 完整播放序列（入场过渡 → 入场 → 循环过渡 → 循环）的离线渲染速度
+
+在合成测试片（默认 1080p 的入场视频和循环视频）上，对 RESOLUTION_SPECS 中的每种分辨率：
+  - 只渲染：迭代 SequenceRenderer.iter_chunks()（解码、裁剪缩放、过渡、叠加UI）
+  - 渲染并编码：encode_sequence_preview() 写出 50 fps 的预览 MP4
+报告渲染帧率和相对实时播放的倍数；360x640 只渲染的速度低于 --min-speed 倍实时时失败。
+
+用法:
+    python -m benchmarks.bench_sequence_preview [--size 1920x1080] [--seconds 4] [--min-speed 1.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from config.epconfig import (
+    ArknightsOverlayOptions, EPConfig, IntroConfig, Overlay, OverlayType,
+    ScreenType, Transition, TransitionOptions, TransitionType
+)
+from core.export_engine import VideoExportParams, find_ffmpeg
+from core.sequence_preview import SequenceRenderer, encode_sequence_preview
+
+FPS = 30
+GATED_RESOLUTION = "360x640"
+
+
+def _make_clip(ffmpeg: str, path: str, size: str, seconds: int, source: str):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"{source}=size={size}:rate={FPS}",
+        "-t", str(seconds), "-c:v", "libx264", "-preset", "ultrafast",
+        "-g", str(FPS * 2), "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _make_config(screen: ScreenType) -> EPConfig:
+    config = EPConfig(screen=screen)
+    config.intro = IntroConfig(enabled=True, file="intro.mp4")
+    config.transition_in = Transition(TransitionType.FADE, TransitionOptions(background_color="#202020"))
+    config.transition_loop = Transition(TransitionType.MOVE, TransitionOptions())
+    config.overlay = Overlay(
+        OverlayType.ARKNIGHTS,
+        arknights_options=ArknightsOverlayOptions(operator_name="AMIYA", color="#18d1ff")
+    )
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="序列预览基准")
+    parser.add_argument("--size", default="1920x1080", help="测试片尺寸")
+    parser.add_argument("--seconds", type=int, default=4, help="入场视频和循环视频各自的时长（秒）")
+    parser.add_argument("--min-speed", type=float, default=1.0, help="360x640 只渲染时要求的最低实时倍数")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise SystemExit("未找到ffmpeg")
+
+    width, height = (int(v) for v in args.size.split("x"))
+    # 从横屏源中裁出竖屏区域，与实际使用时相同
+    crop_w = height * 9 // 16
+    cropbox = ((width - crop_w) // 2, 0, crop_w, height)
+    frames = args.seconds * FPS
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        intro_path = os.path.join(temp_dir, "intro.mp4")
+        loop_path = os.path.join(temp_dir, "loop.mp4")
+        _make_clip(ffmpeg, intro_path, args.size, args.seconds, "testsrc2")
+        _make_clip(ffmpeg, loop_path, args.size, args.seconds, "smptehdbars")
+        intro = VideoExportParams(intro_path, cropbox, 0, frames, FPS)
+        loop = VideoExportParams(loop_path, cropbox, 0, frames, FPS)
+
+        print(f"{'分辨率':<12}{'帧数':>8}{'时长(s)':>10}{'渲染(fps)':>12}{'实时倍数':>10}"
+              f"{'含编码(fps)':>14}{'实时倍数':>10}")
+        for name in RESOLUTION_SPECS:
+            config = _make_config(ScreenType.from_string(name))
+            renderer = SequenceRenderer(config, loop, intro, temp_dir)
+            duration = renderer.plan.duration
+
+            start = time.perf_counter()
+            for _ in renderer.iter_chunks():
+                pass
+            render_time = time.perf_counter() - start
+            encode_time = encode_sequence_preview(
+                renderer, os.path.join(temp_dir, f"preview_{name}.mp4"), ffmpeg
+            )
+
+            render_speed = duration / render_time
+            print(f"{name:<12}{renderer.frame_count:>8}{duration:>10.1f}"
+                  f"{renderer.frame_count / render_time:>12.1f}{render_speed:>9.1f}x"
+                  f"{renderer.frame_count / encode_time:>14.1f}{duration / encode_time:>9.1f}x")
+            if name == GATED_RESOLUTION and render_speed < args.min_speed:
+                raise AssertionError(
+                    f"{name} 渲染速度 {render_speed:.2f}x 实时，低于 {args.min_speed}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+滤镜图导出等价性验证 - 对比 Python 逐帧变换与 FFmpeg 滤镜图的编码器输入
+
+在合成测试片（ffmpeg testsrc2）上，对每种用户旋转和每个分辨率规格：
+  1. Python 路径：按关键帧索引从入点解码 + 逐帧变换，经 FFmpeg 转为 yuv420p
+  2. 滤镜图路径：与导出相同，由 ExportEngine._filter_graph_args 生成定位参数和滤镜链
+     （有关键帧索引时按入点帧的时间戳裁切），直接输出 yuv420p
+两者都是送入 x264 之前的像素，计算 PSNR 并要求不低于阈值。
+
+用法:
+    python -m benchmarks.verify_filter_graph [--min-psnr 35]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.constants import RESOLUTION_SPECS
+from core.export_engine import ExportEngine, VideoExportParams, find_ffmpeg
+
+FPS = 30
+SOURCE_SIZES = [(1280, 720), (722, 1286)]  # 裁剪框使用奇数坐标
+START_FRAME = 17
+FRAME_COUNT = 12
+
+
+def _psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _make_clip(ffmpeg: str, path: str, size):
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size[0]}x{size[1]}:rate={FPS}",
+        "-t", "2", "-c:v", "libx264", "-g", "15", "-pix_fmt", "yuv420p", path
+    ], check=True)
+
+
+def _python_path(ffmpeg: str, engine: ExportEngine, params: VideoExportParams, spec) -> bytes:
+    frame_w, frame_h = engine._get_output_frame_size(spec)
+    transform = engine._make_frame_transform(params, spec)
+    frames = b"".join(
+        transform(frame).tobytes() for frame in engine._iter_source_frames(params)
+    )
+    return subprocess.run([
+        ffmpeg, "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", transform.pix_fmt, "-s", f"{frame_w}x{frame_h}", "-i", "pipe:0",
+        "-f", "rawvideo", "-pix_fmt", "yuv420p", "pipe:1"
+    ], input=frames, capture_output=True, check=True).stdout
+
+
+def _filter_graph_path(ffmpeg: str, engine: ExportEngine, params: VideoExportParams, spec) -> bytes:
+    input_args, filter_args = engine._filter_graph_args(params, spec)
+    return subprocess.run(
+        [ffmpeg, "-loglevel", "error"] + input_args + filter_args
+        + ["-f", "rawvideo", "-pix_fmt", "yuv420p", "pipe:1"],
+        capture_output=True, check=True
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="滤镜图导出等价性验证")
+    parser.add_argument("--min-psnr", type=float, default=35.0, help="最低允许PSNR (dB)")
+    args = parser.parse_args()
+
+    engine = ExportEngine()
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        print("未找到ffmpeg")
+        sys.exit(2)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        # 两条路径都按导出时的方式定位：有 ffmpeg 时使用关键帧索引
+        engine.setup([], tmp, ffmpeg_path=ffmpeg)
+        for source_size in SOURCE_SIZES:
+            clip = os.path.join(tmp, f"src_{source_size[0]}x{source_size[1]}.mp4")
+            _make_clip(ffmpeg, clip, source_size)
+            source_size = engine._get_source_size(clip)
+            src_w, src_h = source_size
+
+            for rotation in (0, 90, 180, 270):
+                rot_w, rot_h = (src_h, src_w) if rotation in (90, 270) else (src_w, src_h)
+                for name, spec in RESOLUTION_SPECS.items():
+                    # 旋转后坐标系下居中、符合目标宽高比的奇数坐标裁剪框，再换回原始坐标
+                    crop_h = rot_h - 3
+                    crop_w = min(rot_w - 3, crop_h * spec["width"] // spec["height"])
+                    crop_x = (rot_w - crop_w) // 2 | 1
+                    crop_y = 1
+                    cropbox = _to_original(
+                        (crop_x, crop_y, crop_w, crop_h), rotation, src_w, src_h
+                    )
+                    params = VideoExportParams(
+                        video_path=clip, cropbox=cropbox,
+                        start_frame=START_FRAME, end_frame=START_FRAME + FRAME_COUNT,
+                        fps=FPS, resolution=name, rotation=rotation
+                    )
+
+                    a = np.frombuffer(_python_path(ffmpeg, engine, params, spec), np.uint8)
+                    b = np.frombuffer(_filter_graph_path(ffmpeg, engine, params, spec), np.uint8)
+                    if a.size != b.size or a.size == 0:
+                        print(f"FAIL {source_size} rot={rotation} {name}: 帧数据长度 {a.size} != {b.size}")
+                        failures += 1
+                        continue
+
+                    value = _psnr(a, b)
+                    ok = value >= args.min_psnr
+                    failures += 0 if ok else 1
+                    print(f"{'OK  ' if ok else 'FAIL'} {src_w}x{src_h} rot={rotation:<3} "
+                          f"{name:<9} PSNR={value:.2f} dB")
+
+    sys.exit(1 if failures else 0)
+
+
+def _to_original(cropbox, rotation, src_w, src_h):
+    """旋转后坐标 → 原始坐标（与 VideoPreviewWidget._cropbox_to_original_coords 一致）"""
+    x, y, w, h = cropbox
+    if rotation == 90:
+        return (y, src_h - x - w, h, w)
+    if rotation == 180:
+        return (src_w - x - w, src_h - y - h, w, h)
+    if rotation == 270:
+        return (src_w - y - h, x, h, w)
+    return (x, y, w, h)
+
+
+if __name__ == "__main__":
+    main()
@@ -165,7 +165,14 @@ def run_cxfreeze(skip_flasher=False):
         "core.export_service", "core.overlay_renderer",
         "core.update_service", "core.error_handler",
         "core.crash_recovery_service", "core.auto_save_service",
-        "core.optimized_processor",
+        "core.optimized_processor", "core.argb_codec",
+        "core.ffmpeg_runner", "core.export_pipeline", "core.ffmpeg_filter_graph",
+        "core.export_scheduler", "core.export_cache", "core.encode_speed",
+        "core.segmented_encode", "core.export_engine", "core.project_export",
+        "core.batch_export", "core.keyframe_index", "core.frame_transform",
+        "core.export_estimate", "core.rate_tuner", "core.preview_decoder",
+        "core.frame_cache", "core.thumbnail_strip", "core.proxy_media",
+        "core.transition_renderer", "core.sequence_preview",
         "gui", "gui.main_window", "gui.dialogs",
         "gui.dialogs.export_progress_dialog", "gui.dialogs.welcome_dialog",
         "gui.dialogs.shortcuts_dialog", "gui.dialogs.update_dialog",
@@ -208,6 +215,10 @@ def run_cxfreeze(skip_flasher=False):
     ]
 
     include_files = [("resources", "resources")]
+    # 叠加UI旋转文字使用的内置字体（与模拟器共用）
+    simulator_fonts = os.path.join("simulator", "resources", "fonts")
+    if os.path.exists(simulator_fonts):
+        include_files.append((simulator_fonts, simulator_fonts))
     if os.path.exists("ffmpeg.exe"):
         include_files.append(("ffmpeg.exe", "ffmpeg.exe"))
     if os.path.exists("ffprobe.exe"):
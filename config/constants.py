@@ -128,6 +128,13 @@ def get_resolution_spec(resolution: str) -> Dict[str, Any]:
     return RESOLUTION_SPECS.get(resolution, RESOLUTION_SPECS["360x640"])
 
 
+def get_device_slot_count() -> int:
+    """通行证设备的素材槽位数，与 MTP 存储 ID 一一对应，存储预算按槽位均分"""
+    # 延迟导入：_mext 包初始化会加载 Qt，无界面的批量导出只在设置了存储预算时才需要
+    from _mext.core.constants import ELECTRIC_PASS_STORAGE_IDS
+    return len(ELECTRIC_PASS_STORAGE_IDS)
+
+
 def microseconds_to_seconds(us: int) -> float:
     """微秒转秒"""
     return us / MICROSECONDS_PER_SECOND
@@ -138,6 +145,11 @@ def seconds_to_microseconds(s: float) -> int:
     return int(s * MICROSECONDS_PER_SECOND)
 
 
+def microseconds_to_frames(us: int, fps: float) -> int:
+    """微秒按帧率换算为帧数（向下取整），至少为 1（与模拟器一致）"""
+    return max(1, int(int(us) * fps) // MICROSECONDS_PER_SECOND)
+
+
 # ===== GitHub 更新配置 =====
 GITHUB_OWNER = "rhodesepass"
 GITHUB_REPO = "neo-assetmaker"
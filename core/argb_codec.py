@@ -0,0 +1,122 @@
+"""
+ARGB编解码 - 设备端 overlay.argb / Logo 原始像素格式
+
+文件格式：无文件头，逐像素4字节，字节顺序为 B, G, R, A
+（即小端序的 0xAARRGGBB），图像整体旋转180度存储。
+"""
+import os
+import logging
+from typing import Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARGB_BYTES_PER_PIXEL = 4
+
+
+def encode_argb(mat: np.ndarray, rotate_180: bool = True) -> np.ndarray:
+    """
+    将图像矩阵编码为ARGB像素数组
+
+    整个过程只有一次整块拷贝：旋转通过负步长视图完成，
+    通道重排和alpha填充直接写入预分配的输出数组。
+
+    Args:
+        mat: 输入图像 (灰度 / BGR / BGRA)
+        rotate_180: 是否旋转180度（设备端要求）
+
+    Returns:
+        (H, W, 4) 的连续 uint8 数组，字节顺序为 B, G, R, A
+    """
+    mat = np.asarray(mat)
+    if mat.dtype != np.uint8:
+        mat = mat.astype(np.uint8)
+    if mat.ndim == 3 and mat.shape[2] == 1:
+        mat = mat[:, :, 0]
+
+    if rotate_180:
+        mat = mat[::-1, ::-1]
+
+    h, w = mat.shape[:2]
+    channels = mat.shape[2] if mat.ndim == 3 else 1
+
+    if channels == 4:
+        return np.ascontiguousarray(mat)
+
+    out = np.empty((h, w, ARGB_BYTES_PER_PIXEL), dtype=np.uint8)
+    if channels == 3:
+        out[:, :, :3] = mat
+    elif channels == 1:
+        out[:, :, :3] = mat[:, :, np.newaxis]
+    else:
+        raise ValueError(f"不支持的通道数: {channels}")
+    out[:, :, 3] = 255
+    return out
+
+
+def write_argb(output_path: str, mat: np.ndarray, rotate_180: bool = True) -> int:
+    """
+    写出ARGB文件
+
+    Args:
+        output_path: 输出文件路径
+        mat: 输入图像 (灰度 / BGR / BGRA)
+        rotate_180: 是否旋转180度
+
+    Returns:
+        写入的字节数
+    """
+    argb = encode_argb(mat, rotate_180=rotate_180)
+    with open(output_path, "wb") as f:
+        # 连续数组的 memoryview 可直接交给缓冲写入，无需 tobytes() 再拷贝一次
+        f.write(memoryview(argb).cast("B"))
+    logger.debug(f"已写出ARGB: {output_path} ({argb.shape[1]}x{argb.shape[0]})")
+    return argb.nbytes
+
+
+def read_argb(
+    path: str,
+    width: int,
+    height: int,
+    writable: bool = False
+) -> Union[np.memmap, np.ndarray]:
+    """
+    以内存映射方式读取ARGB文件
+
+    Args:
+        path: ARGB文件路径
+        width: 图像宽度
+        height: 图像高度
+        writable: 为 True 时以读写模式映射（修改会写回文件）
+
+    Returns:
+        (H, W, 4) 的 uint8 数组，字节顺序为 B, G, R, A（仍为旋转180度的存储方向）
+    """
+    expected = width * height * ARGB_BYTES_PER_PIXEL
+    actual = os.path.getsize(path)
+    if actual != expected:
+        raise ValueError(
+            f"ARGB文件大小不匹配: {path} 实际 {actual} 字节, "
+            f"{width}x{height} 应为 {expected} 字节"
+        )
+    return np.memmap(
+        path, dtype=np.uint8, mode="r+" if writable else "r",
+        shape=(height, width, ARGB_BYTES_PER_PIXEL)
+    )
+
+
+def decode_argb(argb: np.ndarray, rotate_180: bool = True) -> np.ndarray:
+    """
+    将ARGB像素数组还原为BGRA图像
+
+    Args:
+        argb: read_argb 返回的数组
+        rotate_180: 是否撤销存储时的180度旋转
+
+    Returns:
+        (H, W, 4) 的 BGRA 图像
+    """
+    if rotate_180:
+        argb = argb[::-1, ::-1]
+    return np.ascontiguousarray(argb)
@@ -0,0 +1,257 @@
+"""
+命令行批量导出 - 不启动界面，用进程池并行导出多个项目
+
+用法:
+    python main.py export PROJECT [PROJECT ...] [-o OUTPUT] [--jobs N] [--report report.json]
+    python main.py export PROJECT [PROJECT ...] --dry-run
+
+PROJECT 为项目目录或 epconfig.json 路径。每个项目在独立的工作进程中导出，
+进程内仍按 TaskScheduler 并发导出各素材；本模块及其依赖都不导入 PyQt6。
+--dry-run 只试运行估算各产物的耗时、输出大小和临时空间，不写出任何文件。
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from config.epconfig import ScreenType
+from core.export_engine import (
+    EncoderPixelFormat, ExportEngine, ExportOptions, VideoExportEngine, build_export_tasks
+)
+from core.export_estimate import format_bytes, format_duration
+from core.rate_tuner import QualityMetric, RateTarget
+from core.project_export import collect_project_export_data, load_project, prepare_export
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_SUBDIR = "export"
+
+
+def default_jobs() -> int:
+    """默认并行项目数：全部逻辑核心"""
+    return max(1, os.cpu_count() or 1)
+
+
+def export_project(
+    project: str,
+    output_dir: str,
+    options: ExportOptions,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    导出单个项目（在工作进程中执行）
+
+    Args:
+        dry_run: 只估算，不导出
+
+    Returns:
+        结果记录：project, output, status ("ok"/"failed"), message, elapsed, cache；
+        估算时另有 estimate（ExportEstimate.to_dict()），message 为逐产物的估算说明
+    """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {
+        "project": project,
+        "output": output_dir,
+        "status": "ok",
+        "message": "",
+        "elapsed": 0.0,
+        "cache": None,
+    }
+    try:
+        base_dir, epconfig = load_project(project)
+        if dry_run:
+            # 叠加层附带的图片也不写出
+            data = collect_project_export_data(epconfig, base_dir)
+        else:
+            data = prepare_export(epconfig, base_dir, output_dir, options.screens)
+        tasks = build_export_tasks(epconfig, options=options, **data)
+        if not tasks:
+            raise RuntimeError("没有需要导出的内容")
+
+        engine = ExportEngine()
+        engine.setup(
+            tasks, output_dir, epconfig=epconfig,
+            resolution=epconfig.screen.value, options=options
+        )
+        if dry_run:
+            estimate = engine.estimate()
+            result["estimate"] = estimate.to_dict()
+            result["message"] = "\n".join(estimate.summary_lines())
+        else:
+            result["message"] = engine.run()
+        stats = engine.cache_stats
+        if stats is not None:
+            result["cache"] = {"hits": stats.hits, "misses": stats.misses}
+    except InterruptedError:
+        result["status"] = "failed"
+        result["message"] = "导出已取消"
+    except Exception as e:
+        # 详细日志模式下附带堆栈
+        logger.error(f"导出项目失败: {project}: {e}", exc_info=logger.isEnabledFor(logging.INFO))
+        result["status"] = "failed"
+        result["message"] = str(e)
+    result["elapsed"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def assign_output_dirs(projects: List[str], output_root: Optional[str]) -> List[str]:
+    """
+    为各项目分配导出目录
+
+    未指定 output_root 时导出到各项目目录下的 export/；
+    指定时导出到 output_root/<项目目录名>/，重名时追加序号。
+    """
+    outputs = []
+    used = set()
+    for project in projects:
+        project_dir = project if os.path.isdir(project) else os.path.dirname(os.path.abspath(project))
+        if output_root is None:
+            outputs.append(os.path.join(project_dir, DEFAULT_OUTPUT_SUBDIR))
+            continue
+        name = os.path.basename(os.path.normpath(os.path.abspath(project_dir))) or "project"
+        candidate, index = name, 2
+        while candidate in used:
+            candidate = f"{name}_{index}"
+            index += 1
+        used.add(candidate)
+        outputs.append(os.path.join(output_root, candidate))
+    return outputs
+
+
+def _init_worker(log_level: int):
+    """工作进程初始化（Windows 下以 spawn 启动，不继承主进程的日志配置）"""
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s"
+    )
+
+
+def run_batch(
+    projects: List[str],
+    output_dirs: List[str],
+    options: ExportOptions,
+    jobs: int,
+    log_level: int = logging.WARNING,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """并行导出（或估算）全部项目，返回汇总报告"""
+    start = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(projects)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(log_level,)
+    ) as executor:
+        futures = {
+            executor.submit(export_project, project, output_dir, options, dry_run): index
+            for index, (project, output_dir) in enumerate(zip(projects, output_dirs))
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results[futures[future]] = result
+                state = "完成" if result["status"] == "ok" else "失败"
+                print(f"[{done}/{len(projects)}] {state} {result['elapsed']:.1f}s "
+                      f"{result['project']} -> {result['output']}"
+                      + ("" if result["status"] == "ok" else f": {result['message']}"),
+                      flush=True)
+                if dry_run and result["status"] == "ok":
+                    for line in result["message"].splitlines():
+                        print(f"    {line}", flush=True)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    return {
+        "jobs": jobs,
+        "cpu_budget_per_project": options.cpu_budget,
+        "elapsed": round(time.perf_counter() - start, 3),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "projects": results,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py export", description="批量导出通行证素材（不启动界面）"
+    )
+    parser.add_argument("projects", nargs="+", help="项目目录或 epconfig.json 路径")
+    parser.add_argument("-o", "--output", help="导出根目录，默认导出到各项目目录下的 export/")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="同时导出的项目数上限，默认为 CPU 核心数")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="每个项目的编码线程预算，默认为 CPU 核心数 / 并行项目数")
+    parser.add_argument("--engine", choices=[e.value for e in VideoExportEngine],
+                        default=VideoExportEngine.PIPELINE.value, help="视频导出引擎")
+    parser.add_argument("--pixel-format", choices=[f.value for f in EncoderPixelFormat],
+                        default=EncoderPixelFormat.I420.value,
+                        help="管道模式送入编码器的像素格式")
+    parser.add_argument("--all-resolutions", action="store_true",
+                        help="为所有屏幕分辨率各导出一套素材")
+    parser.add_argument("--segments", type=int, default=0, help="分段并行编码的最大段数")
+    parser.add_argument("--storage-budget", type=float, default=0,
+                        help="设备存储预算（MB），按设备槽位数均分后试编码选择码率")
+    quality = parser.add_mutually_exclusive_group()
+    quality.add_argument("--min-vmaf", type=float, default=0,
+                         help="画质下限（VMAF），选择达到该分数的最低码率")
+    quality.add_argument("--min-psnr", type=float, default=0,
+                         help="画质下限（PSNR，dB），选择达到该值的最低码率")
+    parser.add_argument("--no-cache", action="store_true", help="不使用导出缓存")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="只估算各产物的耗时、输出大小和临时空间，不导出")
+    parser.add_argument("--report", help="写出 JSON 汇总报告的路径")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    return parser
+
+
+def build_rate_target(args: argparse.Namespace) -> Optional[RateTarget]:
+    """由命令行参数构建自动码率目标，都未指定时为 None"""
+    target = RateTarget(
+        storage_budget_bytes=int(args.storage_budget * 1024 * 1024),
+        quality_floor=args.min_psnr or args.min_vmaf,
+        metric=QualityMetric.PSNR if args.min_psnr else QualityMetric.VMAF
+    )
+    return target if target.enabled else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回退出码（有项目失败时为 1）"""
+    args = build_parser().parse_args(argv)
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    _init_worker(log_level)
+
+    jobs = max(1, min(args.jobs or default_jobs(), len(args.projects)))
+    options = ExportOptions(
+        engine=VideoExportEngine(args.engine),
+        pixel_format=EncoderPixelFormat(args.pixel_format),
+        cpu_budget=args.threads or max(1, default_jobs() // jobs),
+        use_cache=not args.no_cache,
+        screens=list(ScreenType) if args.all_resolutions else [],
+        segment_count=args.segments,
+        rate_target=build_rate_target(args)
+    )
+    output_dirs = assign_output_dirs(args.projects, args.output)
+
+    print(f"{'估算' if args.dry_run else '导出'} {len(args.projects)} 个项目，并行 {jobs} 个，"
+          f"每个项目 {options.cpu_budget} 个编码线程", flush=True)
+    try:
+        report = run_batch(args.projects, output_dirs, options, jobs, log_level, args.dry_run)
+    except KeyboardInterrupt:
+        print("已中断", file=sys.stderr)
+        return 130
+
+    print(f"完成 {report['succeeded']} 个，失败 {report['failed']} 个，用时 {report['elapsed']:.1f}s")
+    if args.dry_run:
+        estimates = [r["estimate"] for r in report["projects"] if r["status"] == "ok"]
+        print(f"预计导出耗时（逐个项目累加）{format_duration(sum(e['total_seconds'] for e in estimates))}，"
+              f"输出 {format_bytes(sum(e['output_bytes'] for e in estimates))}，"
+              f"临时空间 {format_bytes(sum(e['scratch_bytes'] for e in estimates))}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report["failed"] == 0 else 1
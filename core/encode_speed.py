@@ -0,0 +1,102 @@
+"""
+编码速度估计 - 记录本机实测编码速度，用于预估导出耗时
+
+速度以“像素/秒”记录（帧数 × 帧面积 / 耗时），不同分辨率之间可以换算；
+按编码配置（如 2pass 管道、滤镜图、静态图片）分别保存，
+新的测量值以指数滑动平均合并，保存在用户缓存目录下。
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+SPEED_FILE_NAME = "encode_speed.json"
+
+# 新测量值的权重
+SMOOTHING = 0.3
+
+# 太短的测量受启动开销影响大，不计入
+MIN_SAMPLE_SECONDS = 0.5
+
+
+class EncodeSpeedEstimator:
+    """本机编码速度估计（线程安全）"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 保存文件路径，None 表示用户缓存目录下的 encode_speed.json
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._rates: Dict[str, float] = {}
+        self._load()
+
+    def _resolve_path(self) -> Optional[str]:
+        if self._path is None:
+            try:
+                self._path = os.path.join(get_cache_dir(), SPEED_FILE_NAME)
+            except OSError:
+                return None
+        return self._path
+
+    def _load(self):
+        path = self._resolve_path()
+        if not path or not os.path.isfile(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._rates = {k: float(v) for k, v in data.get("pixels_per_second", {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"读取编码速度记录失败: {e}")
+
+    def _save(self):
+        path = self._resolve_path()
+        if not path:
+            return
+        try:
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"pixels_per_second": self._rates}, f, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"保存编码速度记录失败: {e}")
+
+    def pixels_per_second(self, profile: str) -> Optional[float]:
+        """某编码配置的历史速度，无记录时为 None"""
+        with self._lock:
+            return self._rates.get(profile)
+
+    def record(self, profile: str, frames: int, width: int, height: int, seconds: float):
+        """
+        记录一次编码测量
+
+        Args:
+            profile: 编码配置名
+            frames: 编码帧数
+            width: 帧宽度
+            height: 帧高度
+            seconds: 耗时
+        """
+        if frames <= 0 or seconds < MIN_SAMPLE_SECONDS:
+            return
+        rate = frames * width * height / seconds
+        with self._lock:
+            previous = self._rates.get(profile)
+            self._rates[profile] = rate if previous is None else (
+                previous * (1 - SMOOTHING) + rate * SMOOTHING
+            )
+            self._save()
+
+    def estimate_seconds(self, profile: str, frames: int, width: int, height: int) -> Optional[float]:
+        """按历史速度预估编码耗时，无记录时为 None"""
+        rate = self.pixels_per_second(profile)
+        if not rate:
+            return None
+        return frames * width * height / rate
@@ -0,0 +1,213 @@
+"""
+导出缓存 - 按内容寻址的视频导出产物缓存
+
+缓存键由源文件标识（路径、大小、修改时间，或文件内容哈希）、完整导出参数和编码器设置计算得出，
+任何一项变化都会得到新键。命中时把缓存文件复制到输出目录（不用硬链接：输出文件与缓存共用
+inode 时，之后对输出的任何覆盖写都会改坏缓存），跳过解码和编码。缓存目录按总大小上限做LRU淘汰（以文件修改时间作为最近使用时间）。
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：导出算法变化导致产物不同时递增，使旧缓存全部失效
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+
+
+@dataclass
+class ExportCacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def summary(self) -> str:
+        return f"缓存命中 {self.hits} / 未命中 {self.misses}"
+
+
+def source_identity(path: str, content_hash: bool = False) -> Dict[str, Any]:
+    """源文件标识：路径、大小、修改时间，或文件内容哈希"""
+    if content_hash:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return {"sha256": digest.hexdigest()}
+    stat = os.stat(path)
+    return {
+        "path": os.path.normcase(os.path.abspath(path)),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+class ExportCache:
+    """导出产物缓存（线程安全）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 缓存目录，None 表示使用用户缓存目录下的 export
+            max_bytes: 缓存总大小上限
+        """
+        self._cache_dir = cache_dir or get_cache_dir("export")
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = ExportCacheStats()
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    def make_key(
+        self,
+        source_path: str,
+        params: Any,
+        encoder: Dict[str, Any],
+        content_hash: bool = False
+    ) -> Optional[str]:
+        """
+        计算缓存键
+
+        Args:
+            source_path: 源视频/图片路径
+            params: 导出参数（dataclass 或 dict）
+            encoder: 编码器设置
+            content_hash: 以文件内容哈希代替路径/大小/修改时间标识源文件（适合图片等小文件）
+
+        Returns:
+            十六进制键；源文件不可访问时返回 None（不使用缓存）
+        """
+        try:
+            source = source_identity(source_path, content_hash)
+        except OSError:
+            return None
+        if dataclasses.is_dataclass(params):
+            params = dataclasses.asdict(params)
+        if content_hash:
+            # 按内容寻址时路径不参与计算
+            params = {k: v for k, v in params.items() if k != "video_path"}
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "source": source, "params": params, "encoder": encoder},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str, suffix: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}{suffix}")
+
+    def peek(self, key: Optional[str], output_path: str) -> Optional[int]:
+        """
+        查询缓存而不取出（不计入命中统计、不刷新最近使用时间）
+
+        Returns:
+            命中时为缓存产物大小，否则为 None
+        """
+        if key is None:
+            return None
+        try:
+            return os.path.getsize(self._entry_path(key, os.path.splitext(output_path)[1]))
+        except OSError:
+            return None
+
+    def fetch(self, key: Optional[str], output_path: str) -> bool:
+        """
+        命中时将缓存产物放到 output_path
+
+        Returns:
+            是否命中
+        """
+        if key is None:
+            return False
+        entry = self._entry_path(key, os.path.splitext(output_path)[1])
+        if not os.path.isfile(entry):
+            with self._lock:
+                self.stats.misses += 1
+            return False
+
+        # 先复制到同目录的临时文件再替换，输出文件始终是独立的副本
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(entry, temp_path)
+            os.replace(temp_path, output_path)
+            os.utime(entry)  # 刷新最近使用时间
+        except OSError as e:
+            logger.warning(f"读取导出缓存失败，改为重新编码: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            with self._lock:
+                self.stats.misses += 1
+            return False
+
+        with self._lock:
+            self.stats.hits += 1
+        logger.info(f"导出缓存命中: {os.path.basename(output_path)} ({key[:12]})")
+        return True
+
+    def store(self, key: Optional[str], output_path: str):
+        """将新导出的产物存入缓存（复制一份，之后改动输出文件不影响缓存）"""
+        if key is None or not os.path.isfile(output_path):
+            return
+        entry = self._entry_path(key, os.path.splitext(output_path)[1])
+        temp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(output_path, temp_path)
+            os.replace(temp_path, entry)
+        except OSError as e:
+            logger.warning(f"写入导出缓存失败: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self):
+        """超出大小上限时按最近使用时间从旧到新删除"""
+        entries = []
+        total = 0
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.stats.evictions += 1
+            logger.debug(f"导出缓存淘汰: {path}")
+
+    def clear(self):
+        """清空缓存"""
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
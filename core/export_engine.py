@@ -0,0 +1,2028 @@
+"""
+导出引擎 - 素材导出的具体实现（不依赖 Qt）
+
+GUI 的导出服务在工作线程中运行 ExportEngine 并把回调转为信号；
+命令行批量导出直接在各工作进程中运行它。
+"""
+import json
+import os
+import subprocess
+import logging
+import tempfile
+import glob
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Any, Tuple, List, Iterable, Iterator, Callable, Set, Sequence
+from dataclasses import asdict, dataclass, field, replace
+from enum import Enum
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from config.constants import get_device_slot_count, get_resolution_spec
+from config.epconfig import EPConfig, ScreenType
+from core.argb_codec import write_argb
+from core.export_cache import ExportCache, ExportCacheStats
+from core.export_estimate import (
+    DEFAULT_PROBE_SECONDS, DEFAULT_SAMPLE_POINTS, SAMPLE_BURST,
+    ArtifactEstimate, ExportEstimate, VideoProbe, free_disk_bytes, sample_starts, scan_packet_sizes
+)
+from core.export_pipeline import FramePipeline, PipelineStats, default_transform_workers
+from core.export_scheduler import TaskScheduler, ScheduledTask, TaskContext
+from core.ffmpeg_filter_graph import build_video_filter, build_trim_args
+from core.encode_speed import EncodeSpeedEstimator
+from core.ffmpeg_runner import FFmpegRunner, FFmpegProgress, rawvideo_input_args
+from core.frame_transform import FrameTransformPlan, PIX_FMT_BGR24, PIX_FMT_I420, output_frame_size
+from core.keyframe_index import KeyframeIndex, iter_indexed_frames, load_keyframe_index
+from core.rate_tuner import (
+    DEFAULT_CRF_POINTS, ProbePoint, QualityMetric, RateCurve, RateDecision, RateProbeCache,
+    RateTarget, choose_bitrate, parse_quality, probe_ranges, quality_filter, vmaf_available
+)
+from core.segmented_encode import (
+    EncodeSegment, gop_frames, plan_segments, segment_encode_args, write_concat_list, concat_args
+)
+from utils.file_utils import get_app_dir
+
+logger = logging.getLogger(__name__)
+
+# libx264 编码参数（码率另行指定），同时作为导出缓存键的一部分
+X264_ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-profile:v", "high",
+    "-level", "4.0",
+    "-pix_fmt", "yuv420p",
+]
+# 未设置码率目标时的 2pass 目标码率
+VIDEO_BITRATE_KBPS = 3000
+VIDEO_BITRATE = f"{VIDEO_BITRATE_KBPS}k"
+
+PASS_DESCRIPTIONS = ("ffmpeg 2pass第一遍", "ffmpeg 2pass第二遍")
+
+# 图片模式生成的循环视频：1秒@30fps
+STILL_IMAGE_FPS = 30.0
+STILL_IMAGE_FRAMES = 30
+
+
+def find_ffmpeg() -> str:
+    """查找ffmpeg（支持打包环境）"""
+    # 1. 先在应用程序目录查找（支持 Nuitka/PyInstaller 打包）
+    app_ffmpeg = os.path.join(get_app_dir(), "ffmpeg.exe")
+    if os.path.isfile(app_ffmpeg):
+        return app_ffmpeg
+
+    # 2. 在 ffmpeg 目录中查找
+    ffmpeg_dir_ffmpeg = os.path.join(get_app_dir(), "ffmpeg", "ffmpeg.exe")
+    if os.path.isfile(ffmpeg_dir_ffmpeg):
+        return ffmpeg_dir_ffmpeg
+
+    # 3. 在当前工作目录查找
+    local_ffmpeg = os.path.join(os.getcwd(), "ffmpeg.exe")
+    if os.path.isfile(local_ffmpeg):
+        return local_ffmpeg
+
+    # 4. 在系统 PATH 中查找（使用 where 命令）
+    try:
+        cmd = ["where", "ffmpeg"] if os.name == 'nt' else ["which", "ffmpeg"]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode == 0:
+            return result.stdout.strip().split('\n')[0]
+    except Exception:
+        pass
+
+    # 5. 直接检查系统 PATH 环境变量中的路径
+    try:
+        path_env = os.environ.get("PATH", "")
+        paths = path_env.split(os.pathsep)
+        for path in paths:
+            ffmpeg_path = os.path.join(path, "ffmpeg.exe")
+            if os.path.isfile(ffmpeg_path):
+                return ffmpeg_path
+    except Exception:
+        pass
+
+    return ""
+
+
+def _remove_output(output_path: str):
+    """
+    编码前删除已有的输出文件
+
+    FFmpeg 的 -y 会截断并原地重写已有文件；若它与别的文件共用 inode（如旧版本从缓存硬链接而来），
+    对方会被一起改写。先删除使编码总是写入新文件。
+    """
+    if os.path.lexists(output_path):
+        os.remove(output_path)
+
+
+class ExportType(Enum):
+    """导出类型枚举"""
+    LOGO = "logo"
+    OVERLAY = "overlay"
+    LOOP_VIDEO = "loop"
+    INTRO_VIDEO = "intro"
+    ICON = "icon"
+
+
+class VideoExportEngine(Enum):
+    """视频导出引擎"""
+    PIPELINE = "pipeline"  # Python 逐帧处理后经管道送入FFmpeg
+    FILTER_GRAPH = "filter_graph"  # 编译为FFmpeg滤镜图，由FFmpeg完成全部像素处理
+
+
+class EncoderPixelFormat(Enum):
+    """管道模式下送入编码器的原始帧像素格式（值为 FFmpeg -pix_fmt 名称）"""
+    BGR24 = PIX_FMT_BGR24  # 由 FFmpeg 转换为 yuv420p
+    I420 = PIX_FMT_I420  # 变换线程中转换好，管道数据量减半
+
+
+@dataclass
+class ExportOptions:
+    """导出选项"""
+    engine: VideoExportEngine = VideoExportEngine.PIPELINE
+    max_concurrent_tasks: int = 0  # 最大并发任务数，0 表示不限制
+    cpu_budget: int = 0  # 所有编码共用的线程数，0 表示全部核心
+    use_cache: bool = True  # 参数未变的视频直接复用上次的导出产物
+    # 多分辨率导出：非空时每个分辨率输出到同名子目录，视频只解码一次
+    screens: List[ScreenType] = field(default_factory=list)
+    # 分段并行编码的最大段数，0/1 表示不分段（视频太短时也不分段）
+    segment_count: int = 0
+    # 管道模式送入编码器的像素格式（滤镜图引擎由 FFmpeg 自行转换，不受影响）
+    pixel_format: EncoderPixelFormat = EncoderPixelFormat.I420
+    # 自动码率：按设备存储预算 / 画质下限试编码选择码率，None 表示固定默认码率
+    rate_target: Optional[RateTarget] = None
+
+
+@dataclass
+class VideoExportParams:
+    """视频导出参数"""
+    video_path: str
+    cropbox: Tuple[int, int, int, int]  # (x, y, w, h)
+    start_frame: int
+    end_frame: int
+    fps: float
+    resolution: str = "360x640"
+    is_image: bool = False  # True=从图片生成视频
+    rotation: int = 0  # 旋转角度 (0, 90, 180, 270)
+
+
+@dataclass
+class MultiResolutionVideoParams:
+    """多分辨率视频导出参数：源视频只解码一次，分发到各分辨率的编码器"""
+    source: VideoExportParams  # 其中的 resolution 不使用
+    outputs: Dict[str, str]  # 分辨率 -> 相对导出目录的输出路径
+
+
+@dataclass
+class ExportTask:
+    """导出任务"""
+    export_type: ExportType
+    output_path: str
+    data: Any
+    depends_on: List[str] = field(default_factory=list)  # 前置任务的 output_path
+
+
+@dataclass
+class _ProbeSettings:
+    """试运行参数"""
+    probe_dir: str  # 试编码产物的临时目录
+    sample_points: int
+    probe_seconds: float
+
+
+class ExportEngine:
+    """
+    导出引擎（阻塞执行，回调可能在任意工作线程中调用）
+
+    回调:
+        on_progress(百分比, 消息)
+        on_cache_stats(命中, 未命中)
+        on_encode_stats(编码帧率, 预计剩余秒数，-1 表示未知)
+    """
+
+    def __init__(
+        self,
+        on_progress: Optional[Callable[[int, str], None]] = None,
+        on_cache_stats: Optional[Callable[[int, int], None]] = None,
+        on_encode_stats: Optional[Callable[[float, float], None]] = None
+    ):
+        self.on_progress = on_progress or (lambda percent, message: None)
+        self.on_cache_stats = on_cache_stats or (lambda hits, misses: None)
+        self.on_encode_stats = on_encode_stats or (lambda fps, eta: None)
+        self._tasks: List[ExportTask] = []
+        self._output_dir: str = ""
+        self._ffmpeg_path: str = ""
+        self._cancelled: bool = False
+        self._epconfig: Optional[EPConfig] = None
+        self._resolution: str = "360x640"
+        self._options: ExportOptions = ExportOptions()
+        # 正在运行的FFmpeg进程，用于支持取消操作（多个任务可能同时编码）
+        # 参考: Python subprocess文档 - Popen.terminate() 可终止子进程
+        self._ffmpeg_processes: Set[subprocess.Popen] = set()
+        self._process_lock = threading.Lock()
+        self._scheduler: Optional[TaskScheduler] = None
+        self._cache: Optional[ExportCache] = None
+        self._speed: Optional[EncodeSpeedEstimator] = None
+        # 各编码任务当前的 (帧率, 预计剩余秒数)
+        self._encode_stats: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._encode_stats_lock = threading.Lock()
+        # 最近一次视频导出的流水线各级统计
+        self._last_pipeline_stats: Optional[PipelineStats] = None
+        # 自动码率：各视频的大小预算（键为输出文件绝对路径）和试编码结果缓存
+        self._size_budgets: Dict[str, int] = {}
+        self._rate_cache: Optional[RateProbeCache] = None
+        self._rate_decisions: Dict[str, RateDecision] = {}
+
+    def setup(
+        self,
+        tasks: List[ExportTask],
+        output_dir: str,
+        ffmpeg_path: str = "",
+        epconfig: Optional[EPConfig] = None,
+        resolution: str = "360x640",
+        options: Optional[ExportOptions] = None
+    ):
+        """设置导出任务"""
+        self._tasks = tasks
+        self._output_dir = output_dir
+        self._ffmpeg_path = ffmpeg_path or find_ffmpeg()
+        self._epconfig = epconfig
+        self._resolution = resolution
+        self._options = options or ExportOptions()
+        self._cancelled = False
+
+    @property
+    def pipeline_stats(self) -> Optional[PipelineStats]:
+        """最近一次视频导出的流水线统计（用于定位瓶颈）"""
+        return self._last_pipeline_stats
+
+    @property
+    def rate_decisions(self) -> Dict[str, RateDecision]:
+        """本次导出自动码率的选择结果（键为输出文件的规范化绝对路径）"""
+        return dict(self._rate_decisions)
+
+    @property
+    def cache_stats(self) -> Optional[ExportCacheStats]:
+        """本次导出的缓存命中统计，未启用缓存时为 None"""
+        return self._cache.stats if self._cache is not None else None
+
+    def cancel(self):
+        """
+        取消导出
+        
+        根据Python官方subprocess文档:
+        - Popen.terminate(): "Stop the child. On POSIX OSs the method sends SIGTERM
+          to the child. On Windows the Win32 API function TerminateProcess() is called."
+        """
+        self._cancelled = True
+        logger.info("导出任务已请求取消")
+
+        # 立即终止所有正在运行的FFmpeg进程
+        with self._process_lock:
+            processes = list(self._ffmpeg_processes)
+        for process in processes:
+            try:
+                process.terminate()
+                logger.info("已发送终止信号给FFmpeg进程")
+            except Exception as e:
+                logger.warning(f"终止FFmpeg进程时出错: {e}")
+
+    def _is_cancelled(self) -> bool:
+        """用户取消，或其他任务失败导致调度中止"""
+        return self._cancelled or (self._scheduler is not None and self._scheduler.cancelled)
+
+    def _track_process(self, process: subprocess.Popen):
+        with self._process_lock:
+            self._ffmpeg_processes.add(process)
+
+    def _untrack_process(self, process: subprocess.Popen):
+        with self._process_lock:
+            self._ffmpeg_processes.discard(process)
+
+    def run(self) -> str:
+        """
+        执行导出，阻塞直到结束
+
+        Returns:
+            完成消息
+
+        Raises:
+            InterruptedError: 已取消
+            Exception: 导出失败
+        """
+        if len(self._tasks) == 0 and not self._epconfig:
+            return "没有需要导出的任务"
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        self._cache = self._open_cache()
+        self._speed = EncodeSpeedEstimator()
+        self._prepare_rate_tuning()
+
+        self._scheduler = TaskScheduler(
+            self._build_schedule(),
+            max_concurrent=self._options.max_concurrent_tasks,
+            cpu_budget=self._options.cpu_budget,
+            cancel_check=lambda: self._cancelled,
+            on_progress=self.on_progress
+        )
+        self._scheduler.run()
+
+        if self._cache is not None:
+            logger.info(self._cache.stats.summary())
+        self.on_progress(100, "导出完成")
+        return f"成功导出到 {self._output_dir}"
+
+    def estimate(
+        self,
+        sample_points: int = DEFAULT_SAMPLE_POINTS,
+        probe_seconds: float = DEFAULT_PROBE_SECONDS
+    ) -> ExportEstimate:
+        """
+        试运行：估算各产物的耗时、输出大小和临时磁盘占用，不写出任何导出文件
+
+        视频在入点到出点之间取 sample_points 处测量解码、变换耗时，再从中间取
+        probe_seconds 秒实际编码两遍，按总帧数外推；命中导出缓存的视频不测量。
+        各任务逐个测量（不并发），每次测量都使用全部 CPU 预算。
+
+        Raises:
+            InterruptedError: 已取消
+            Exception: 测量失败（如源视频无法打开）
+        """
+        started = time.perf_counter()
+        self._cache = self._open_cache()
+        self._speed = EncodeSpeedEstimator()
+        self._prepare_rate_tuning()
+        results: Dict[str, List[ArtifactEstimate]] = {}
+
+        with tempfile.TemporaryDirectory(prefix="export_estimate_") as probe_dir:
+            settings = _ProbeSettings(probe_dir, sample_points, probe_seconds)
+            self._scheduler = TaskScheduler(
+                [
+                    ScheduledTask(
+                        name=task.output_path,
+                        run=partial(self._estimate_task, task, settings, results),
+                        encodes=task.export_type in (ExportType.LOOP_VIDEO, ExportType.INTRO_VIDEO)
+                    )
+                    for task in self._tasks
+                ],
+                max_concurrent=1,
+                cpu_budget=self._options.cpu_budget,
+                cancel_check=lambda: self._cancelled,
+                on_progress=self.on_progress
+            )
+            self._scheduler.run()
+
+        artifacts = [artifact for task in self._tasks for artifact in results[task.output_path]]
+        artifacts += self._estimate_epconfig()
+        estimate = ExportEstimate(
+            artifacts,
+            free_bytes=free_disk_bytes(self._output_dir),
+            elapsed=time.perf_counter() - started
+        )
+        logger.info("导出估算: " + "; ".join(estimate.summary_lines()))
+        self.on_progress(100, "估算完成")
+        return estimate
+
+    def _estimate_task(
+        self,
+        task: ExportTask,
+        settings: "_ProbeSettings",
+        results: Dict[str, List[ArtifactEstimate]],
+        ctx: TaskContext
+    ):
+        """估算单个任务（非视频素材直接生成到临时目录取实际大小）"""
+        ctx.report(0.0, f"正在估算 {task.output_path}...")
+        probe_path = os.path.join(settings.probe_dir, task.output_path)
+        os.makedirs(os.path.dirname(probe_path), exist_ok=True)
+        started = time.perf_counter()
+
+        if task.export_type in (ExportType.LOGO, ExportType.OVERLAY):
+            self._export_argb(probe_path, task.data, is_logo=task.export_type == ExportType.LOGO)
+            estimates = [ArtifactEstimate(
+                task.output_path, seconds=time.perf_counter() - started,
+                output_bytes=os.path.getsize(probe_path)
+            )]
+        elif task.export_type == ExportType.ICON:
+            size = 0
+            if HAS_CV2:
+                success, encoded = cv2.imencode('.png', task.data)
+                size = encoded.nbytes if success else 0
+            estimates = [ArtifactEstimate(
+                task.output_path, seconds=time.perf_counter() - started, output_bytes=size
+            )]
+        elif isinstance(task.data, MultiResolutionVideoParams):
+            estimates = self._estimate_video_multi_resolution(task.data, settings, ctx)
+        else:
+            estimates = [self._estimate_video(task.output_path, task.data, settings, ctx)]
+        results[task.output_path] = estimates
+
+    def _estimate_epconfig(self) -> List[ArtifactEstimate]:
+        """epconfig.json 的大小（按实际序列化结果计算）"""
+        if not self._epconfig:
+            return []
+        configs = [("epconfig.json", self._epconfig)]
+        if self._options.screens:
+            configs = [
+                (f"{screen.value}/epconfig.json", replace(self._epconfig, screen=screen))
+                for screen in self._options.screens
+            ]
+        return [
+            ArtifactEstimate(name, output_bytes=len(json.dumps(
+                epconfig.to_dict(normalize_paths=True), ensure_ascii=False, indent=4
+            ).encode("utf-8")))
+            for name, epconfig in configs
+        ]
+
+    def _cached_size(
+        self,
+        params: VideoExportParams,
+        segments: Optional[List[EncodeSegment]] = None,
+        output_path: str = ".mp4",
+        bitrate: str = VIDEO_BITRATE
+    ) -> Optional[int]:
+        """已有缓存时返回缓存产物大小"""
+        if self._cache is None:
+            return None
+        return self._cache.peek(self._video_cache_key(params, segments, bitrate), output_path)
+
+    def _estimate_video(
+        self,
+        name: str,
+        params: VideoExportParams,
+        settings: "_ProbeSettings",
+        ctx: TaskContext
+    ) -> ArtifactEstimate:
+        """估算单个分辨率的视频"""
+        if not self._ffmpeg_path:
+            raise RuntimeError("未找到ffmpeg，无法导出视频")
+        if not HAS_CV2:
+            raise RuntimeError("未安装opencv-python，无法处理视频")
+
+        segments = self._plan_segments(params)
+        total_frames = STILL_IMAGE_FRAMES if params.is_image else params.end_frame - params.start_frame
+        bitrate = self._video_bitrate(name, params, ctx, segments)
+        cached_size = self._cached_size(params, segments, name, bitrate)
+        if cached_size is not None:
+            return ArtifactEstimate(name, total_frames, output_bytes=cached_size, cached=True)
+
+        if params.is_image:
+            # 静态图片只有一帧，直接完整编码一次
+            probe_path = os.path.join(settings.probe_dir, name)
+            os.makedirs(os.path.dirname(probe_path), exist_ok=True)
+            started = time.perf_counter()
+            self._export_video_from_image(probe_path, params, ctx)
+            output_bytes = os.path.getsize(probe_path)
+            return ArtifactEstimate(
+                name, total_frames, seconds=time.perf_counter() - started,
+                output_bytes=output_bytes, scratch_bytes=self._cache_copy_bytes(output_bytes)
+            )
+
+        probe = self._probe_video(
+            params, [get_resolution_spec(params.resolution)], [bitrate], settings, ctx
+        )[0]
+        workers = min(default_transform_workers(), ctx.threads)
+        if segments:
+            # 各段独立启动解码和编码进程；段间并发时总计算量不变，按串行累加保守估计
+            seconds = sum(
+                probe.pass_seconds(s.end_frame - s.start_frame, pass_index, workers, ctx.threads)
+                for s in segments for pass_index in range(len(PASS_DESCRIPTIONS))
+            )
+        else:
+            seconds = sum(
+                probe.pass_seconds(total_frames, pass_index, workers, ctx.threads)
+                for pass_index in range(len(PASS_DESCRIPTIONS))
+            )
+        if segments:
+            # 每段以关键帧开头，段内固定 GOP
+            output_bytes = sum(
+                probe.output_size(s.end_frame - s.start_frame, gop_frames(params.fps)) for s in segments
+            )
+        else:
+            output_bytes = probe.output_size(total_frames)
+        scratch_bytes = int(probe.passlog_bytes * total_frames) + self._cache_copy_bytes(output_bytes)
+        if segments:
+            scratch_bytes += output_bytes  # 拼接前的各段文件
+        return ArtifactEstimate(name, total_frames, seconds, output_bytes, scratch_bytes, probe=probe)
+
+    def _estimate_video_multi_resolution(
+        self,
+        data: MultiResolutionVideoParams,
+        settings: "_ProbeSettings",
+        ctx: TaskContext
+    ) -> List[ArtifactEstimate]:
+        """估算多分辨率视频：与导出相同，管道模式下未命中缓存的分辨率共享一次解码"""
+        params_by_resolution = {
+            resolution: replace(data.source, resolution=resolution) for resolution in data.outputs
+        }
+        if data.source.is_image or self._options.engine == VideoExportEngine.FILTER_GRAPH:
+            return [
+                self._estimate_video(
+                    data.outputs[resolution], params_by_resolution[resolution], settings,
+                    ctx.subcontext(index, len(data.outputs))
+                )
+                for index, resolution in enumerate(data.outputs)
+            ]
+
+        total_frames = data.source.end_frame - data.source.start_frame
+        estimates: Dict[str, ArtifactEstimate] = {}
+        bitrates = {
+            resolution: self._video_bitrate(name, params_by_resolution[resolution], ctx)
+            for resolution, name in data.outputs.items()
+        }
+        for resolution, name in data.outputs.items():
+            cached_size = self._cached_size(
+                params_by_resolution[resolution], output_path=name, bitrate=bitrates[resolution]
+            )
+            if cached_size is not None:
+                estimates[resolution] = ArtifactEstimate(
+                    name, total_frames, output_bytes=cached_size, cached=True
+                )
+        pending = [resolution for resolution in data.outputs if resolution not in estimates]
+
+        if len(pending) == 1:
+            resolution = pending[0]
+            estimates[resolution] = self._estimate_video(
+                data.outputs[resolution], params_by_resolution[resolution], settings, ctx
+            )
+        elif pending:
+            probes = self._probe_video(
+                data.source, [get_resolution_spec(resolution) for resolution in pending],
+                [bitrates[resolution] for resolution in pending], settings, ctx
+            )
+            # 各分支共享解码，变换在同一组线程中依次完成，编码进程之间分摊 CPU
+            combined = VideoProbe(
+                seek=probes[0].seek,
+                decode=probes[0].decode,
+                transform=sum(probe.transform for probe in probes),
+                encode=[sum(probe.encode[i] for probe in probes) for i in range(len(PASS_DESCRIPTIONS))],
+                encoder_startup=max(probe.encoder_startup for probe in probes)
+            )
+            workers = min(default_transform_workers(), ctx.threads)
+            seconds = sum(
+                combined.pass_seconds(total_frames, pass_index, workers, ctx.threads)
+                for pass_index in range(len(PASS_DESCRIPTIONS))
+            )
+            total_encode = sum(sum(probe.encode) for probe in probes) or 1.0
+            for resolution, probe in zip(pending, probes):
+                output_bytes = probe.output_size(total_frames)
+                estimates[resolution] = ArtifactEstimate(
+                    data.outputs[resolution], total_frames,
+                    # 总耗时按各分支的编码开销分摊
+                    seconds=seconds * sum(probe.encode) / total_encode,
+                    output_bytes=output_bytes,
+                    scratch_bytes=int(probe.passlog_bytes * total_frames)
+                    + self._cache_copy_bytes(output_bytes),
+                    probe=probe
+                )
+        return [estimates[resolution] for resolution in data.outputs]
+
+    def _cache_copy_bytes(self, output_bytes: int) -> int:
+        """存入导出缓存时额外复制的大小"""
+        return output_bytes if self._cache is not None else 0
+
+    def _probe_video(
+        self,
+        params: VideoExportParams,
+        specs: List[Dict[str, Any]],
+        bitrates: List[str],
+        settings: "_ProbeSettings",
+        ctx: TaskContext
+    ) -> List[VideoProbe]:
+        """
+        测量视频在各分辨率规格（及对应目标码率）下的单帧开销
+
+        管道模式：在入点到出点之间均匀取样测量解码和变换，再把中间一段变换后的帧
+        实际编码两遍；滤镜图模式：解码、变换都在FFmpeg内完成，直接对中间一段跑两遍编码。
+        """
+        total_frames = params.end_frame - params.start_frame
+        probe_frames = max(1, min(total_frames, int(round(settings.probe_seconds * params.fps))))
+        probe_start = params.start_frame + (total_frames - probe_frames) // 2
+        probe_params = replace(
+            params, start_frame=probe_start, end_frame=probe_start + probe_frames
+        )
+        startup = self._measure_encoder_startup(ctx.threads)
+
+        if self._options.engine == VideoExportEngine.FILTER_GRAPH:
+            probes = []
+            for index, spec in enumerate(specs):
+                input_args, filter_args = self._filter_graph_args(probe_params, spec)
+                probe = VideoProbe(encoder_startup=startup)
+                self._probe_encode(
+                    probe, input_args, filter_args, None, probe_frames, bitrates[index],
+                    settings, index, ctx
+                )
+                probes.append(probe)
+            return probes
+
+        # 取样：各取样点连续读几帧，记录读到第一帧的延迟（含解码进程启动和从关键帧解码到该点）
+        first_frame_seconds: List[float] = []
+        samples: List[np.ndarray] = []
+        for start in sample_starts(params.start_frame, params.end_frame, settings.sample_points):
+            ctx.check_cancelled()
+            sample = replace(
+                params, start_frame=start, end_frame=min(params.end_frame, start + SAMPLE_BURST)
+            )
+            started = time.perf_counter()
+            frames = self._iter_source_frames(sample)
+            first = next(frames, None)
+            if first is None:
+                continue
+            first_frame_seconds.append(time.perf_counter() - started)
+            samples.append(first)
+            samples.extend(frames)
+        if not samples:
+            raise RuntimeError(f"无法读取视频帧: {params.video_path}")
+
+        # 解码：中间一段连续解码，第一帧之后的平均间隔即单帧解码耗时
+        frame_times = []
+        started = time.perf_counter()
+        for _ in self._iter_source_frames(probe_params):
+            ctx.check_cancelled()
+            frame_times.append(time.perf_counter() - started)
+        if len(frame_times) > 1:
+            decode = (frame_times[-1] - frame_times[0]) / (len(frame_times) - 1)
+        else:
+            decode = frame_times[0] if frame_times else 0.0
+        seek = max(0.0, sum(first_frame_seconds) / len(first_frame_seconds) - decode)
+        ctx.report(0.1, f"{ctx.task.name} 已测量解码")
+
+        # 变换：每个规格先预热一次（分配线程私有缓冲区），再逐帧计时
+        plans = [self._make_frame_transform(params, spec) for spec in specs]
+        probes = []
+        for plan in plans:
+            plan.release(plan(samples[0]))
+            started = time.perf_counter()
+            for frame in samples:
+                plan.release(plan(frame))
+            probes.append(VideoProbe(
+                seek=seek, decode=decode,
+                transform=(time.perf_counter() - started) / len(samples),
+                encoder_startup=startup
+            ))
+
+        # 编码：中间一段变换后的帧保留在内存中，两遍编码都直接写入
+        transformed: List[List[np.ndarray]] = [[] for _ in plans]
+        for frame in self._iter_source_frames(probe_params):
+            ctx.check_cancelled()
+            for frames, plan in zip(transformed, plans):
+                frames.append(plan(frame))
+        ctx.report(0.2, f"{ctx.task.name} 试编码...")
+        for index, (probe, plan, frames) in enumerate(zip(probes, plans, transformed)):
+            frame_w, frame_h = plan.frame_size
+            input_args = rawvideo_input_args(
+                frame_w, frame_h, params.fps, self._options.pixel_format.value
+            )
+            self._probe_encode(
+                probe, input_args, [], frames, len(frames), bitrates[index], settings, index, ctx
+            )
+            ctx.report(0.2 + 0.8 * (index + 1) / len(plans), f"{ctx.task.name} 试编码...")
+        return probes
+
+    def _probe_encode(
+        self,
+        probe: VideoProbe,
+        input_args: List[str],
+        filter_args: List[str],
+        frames: Optional[List[np.ndarray]],
+        frame_count: int,
+        bitrate: str,
+        settings: "_ProbeSettings",
+        index: int,
+        ctx: TaskContext
+    ):
+        """实际编码两遍，记录各遍单帧耗时、单帧输出大小和 2pass 日志大小"""
+        output_file = os.path.join(settings.probe_dir, f"probe_{index}.mp4").replace("\\", "/")
+        passlog_prefix = os.path.join(settings.probe_dir, f"probe_{index}_2pass")
+        encode_args = filter_args + X264_ENCODE_ARGS + ["-b:v", bitrate]
+        try:
+            for pass_index, description in enumerate(PASS_DESCRIPTIONS):
+                ctx.check_cancelled()
+                args = self._x264_pass_args(
+                    input_args, encode_args, pass_index, passlog_prefix, output_file, ctx.threads
+                )
+                started = time.perf_counter()
+                if frames is not None:
+                    self._pipe_frames_to_ffmpeg(args, frames, f"试编码 {description}")
+                else:
+                    self._run_ffmpeg(args, f"试编码 {description}")
+                elapsed = time.perf_counter() - started
+                probe.encode[pass_index] = max(0.0, elapsed - probe.encoder_startup) / frame_count
+                if pass_index == 0:
+                    probe.passlog_bytes = sum(
+                        os.path.getsize(f) for f in glob.glob(f"{passlog_prefix}*.log*")
+                    ) / frame_count
+            keyframes, others = scan_packet_sizes(self._ffmpeg_path, output_file)
+            # 容器开销分摊到每帧；只有关键帧时两者取同一均值
+            overhead = (os.path.getsize(output_file) - sum(keyframes) - sum(others)) / frame_count
+            probe.keyframe_bytes = sum(keyframes) / max(1, len(keyframes)) + overhead
+            probe.output_bytes = (
+                sum(others) / len(others) + overhead if others else probe.keyframe_bytes
+            )
+        finally:
+            self._remove_passlogs(passlog_prefix)
+
+    def _measure_encoder_startup(self, threads: int) -> float:
+        """启动FFmpeg并编码一帧的固定开销（每遍编码都要付出一次）"""
+        args = [
+            "-f", "lavfi", "-i", "color=c=black:s=64x64:r=30", "-frames:v", "1",
+            "-c:v", "libx264", "-threads", str(threads), "-f", "null", "-"
+        ]
+        started = time.perf_counter()
+        self._run_ffmpeg(args, "试编码启动")
+        return time.perf_counter() - started
+
+    def _open_cache(self) -> Optional[ExportCache]:
+        """打开导出缓存；缓存目录不可用时不使用缓存"""
+        if not self._options.use_cache:
+            return None
+        try:
+            return ExportCache()
+        except OSError as e:
+            logger.warning(f"导出缓存不可用: {e}")
+            return None
+
+    def _build_schedule(self) -> List[ScheduledTask]:
+        """
+        将导出任务转换为调度单元
+
+        各素材之间默认互不依赖，可并发执行；
+        epconfig.json 依赖全部素材，只有所有素材导出成功后才会写出。
+        """
+        scheduled = []
+        for task in self._tasks:
+            scheduled.append(ScheduledTask(
+                name=task.output_path,
+                run=partial(self._execute_task, task),
+                weight=self._estimate_task_cost(task),
+                depends_on=list(task.depends_on),
+                encodes=task.export_type in (ExportType.LOOP_VIDEO, ExportType.INTRO_VIDEO)
+            ))
+
+        if self._epconfig:
+            artifacts = [task.output_path for task in self._tasks]
+            if self._options.screens:
+                # 多分辨率：每个子目录一份 screen 字段对应的 epconfig.json
+                for screen in self._options.screens:
+                    config_path = f"{screen.value}/epconfig.json"
+                    scheduled.append(ScheduledTask(
+                        name=config_path,
+                        run=partial(
+                            self._execute_epconfig_task,
+                            replace(self._epconfig, screen=screen), config_path
+                        ),
+                        weight=1.0,
+                        depends_on=artifacts
+                    ))
+            else:
+                scheduled.append(ScheduledTask(
+                    name="epconfig.json",
+                    run=partial(self._execute_epconfig_task, self._epconfig, "epconfig.json"),
+                    weight=1.0,
+                    depends_on=artifacts
+                ))
+        return scheduled
+
+    @staticmethod
+    def _estimate_task_cost(task: ExportTask) -> float:
+        """预估任务开销（单位：编码一帧一遍），用于加权总进度"""
+        if task.export_type in (ExportType.LOOP_VIDEO, ExportType.INTRO_VIDEO):
+            params = task.data
+            outputs = 1
+            if isinstance(params, MultiResolutionVideoParams):
+                params, outputs = params.source, len(params.outputs)
+            if params.is_image:
+                return 1.0 * outputs  # 单帧单遍编码
+            return max(1, params.end_frame - params.start_frame) * 2.0 * outputs  # 2pass
+        return 1.0
+
+    def _execute_task(self, task: ExportTask, ctx: TaskContext):
+        """执行单个任务"""
+        output_path = os.path.join(self._output_dir, task.output_path)
+        ctx.report(0.0, f"正在导出 {task.output_path}...")
+
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            if task.export_type == ExportType.LOGO:
+                self._export_argb(output_path, task.data, is_logo=True)
+
+            elif task.export_type == ExportType.OVERLAY:
+                self._export_argb(output_path, task.data, is_logo=False)
+
+            elif task.export_type == ExportType.ICON:
+                if HAS_CV2:
+                    success, encoded = cv2.imencode('.png', task.data)
+                    if success:
+                        with open(output_path, 'wb') as f:
+                            f.write(encoded.tobytes())
+
+            elif task.export_type in (ExportType.LOOP_VIDEO, ExportType.INTRO_VIDEO):
+                if isinstance(task.data, MultiResolutionVideoParams):
+                    self._export_video_multi_resolution(task.data, ctx)
+                else:
+                    self._export_video_cached(output_path, task.data, ctx)
+        except InterruptedError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"导出 {task.export_type.value} 失败: {str(e)}") from e
+
+    def _execute_epconfig_task(self, epconfig: EPConfig, relative_path: str, ctx: TaskContext):
+        ctx.report(0.0, f"正在生成 {relative_path}...")
+        self._generate_epconfig(epconfig, os.path.join(self._output_dir, relative_path))
+
+    def _video_cache_key(
+        self,
+        params: VideoExportParams,
+        segments: Optional[List[EncodeSegment]] = None,
+        bitrate: str = VIDEO_BITRATE
+    ) -> Optional[str]:
+        """视频导出的缓存键：源文件标识 + 导出参数 + 编码器设置"""
+        if params.is_image:
+            # 图片按内容哈希寻址，同一张图片换路径/重新保存也能命中
+            encoder = {"args": X264_ENCODE_ARGS, "bitrate": VIDEO_BITRATE, "tune": "stillimage"}
+            return self._cache.make_key(params.video_path, params, encoder, content_hash=True)
+        encoder = {
+            "args": X264_ENCODE_ARGS,
+            "bitrate": bitrate,
+            "passes": 2,
+            "engine": self._options.engine.value,
+        }
+        if (self._options.engine == VideoExportEngine.PIPELINE
+                and self._options.pixel_format != EncoderPixelFormat.BGR24):
+            # 色度由我们自己下采样，与 FFmpeg 转换的结果有细微差别
+            encoder["input_pix_fmt"] = self._options.pixel_format.value
+        if segments:
+            # 分段编码的产物与整段编码不同（固定 GOP、各段独立码控）
+            encoder["segments"] = [(s.start_frame, s.end_frame) for s in segments]
+            encoder["segment_args"] = segment_encode_args(params.fps)
+        return self._cache.make_key(params.video_path, params, encoder)
+
+    def _plan_segments(self, params: VideoExportParams) -> Optional[List[EncodeSegment]]:
+        """按导出选项规划分段编码，不分段时为 None"""
+        if params.is_image or self._options.segment_count < 2:
+            return None
+        return plan_segments(
+            params.start_frame, params.end_frame, params.fps, self._options.segment_count
+        )
+
+    def _prepare_rate_tuning(self):
+        """导出/估算开始前分配各视频的大小预算，并打开试编码结果缓存"""
+        target = self._options.rate_target
+        self._size_budgets = {}
+        self._rate_cache = None
+        self._rate_decisions = {}
+        if target is None or not target.enabled:
+            return
+        self._size_budgets = self._allocate_size_budgets(target)
+        try:
+            self._rate_cache = RateProbeCache()
+        except OSError as e:
+            logger.warning(f"码率试编码缓存不可用: {e}")
+
+    def _output_key(self, path: str) -> str:
+        """输出路径（相对导出目录或绝对路径）的规范化绝对路径"""
+        return os.path.normcase(os.path.abspath(os.path.join(self._output_dir, path)))
+
+    def _allocate_size_budgets(self, target: RateTarget) -> Dict[str, int]:
+        """
+        把设备存储预算分给各视频（键为输出文件的规范化绝对路径）
+
+        预算按设备的槽位数均分，每个槽位存放一套素材（多分辨率导出时
+        每个子目录对应一种设备，各按一个槽位计算）。槽位预算减去同目录下非视频素材的大小后
+        按时长分给其中的视频，各视频码率相同；图片生成的视频按默认码率预留。
+        """
+        if target.storage_budget_bytes <= 0:
+            return {}
+        slot_budget = target.storage_budget_bytes // get_device_slot_count()
+        fixed: Dict[str, int] = {}  # 目录 -> 非视频素材大小
+        videos: Dict[str, List[Tuple[str, float]]] = {}  # 目录 -> [(输出路径, 时长)]
+
+        def add_fixed(relative_path: str, size: int):
+            directory = os.path.dirname(relative_path)
+            fixed[directory] = fixed.get(directory, 0) + size
+
+        for task in self._tasks:
+            if task.export_type in (ExportType.LOGO, ExportType.OVERLAY):
+                add_fixed(task.output_path, task.data.shape[0] * task.data.shape[1] * 4)
+            elif task.export_type == ExportType.ICON:
+                if HAS_CV2:
+                    success, encoded = cv2.imencode('.png', task.data)
+                    add_fixed(task.output_path, encoded.nbytes if success else 0)
+            else:
+                params, outputs = task.data, [task.output_path]
+                if isinstance(params, MultiResolutionVideoParams):
+                    params, outputs = params.source, list(params.outputs.values())
+                for relative_path in outputs:
+                    if params.is_image:
+                        add_fixed(relative_path, int(
+                            STILL_IMAGE_FRAMES / STILL_IMAGE_FPS * VIDEO_BITRATE_KBPS * 1000 / 8
+                        ))
+                    else:
+                        videos.setdefault(os.path.dirname(relative_path), []).append(
+                            (relative_path, (params.end_frame - params.start_frame) / params.fps)
+                        )
+        for artifact in self._estimate_epconfig():
+            add_fixed(artifact.name, artifact.output_bytes)
+
+        budgets = {}
+        for directory, entries in videos.items():
+            available = slot_budget - fixed.get(directory, 0)
+            if available <= 0:
+                logger.warning(
+                    f"存储预算不足: 每个槽位 {slot_budget} 字节，非视频素材已占 {fixed.get(directory, 0)} 字节"
+                )
+                available = 1  # 按最低码率编码
+            total = sum(duration for _, duration in entries) or 1.0
+            for relative_path, duration in entries:
+                budgets[self._output_key(relative_path)] = max(1, int(available * duration / total))
+        return budgets
+
+    def _video_bitrate(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext,
+        segments: Optional[List[EncodeSegment]] = None
+    ) -> str:
+        """
+        视频的 2pass 目标码率
+
+        未设置码率目标或图片模式时为默认码率；否则按试编码拟合的码率曲线
+        （有缓存时直接读取）在该视频的大小预算和画质下限之间选择。
+        """
+        target = self._options.rate_target
+        if target is None or not target.enabled or params.is_image:
+            return VIDEO_BITRATE
+        metric, quality_floor = target.metric, target.quality_floor
+        if metric == QualityMetric.VMAF and not vmaf_available(self._ffmpeg_path):
+            logger.warning("FFmpeg 不支持 libvmaf，改用 PSNR 试编码，忽略 VMAF 画质下限")
+            metric, quality_floor = QualityMetric.PSNR, 0.0
+
+        curve = self._rate_curve(params, metric, ctx)
+        decision = choose_bitrate(
+            curve, (params.end_frame - params.start_frame) / params.fps, VIDEO_BITRATE_KBPS,
+            self._size_budgets.get(self._output_key(output_path), 0), quality_floor,
+            pieces=len(segments) if segments else 1
+        )
+        self._rate_decisions[self._output_key(output_path)] = decision
+        logger.info(
+            f"{os.path.basename(output_path)} ({params.resolution}) 码率 {decision.bitrate_kbps} kbps，"
+            f"{decision.reason}，预计 {metric.name} {decision.predicted_quality:.2f}"
+        )
+        return decision.ffmpeg_bitrate
+
+    def _rate_curve(
+        self,
+        params: VideoExportParams,
+        metric: QualityMetric,
+        ctx: TaskContext
+    ) -> RateCurve:
+        """读取或测量视频的码率曲线（按源文件和导出参数缓存）"""
+        ranges = probe_ranges(params.start_frame, params.end_frame, params.fps)
+        settings = {
+            "metric": metric.value,
+            "crf": list(DEFAULT_CRF_POINTS),
+            "ranges": ranges,
+            "args": X264_ENCODE_ARGS,
+            "input_pix_fmt": self._options.pixel_format.value,
+        }
+        key = None
+        if self._rate_cache is not None:
+            key = self._rate_cache.make_key(params.video_path, asdict(params), settings)
+            curve = self._rate_cache.load(key)
+            if curve is not None:
+                logger.info(f"码率试编码缓存命中: {ctx.task.name} ({params.resolution})")
+                return curve
+
+        curve = self._probe_rate_curve(params, ranges, metric, ctx)
+        if self._rate_cache is not None:
+            self._rate_cache.store(key, curve)
+        return curve
+
+    def _probe_rate_curve(
+        self,
+        params: VideoExportParams,
+        ranges: List[Tuple[int, int]],
+        metric: QualityMetric,
+        ctx: TaskContext
+    ) -> RateCurve:
+        """
+        在代表性片段上以各 CRF 并行试编码，测出码率和画质并拟合曲线
+
+        片段经与管道导出相同的变换计划得到参考画面（保留在内存中），
+        各 CRF 的编码和随后的画质对比分摊 CPU 预算。
+        """
+        ctx.report(0.0, f"{ctx.task.name} 正在分析码率...")
+        spec = get_resolution_spec(params.resolution)
+        plan = self._make_frame_transform(params, spec)
+        reference: List[np.ndarray] = []
+        for start, end in ranges:
+            for frame in self._iter_source_frames(replace(params, start_frame=start, end_frame=end)):
+                ctx.check_cancelled()
+                reference.append(plan(frame))
+        if not reference:
+            raise RuntimeError(f"无法读取视频帧: {params.video_path}")
+
+        frame_w, frame_h = plan.frame_size
+        input_args = rawvideo_input_args(frame_w, frame_h, params.fps, self._options.pixel_format.value)
+        duration = len(reference) / params.fps
+        threads = max(1, ctx.threads // len(DEFAULT_CRF_POINTS))
+
+        with tempfile.TemporaryDirectory(prefix="rate_probe_") as probe_dir:
+            def probe(crf: int) -> ProbePoint:
+                output_file = os.path.join(probe_dir, f"crf_{crf}.mp4").replace("\\", "/")
+                self._pipe_frames_to_ffmpeg(
+                    input_args + X264_ENCODE_ARGS + [
+                        "-crf", str(crf), "-threads", str(threads), "-an", "-y", output_file
+                    ],
+                    reference, f"码率试编码 CRF {crf}"
+                )
+                quality = self._measure_quality(
+                    output_file, input_args, reference, metric, (spec["width"], spec["height"]), threads
+                )
+                return ProbePoint(crf, os.path.getsize(output_file) * 8 / duration, quality)
+
+            with ThreadPoolExecutor(
+                max_workers=len(DEFAULT_CRF_POINTS), thread_name_prefix="rate-probe"
+            ) as executor:
+                futures = [executor.submit(probe, crf) for crf in DEFAULT_CRF_POINTS]
+                errors = [future.exception() for future in futures]
+
+        errors = [e for e in errors if e is not None]
+        if errors:
+            raise next((e for e in errors if not isinstance(e, InterruptedError)), errors[0])
+        points = [future.result() for future in futures]
+        logger.info(f"码率试编码 {ctx.task.name} ({params.resolution}): " + ", ".join(
+            f"CRF {p.crf} {p.bitrate / 1000:.0f} kbps {metric.name} {p.quality:.2f}" for p in points
+        ))
+        return RateCurve.fit(metric, points)
+
+    def _measure_quality(
+        self,
+        encoded_file: str,
+        input_args: List[str],
+        reference: List[np.ndarray],
+        metric: QualityMetric,
+        content_size: Tuple[int, int],
+        threads: int
+    ) -> float:
+        """参考画面经管道送入对比滤镜，与试编码结果逐帧比较，返回平均画质"""
+        args = ["-i", encoded_file] + input_args + [
+            "-lavfi", quality_filter(metric, *content_size, threads), "-f", "null", "-"
+        ]
+        runner = FFmpegRunner(self._ffmpeg_path, cancel_check=self._is_cancelled)
+        runner.start(args, stdin=True)
+        self._track_process(runner.process)
+        try:
+            for frame in reference:
+                runner.write_frame(frame)
+            runner.finish(f"画质对比 {metric.name}")
+        except BaseException:
+            runner.kill()
+            raise
+        finally:
+            self._untrack_process(runner.process)
+        quality = parse_quality(metric, runner.stderr_tail)
+        if quality is None:
+            raise RuntimeError(f"无法读取 {metric.name} 结果: {runner.stderr_tail[-500:]}")
+        return quality
+
+    def _export_video_cached(self, output_path: str, params: VideoExportParams, ctx: TaskContext):
+        """导出视频，参数未变时直接复用缓存"""
+        segments = self._plan_segments(params)
+        bitrate = self._video_bitrate(output_path, params, ctx, segments)
+        if self._cache is None:
+            # 上次导出留下的输出文件可能是指向缓存的硬链接（旧版本），先删除再编码
+            _remove_output(output_path)
+            self._export_video(output_path, params, ctx, segments, bitrate)
+            return
+
+        key = self._video_cache_key(params, segments, bitrate)
+        hit = self._cache.fetch(key, output_path)
+        stats = self._cache.stats
+        self.on_cache_stats(stats.hits, stats.misses)
+        if hit:
+            ctx.report(1.0, f"{ctx.task.name} 使用缓存")
+            return
+
+        _remove_output(output_path)
+        self._export_video(output_path, params, ctx, segments, bitrate)
+        self._cache.store(key, output_path)
+
+    def _export_video_multi_resolution(self, data: MultiResolutionVideoParams, ctx: TaskContext):
+        """
+        导出多个分辨率的同一段视频
+
+        管道模式下源视频每遍只解码一次，旋转、裁剪后分发给各分辨率的缩放/补边分支，
+        每个分支各自一个编码进程；已有缓存的分辨率直接复用。
+        图片模式和滤镜图模式没有可共享的解码，逐个分辨率导出。
+        """
+        outputs = {
+            resolution: os.path.join(self._output_dir, relative_path)
+            for resolution, relative_path in data.outputs.items()
+        }
+        params_by_resolution = {
+            resolution: replace(data.source, resolution=resolution) for resolution in outputs
+        }
+        # 各分辨率的子目录须在任何编码进程（及其 2pass 日志）启动前建好，
+        # 不能依赖同目录下其他任务先创建
+        for output_path in outputs.values():
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        if data.source.is_image or self._options.engine == VideoExportEngine.FILTER_GRAPH:
+            for index, resolution in enumerate(outputs):
+                self._export_video_cached(
+                    outputs[resolution], params_by_resolution[resolution],
+                    ctx.subcontext(index, len(outputs))
+                )
+            return
+
+        # 先取缓存，只编码未命中的分辨率
+        pending: Dict[str, Optional[str]] = {}
+        bitrates = {
+            resolution: self._video_bitrate(output_path, params_by_resolution[resolution], ctx)
+            for resolution, output_path in outputs.items()
+        }
+        for resolution, output_path in outputs.items():
+            key = None
+            if self._cache is not None:
+                key = self._video_cache_key(
+                    params_by_resolution[resolution], bitrate=bitrates[resolution]
+                )
+                hit = self._cache.fetch(key, output_path)
+                self.on_cache_stats(self._cache.stats.hits, self._cache.stats.misses)
+                if hit:
+                    continue
+            _remove_output(output_path)
+            pending[resolution] = key
+
+        if len(pending) == 1:
+            resolution = next(iter(pending))
+            self._export_video(
+                outputs[resolution], params_by_resolution[resolution], ctx,
+                bitrate=bitrates[resolution]
+            )
+        elif pending:
+            self._export_video_fanout(
+                data.source, {resolution: outputs[resolution] for resolution in pending},
+                {resolution: bitrates[resolution] for resolution in pending}, ctx
+            )
+
+        if self._cache is not None:
+            for resolution, key in pending.items():
+                self._cache.store(key, outputs[resolution])
+
+    def _export_video_fanout(
+        self,
+        params: VideoExportParams,
+        outputs: Dict[str, str],
+        bitrates: Dict[str, str],
+        ctx: TaskContext
+    ):
+        """单次解码、多路编码（bitrates 为各分辨率的目标码率）"""
+        if not self._ffmpeg_path:
+            raise RuntimeError("未找到ffmpeg，无法导出视频")
+        if not HAS_CV2:
+            raise RuntimeError("未安装opencv-python，无法处理视频")
+
+        resolutions = list(outputs)
+        specs = [get_resolution_spec(resolution) for resolution in resolutions]
+        frame_sizes = [self._get_output_frame_size(spec) for spec in specs]
+        total_frames = params.end_frame - params.start_frame
+
+        plans = [self._make_frame_transform(params, spec) for spec in specs]
+
+        def transform(frame: np.ndarray) -> Tuple[np.ndarray, ...]:
+            return tuple(plan(frame) for plan in plans)
+
+        def release(frames: Tuple[np.ndarray, ...]):
+            for plan, frame in zip(plans, frames):
+                plan.release(frame)
+
+        def frame_source(pass_index: int):
+            return self._iter_video_frames(params, transform, ctx, release)
+
+        # 以最慢的分支作为整体进度；速度按所有分支的像素总量记录
+        profile = f"x264_2pass_fanout{len(resolutions)}"
+        total_pixels = sum(w * h for w, h in frame_sizes)
+        report = self._make_encode_progress(ctx, profile, total_frames, (total_pixels, 1))
+        latest: Dict[Tuple[int, int], FFmpegProgress] = {}
+        latest_lock = threading.Lock()
+
+        def on_progress(pass_index: int, branch_index: int, progress: FFmpegProgress):
+            with latest_lock:
+                latest[(pass_index, branch_index)] = progress
+                snapshots = [latest.get((pass_index, i)) for i in range(len(resolutions))]
+                if any(snapshot is None for snapshot in snapshots):
+                    return
+                slowest = min(snapshots, key=lambda snapshot: snapshot.fraction)
+                finished = all(snapshot.finished for snapshot in snapshots)
+                report(pass_index, replace(slowest, finished=finished))
+
+        self._update_encode_stats(
+            ctx.task.name, 0.0,
+            self._estimate_encode_seconds(profile, total_frames, (total_pixels, 1))
+        )
+        frames_written = self._run_ffmpeg_2pass_fanout(
+            branches=[
+                (rawvideo_input_args(w, h, params.fps, self._options.pixel_format.value),
+                 outputs[resolution].replace("\\", "/"), bitrates[resolution])
+                for resolution, (w, h) in zip(resolutions, frame_sizes)
+            ],
+            frame_source=frame_source,
+            threads=lambda: ctx.threads,
+            total_frames=total_frames,
+            on_progress=on_progress
+        )
+        logger.info(f"成功编码 {frames_written}/{total_frames} 帧 -> {', '.join(resolutions)}")
+
+    def _update_encode_stats(
+        self,
+        task_name: str,
+        fps: float,
+        eta: Optional[float],
+        finished: bool = False
+    ):
+        """汇总并发编码任务的帧率（求和）与剩余时间（取最大值）"""
+        with self._encode_stats_lock:
+            if finished:
+                self._encode_stats.pop(task_name, None)
+            else:
+                previous = self._encode_stats.get(task_name)
+                if eta is None and previous is not None:
+                    eta = previous[1]  # 暂时无法估计时沿用上一次的值
+                self._encode_stats[task_name] = (fps, eta)
+            total_fps = sum(f for f, _ in self._encode_stats.values())
+            etas = [e for _, e in self._encode_stats.values() if e is not None]
+        self.on_encode_stats(total_fps, max(etas) if etas else -1.0)
+
+    def _make_encode_progress(
+        self,
+        ctx: TaskContext,
+        profile: str,
+        total_frames: int,
+        frame_size: Tuple[int, int],
+        passes: int = 2
+    ) -> Callable[[int, FFmpegProgress], None]:
+        """
+        构建FFmpeg进度回调：更新任务进度、帧率和剩余时间，并记录本机编码速度
+
+        Args:
+            profile: 编码速度记录的配置名，实际按 "{profile}_pass{n}" 分遍记录
+            total_frames: 每遍的帧数
+            frame_size: 编码帧尺寸 (宽, 高)
+            passes: 编码遍数
+        """
+        width, height = frame_size
+
+        def on_progress(pass_index: int, progress: FFmpegProgress):
+            if progress.finished:
+                self._speed.record(
+                    f"{profile}_pass{pass_index + 1}", progress.frame, width, height, progress.elapsed
+                )
+
+            # 剩余时间 = 本遍剩余 + 之后各遍（有历史速度时按历史速度，否则按本遍速度推算）
+            eta = progress.eta_seconds
+            if eta is not None:
+                for later in range(pass_index + 1, passes):
+                    estimate = self._speed.estimate_seconds(
+                        f"{profile}_pass{later + 1}", total_frames, width, height
+                    )
+                    eta += estimate if estimate is not None else progress.elapsed / progress.fraction
+            self._update_encode_stats(
+                ctx.task.name, progress.fps, eta,
+                finished=progress.finished and pass_index == passes - 1
+            )
+
+            pass_label = f"(pass {pass_index + 1}/{passes})" if passes > 1 else ""
+            ctx.report(
+                (pass_index + progress.fraction) / passes,
+                f"{ctx.task.name} 编码{pass_label} 帧 {progress.frame}/{total_frames}"
+            )
+
+        return on_progress
+
+    def _estimate_encode_seconds(
+        self,
+        profile: str,
+        total_frames: int,
+        frame_size: Tuple[int, int],
+        passes: int = 2
+    ) -> Optional[float]:
+        """按本机历史编码速度预估总耗时，无记录时为 None"""
+        total = 0.0
+        for pass_index in range(passes):
+            estimate = self._speed.estimate_seconds(
+                f"{profile}_pass{pass_index + 1}", total_frames, *frame_size
+            )
+            if estimate is None:
+                return None
+            total += estimate
+        return total
+
+    def _export_argb(self, output_path: str, mat: np.ndarray, is_logo: bool = False):
+        """导出ARGB格式文件（旋转180度后整块写出）"""
+        if self._is_cancelled():
+            raise InterruptedError("导出已取消")
+        write_argb(output_path, mat, rotate_180=True)
+
+    def _export_video(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext,
+        segments: Optional[List[EncodeSegment]] = None,
+        bitrate: str = VIDEO_BITRATE
+    ):
+        """
+        导出视频
+
+        Args:
+            segments: 非空时分段并行编码后拼接，否则整段编码
+            bitrate: 2pass 目标码率（图片模式不使用）
+        """
+        if not self._ffmpeg_path:
+            raise RuntimeError("未找到ffmpeg，无法导出视频")
+
+        if not HAS_CV2:
+            raise RuntimeError("未安装opencv-python，无法处理视频")
+
+        # 图片模式：从单张图片生成1秒循环视频
+        if params.is_image:
+            self._export_video_from_image(output_path, params, ctx)
+            return
+
+        if segments:
+            self._export_video_segmented(output_path, params, segments, ctx, bitrate)
+        else:
+            self._export_video_range(output_path, params, ctx, bitrate=bitrate)
+
+    def _export_video_range(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext,
+        extra_args: Optional[List[str]] = None,
+        bitrate: str = VIDEO_BITRATE
+    ):
+        """用当前引擎把 params 指定的帧范围编码为一个文件"""
+        if self._options.engine == VideoExportEngine.FILTER_GRAPH:
+            self._export_video_filter_graph(output_path, params, ctx, extra_args, bitrate)
+        else:
+            self._export_video_pipeline(output_path, params, ctx, extra_args, bitrate)
+
+    def _export_video_segmented(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        segments: List[EncodeSegment],
+        ctx: TaskContext,
+        bitrate: str = VIDEO_BITRATE
+    ):
+        """各分段由独立的FFmpeg进程并发编码（CPU 预算在段间均分），再流复制拼接"""
+        segment_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(output_path))
+        segment_files = [
+            os.path.join(segment_dir, f"segment_{segment.index:03d}.mp4") for segment in segments
+        ]
+        extra_args = segment_encode_args(params.fps)
+        parts = ctx.parallel_parts(len(segments))
+        logger.info(
+            f"分段编码 {ctx.task.name}: "
+            + ", ".join(f"[{s.start_frame}, {s.end_frame})" for s in segments)
+        )
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=len(segments), thread_name_prefix="export-segment"
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        self._export_video_range, segment_file,
+                        replace(params, start_frame=segment.start_frame, end_frame=segment.end_frame),
+                        part, extra_args, bitrate
+                    )
+                    for segment, segment_file, part in zip(segments, segment_files, parts)
+                ]
+                errors = [future.exception() for future in futures]
+
+            # 优先报告真正的错误，而不是被连带取消的分段
+            errors = [e for e in errors if e is not None]
+            if errors:
+                raise next((e for e in errors if not isinstance(e, InterruptedError)), errors[0])
+
+            if self._is_cancelled():
+                raise InterruptedError("导出已取消")
+            list_path = os.path.join(segment_dir, "concat.txt")
+            write_concat_list(list_path, segment_files)
+            self._run_ffmpeg(
+                concat_args(list_path, output_path.replace("\\", "/")), "ffmpeg 分段拼接"
+            )
+            logger.info(f"分段编码完成: {len(segments)} 段 -> {os.path.basename(output_path)}")
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    def _export_video_pipeline(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext,
+        extra_args: Optional[List[str]] = None,
+        bitrate: str = VIDEO_BITRATE
+    ):
+        """管道模式：解码后的帧经 stdin 管道直接送入FFmpeg，不落地临时文件"""
+        spec = get_resolution_spec(params.resolution)
+        frame_w, frame_h = self._get_output_frame_size(spec)
+        total_frames = params.end_frame - params.start_frame
+
+        plan = self._make_frame_transform(params, spec)
+
+        def frame_source(pass_index: int):
+            return self._iter_video_frames(params, plan, ctx, plan.release)
+
+        profile = f"x264_2pass_{VideoExportEngine.PIPELINE.value}"
+        self._update_encode_stats(
+            ctx.task.name, 0.0,
+            self._estimate_encode_seconds(profile, total_frames, (frame_w, frame_h))
+        )
+
+        # 使用2pass编码以获得更好的码率分配
+        # 参考: x264 ratecontrol.txt - "2pass: Given some data about each frame of a 1st pass,
+        # we try to choose QPs to maximize quality while matching a specified total size"
+        # 第二遍直接重新解码源视频，而不是在磁盘上保留中间帧
+        frames_written = self._run_ffmpeg_2pass(
+            input_args=rawvideo_input_args(
+                frame_w, frame_h, params.fps, self._options.pixel_format.value
+            ),
+            output_file=output_path.replace("\\", "/"),
+            bitrate=bitrate,
+            frame_source=frame_source,
+            filter_args=extra_args,
+            threads=lambda: ctx.threads,
+            total_frames=total_frames,
+            on_progress=self._make_encode_progress(ctx, profile, total_frames, (frame_w, frame_h))
+        )
+        logger.info(f"成功编码 {frames_written}/{total_frames} 帧")
+
+    def _export_video_filter_graph(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext,
+        extra_args: Optional[List[str]] = None,
+        bitrate: str = VIDEO_BITRATE
+    ):
+        """滤镜图模式：一次FFmpeg调用完成裁切、旋转、裁剪、缩放、补边和编码"""
+        spec = get_resolution_spec(params.resolution)
+        input_args, filter_args = self._filter_graph_args(params, spec)
+        total_frames = params.end_frame - params.start_frame
+        frame_size = self._get_output_frame_size(spec)
+
+        profile = f"x264_2pass_{VideoExportEngine.FILTER_GRAPH.value}"
+        self._update_encode_stats(
+            ctx.task.name, 0.0, self._estimate_encode_seconds(profile, total_frames, frame_size)
+        )
+        self._run_ffmpeg_2pass(
+            input_args=input_args,
+            output_file=output_path.replace("\\", "/"),
+            bitrate=bitrate,
+            filter_args=filter_args + (extra_args or []),
+            threads=lambda: ctx.threads,
+            total_frames=total_frames,
+            on_progress=self._make_encode_progress(ctx, profile, total_frames, frame_size)
+        )
+
+    def _filter_graph_args(
+        self,
+        params: VideoExportParams,
+        spec: Dict[str, Any]
+    ) -> Tuple[List[str], List[str]]:
+        """滤镜图模式的 (输入参数, 输出端滤镜/裁切参数)"""
+        video_filter = build_video_filter(
+            params.cropbox, params.rotation,
+            self._get_source_size(params.video_path), spec
+        )
+        seek_args, frame_args = build_trim_args(params.start_frame, params.end_frame, params.fps)
+        index = self._load_keyframe_index(params.video_path)
+        if index is not None:
+            # 按索引中入点帧的真实时间戳裁切，不依赖 fps 推算
+            seek_args = index.seek_input_args(params.start_frame)
+            video_filter = f"{index.trim_filter(params.start_frame)},{video_filter}"
+        return (
+            seek_args + ["-i", params.video_path],
+            ["-vf", video_filter, "-r", str(params.fps)] + frame_args
+        )
+
+    @staticmethod
+    def _get_output_frame_size(spec: Dict[str, Any]) -> Tuple[int, int]:
+        """获取补边后送入编码器的帧尺寸"""
+        return output_frame_size(spec)
+
+    @staticmethod
+    def _pad_frame(frame: np.ndarray, spec: Dict[str, Any]) -> np.ndarray:
+        """按分辨率规格补黑边"""
+        target_w = spec["width"]
+        target_h = spec["height"]
+        padding_side = spec["padding_side"]
+
+        if padding_side == "right":
+            pad_w = spec["padded_width"] - target_w
+            if pad_w > 0:
+                padding = np.zeros((target_h, pad_w, 3), dtype=np.uint8)
+                frame = np.hstack([frame, padding])
+        elif padding_side == "bottom":
+            pad_h = spec["padded_height"] - target_h
+            if pad_h > 0:
+                padding = np.zeros((pad_h, target_w, 3), dtype=np.uint8)
+                frame = np.vstack([frame, padding])
+        return frame
+
+    def _iter_video_frames(
+        self,
+        params: VideoExportParams,
+        transform: Callable[[np.ndarray], Any],
+        ctx: TaskContext,
+        release: Optional[Callable[[Any], None]] = None
+    ) -> Iterator[Any]:
+        """
+        按顺序输出变换后的帧
+
+        解码、变换分别在独立线程中执行，由 FramePipeline 保证帧序并限制在途帧数，
+        调用方（向FFmpeg写帧）即编码级；调用方请求下一帧时以上一帧调用 release。
+        """
+        pipeline = FramePipeline(
+            decode=lambda: self._iter_source_frames(params),
+            transform=transform,
+            workers=min(default_transform_workers(), ctx.threads),
+            cancel_check=self._is_cancelled,
+            release=release
+        )
+        self._last_pipeline_stats = pipeline.stats
+        yield from pipeline.run()
+
+    def _load_keyframe_index(self, video_path: str) -> Optional[KeyframeIndex]:
+        """读取源视频的关键帧索引，无法建立时返回 None（退回逐帧定位）"""
+        if not self._ffmpeg_path:
+            return None
+        try:
+            return load_keyframe_index(video_path, self._ffmpeg_path)
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"无法建立关键帧索引，使用逐帧定位: {e}")
+            return None
+
+    def _iter_source_frames(self, params: VideoExportParams) -> Iterator[np.ndarray]:
+        """
+        解码级：从入点开始读取源视频帧
+
+        有关键帧索引时由 FFmpeg 从入点前最近的关键帧开始解码并精确丢弃入点之前的帧；
+        否则用 OpenCV 定位（部分容器下 CAP_PROP_POS_FRAMES 需从头逐帧解码）。
+        """
+        total_frames = params.end_frame - params.start_frame
+        index = self._load_keyframe_index(params.video_path)
+        if index is not None and params.start_frame < index.frame_count:
+            yield from iter_indexed_frames(
+                self._ffmpeg_path, params.video_path, index,
+                params.start_frame, total_frames,
+                self._get_source_size(params.video_path),
+                cancel_check=self._is_cancelled,
+                on_start=self._track_process,
+                on_exit=self._untrack_process
+            )
+            return
+
+        cap = cv2.VideoCapture(params.video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"无法打开视频: {params.video_path}")
+
+        try:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, params.start_frame)
+            for _ in range(total_frames):
+                if self._is_cancelled():
+                    raise InterruptedError("导出已取消")
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+
+    @staticmethod
+    def _get_source_size(video_path: str) -> Tuple[int, int]:
+        """获取源视频尺寸 (宽, 高)"""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"无法打开视频: {video_path}")
+        try:
+            return (
+                int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            )
+        finally:
+            cap.release()
+
+    def _make_frame_transform(
+        self,
+        params: VideoExportParams,
+        spec: Dict[str, Any]
+    ) -> FrameTransformPlan:
+        """变换级：构建单帧变换计划（可在多线程中并发调用，输出缓冲区复用）"""
+        return FrameTransformPlan(
+            self._get_source_size(params.video_path), params.rotation, params.cropbox, spec,
+            pix_fmt=self._options.pixel_format.value
+        )
+
+    def _pipe_frames_to_ffmpeg(
+        self,
+        args: List[str],
+        frames: Iterable[np.ndarray],
+        description: str,
+        total_frames: int = 0,
+        on_progress: Optional[Callable[[FFmpegProgress], None]] = None
+    ) -> int:
+        """
+        启动FFmpeg并将帧写入其stdin
+
+        Returns:
+            写入的帧数
+        """
+        return self._pipe_frame_sets_to_ffmpeg(
+            [args], ((frame,) for frame in frames), description, total_frames, [on_progress]
+        )
+
+    def _pipe_frame_sets_to_ffmpeg(
+        self,
+        args_list: List[List[str]],
+        frame_sets: Iterable[Sequence[np.ndarray]],
+        description: str,
+        total_frames: int = 0,
+        progress_list: Optional[List[Optional[Callable[[FFmpegProgress], None]]]] = None
+    ) -> int:
+        """
+        同时启动多个FFmpeg，每组帧中的第 i 帧写入第 i 个进程
+
+        Args:
+            args_list: 各进程的参数
+            frame_sets: 帧组迭代器，每组帧数与进程数相同
+            description: 错误信息中的描述
+            total_frames: 预计帧数，用于计算进度
+            progress_list: 各进程的进度回调
+
+        Returns:
+            写入的帧组数
+        """
+        progress_list = progress_list or [None] * len(args_list)
+        runners: List[FFmpegRunner] = []
+        frames_written = 0
+        try:
+            for args, on_progress in zip(args_list, progress_list):
+                runner = FFmpegRunner(self._ffmpeg_path, cancel_check=self._is_cancelled)
+                runner.start(args, stdin=True, on_progress=on_progress, total_frames=total_frames)
+                runners.append(runner)
+                self._track_process(runner.process)
+
+            for frame_set in frame_sets:
+                for runner, frame in zip(runners, frame_set):
+                    runner.write_frame(frame)
+                frames_written += 1
+
+            if frames_written == 0:
+                raise RuntimeError("没有成功写入任何视频帧")
+
+            for runner in runners:
+                runner.finish(description)
+        except BaseException:
+            for runner in runners:
+                runner.kill()
+            raise
+        finally:
+            for runner in runners:
+                self._untrack_process(runner.process)
+        return frames_written
+
+    @staticmethod
+    def _x264_pass_args(
+        input_args: List[str],
+        encode_args: List[str],
+        pass_index: int,
+        passlog_prefix: str,
+        output_file: str,
+        threads: Optional[int] = None
+    ) -> List[str]:
+        """构建2pass编码中某一遍的FFmpeg参数（第一遍只做分析，输出丢弃）"""
+        args = input_args + encode_args + [
+            "-pass", str(pass_index + 1),
+            "-passlogfile", passlog_prefix,
+            "-an",
+        ]
+        if threads is not None:
+            args += ["-threads", str(threads)]
+        if pass_index == 0:
+            return args + ["-f", "null", "-y", os.devnull]
+        return args + ["-y", output_file]
+
+    @staticmethod
+    def _remove_passlogs(passlog_prefix: str):
+        """清理passlogfile生成的临时文件"""
+        # FFmpeg 创建 PREFIX-N.log 和 PREFIX-N.log.mbtree，*.log* 可匹配两者
+        for f in glob.glob(f"{passlog_prefix}*.log*"):
+            try:
+                os.remove(f)
+                logger.debug(f"已清理临时文件: {f}")
+            except OSError:
+                pass
+
+    def _run_ffmpeg_2pass(
+        self,
+        input_args: List[str],
+        output_file: str,
+        bitrate: str = VIDEO_BITRATE,
+        frame_source: Optional[Callable[[int], Iterable[np.ndarray]]] = None,
+        filter_args: Optional[List[str]] = None,
+        threads: Optional[Callable[[], int]] = None,
+        total_frames: int = 0,
+        on_progress: Optional[Callable[[int, FFmpegProgress], None]] = None
+    ) -> int:
+        """
+        使用FFmpeg进行2pass编码
+
+        Args:
+            input_args: 输入参数（rawvideo 管道或 -i 文件）
+            output_file: 输出文件路径
+            bitrate: 目标码率
+            frame_source: 管道模式下以 pass 序号(0/1)调用，返回该遍的帧迭代器；
+                          为 None 时 FFmpeg 直接读取 input_args 中的文件
+            filter_args: 输出端的滤镜/裁切参数
+            threads: 每遍开始时调用，返回该遍可用的编码线程数；为 None 时由FFmpeg自行决定
+            total_frames: 每遍的输出帧数，用于计算进度
+            on_progress: 进度回调 (pass 序号, 进度快照)
+
+        Returns:
+            管道模式下写入的帧数，文件输入模式下为 0
+        """
+        # 生成临时passlogfile前缀
+        passlog_prefix = tempfile.mktemp(prefix="ffmpeg2pass_", dir=os.path.dirname(output_file))
+        encode_args = (filter_args or []) + X264_ENCODE_ARGS + ["-b:v", bitrate]
+        frames_written = 0
+
+        try:
+            for pass_index, description in enumerate(PASS_DESCRIPTIONS):
+                # 两个pass之间检查取消
+                if self._is_cancelled():
+                    raise InterruptedError("导出已取消")
+
+                args = self._x264_pass_args(
+                    input_args, encode_args, pass_index, passlog_prefix, output_file,
+                    threads() if threads is not None else None
+                )
+                pass_progress = partial(on_progress, pass_index) if on_progress is not None else None
+                if frame_source is not None:
+                    frames_written = self._pipe_frames_to_ffmpeg(
+                        args, frame_source(pass_index), description, total_frames, pass_progress
+                    )
+                else:
+                    self._run_ffmpeg(args, description, total_frames, pass_progress)
+
+            logger.info("2pass编码完成")
+            return frames_written
+
+        finally:
+            self._remove_passlogs(passlog_prefix)
+
+    def _run_ffmpeg_2pass_fanout(
+        self,
+        branches: List[Tuple[List[str], str, str]],
+        frame_source: Callable[[int], Iterable[Sequence[np.ndarray]]],
+        threads: Optional[Callable[[], int]] = None,
+        total_frames: int = 0,
+        on_progress: Optional[Callable[[int, int, FFmpegProgress], None]] = None
+    ) -> int:
+        """
+        一路帧源同时送入多个2pass编码（每个分支一个FFmpeg进程）
+
+        Args:
+            branches: 各分支的 (输入参数, 输出文件, 目标码率)
+            frame_source: 以 pass 序号调用，返回帧组迭代器（每组按分支顺序各一帧）
+            threads: 返回所有分支合计可用的编码线程数
+            total_frames: 每遍的帧数
+            on_progress: 进度回调 (pass 序号, 分支序号, 进度快照)
+
+        Returns:
+            写入的帧组数
+        """
+        passlog_prefixes = [
+            tempfile.mktemp(prefix="ffmpeg2pass_", dir=os.path.dirname(output_file))
+            for _, output_file, _ in branches
+        ]
+        frames_written = 0
+
+        try:
+            for pass_index, description in enumerate(PASS_DESCRIPTIONS):
+                if self._is_cancelled():
+                    raise InterruptedError("导出已取消")
+
+                branch_threads = None
+                if threads is not None:
+                    branch_threads = max(1, threads() // len(branches))
+                args_list = [
+                    self._x264_pass_args(
+                        input_args, X264_ENCODE_ARGS + ["-b:v", bitrate], pass_index, prefix,
+                        output_file, branch_threads
+                    )
+                    for (input_args, output_file, bitrate), prefix in zip(branches, passlog_prefixes)
+                ]
+                progress_list = None
+                if on_progress is not None:
+                    progress_list = [
+                        partial(on_progress, pass_index, branch_index)
+                        for branch_index in range(len(branches))
+                    ]
+                frames_written = self._pipe_frame_sets_to_ffmpeg(
+                    args_list, frame_source(pass_index), description, total_frames, progress_list
+                )
+
+            logger.info(f"2pass编码完成（{len(branches)} 路输出）")
+            return frames_written
+
+        finally:
+            for prefix in passlog_prefixes:
+                self._remove_passlogs(prefix)
+
+    def _run_ffmpeg(
+        self,
+        args: List[str],
+        description: str,
+        total_frames: int = 0,
+        on_progress: Optional[Callable[[FFmpegProgress], None]] = None
+    ):
+        """运行一个不需要stdin输入的FFmpeg进程，期间响应取消"""
+        runner = FFmpegRunner(self._ffmpeg_path, cancel_check=self._is_cancelled)
+        runner.start(args, stdin=False, on_progress=on_progress, total_frames=total_frames)
+        self._track_process(runner.process)
+        try:
+            runner.finish(description)
+        except BaseException:
+            runner.kill()
+            raise
+        finally:
+            self._untrack_process(runner.process)
+
+    def _export_video_from_image(
+        self,
+        output_path: str,
+        params: VideoExportParams,
+        ctx: TaskContext
+    ):
+        """从单张图片生成1秒循环视频（30fps，共30帧）"""
+        spec = get_resolution_spec(params.resolution)
+        target_w = spec["width"]
+        target_h = spec["height"]
+        rotate_180 = spec["rotate_180"]
+
+        # 读取图片
+        image_path = params.video_path
+        img_array = np.fromfile(image_path, dtype=np.uint8)
+        frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise RuntimeError(f"无法打开图片: {image_path}")
+
+        # 缩放到目标分辨率
+        frame = cv2.resize(frame, (target_w, target_h))
+
+        # 旋转180度
+        if rotate_180:
+            frame = cv2.rotate(frame, cv2.ROTATE_180)
+
+        # 添加黑边
+        frame = self._pad_frame(frame, spec)
+        frame_h, frame_w = frame.shape[:2]
+
+        # 只送入一帧，由 loop 滤镜在编码器内重复出30帧（1秒@30fps）；
+        # 静止画面2pass没有码率分配上的收益，单遍编码即可
+        args = rawvideo_input_args(frame_w, frame_h, STILL_IMAGE_FPS) + [
+            "-vf", f"loop=loop={STILL_IMAGE_FRAMES - 1}:size=1:start=0",
+            "-frames:v", str(STILL_IMAGE_FRAMES),
+            "-r", str(STILL_IMAGE_FPS),
+        ] + X264_ENCODE_ARGS + [
+            "-tune", "stillimage",
+            "-b:v", VIDEO_BITRATE,
+            "-threads", str(ctx.threads),
+            "-an",
+            "-y",
+            output_path.replace("\\", "/")
+        ]
+        self._pipe_frames_to_ffmpeg(
+            args, [frame], "ffmpeg 静态图片编码", STILL_IMAGE_FRAMES,
+            partial(self._make_encode_progress(
+                ctx, "x264_still", STILL_IMAGE_FRAMES, (frame_w, frame_h), passes=1
+            ), 0)
+        )
+        total_frames = STILL_IMAGE_FRAMES
+        logger.info(f"成功生成 {total_frames} 帧")
+
+    def _generate_epconfig(self, epconfig: EPConfig, config_path: str):
+        """生成epconfig.json"""
+        try:
+            os.makedirs(os.path.dirname(config_path), exist_ok=True)
+            config_dict = epconfig.to_dict(normalize_paths=True)
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump(config_dict, f, ensure_ascii=False, indent=4)
+            logger.info(f"已生成配置: {config_path}")
+        except Exception as e:
+            logger.error(f"生成epconfig.json失败: {e}")
+            raise
+
+
+def fit_overlay(overlay_mat: np.ndarray, resolution: str) -> np.ndarray:
+    """将叠加层图片缩放到目标分辨率"""
+    spec = get_resolution_spec(resolution)
+    target_size = (spec["width"], spec["height"])
+    if not HAS_CV2 or (overlay_mat.shape[1], overlay_mat.shape[0]) == target_size:
+        return overlay_mat
+    return cv2.resize(overlay_mat, target_size)
+
+
+def build_export_tasks(
+    epconfig: EPConfig,
+    logo_mat: Optional[np.ndarray] = None,
+    overlay_mat: Optional[np.ndarray] = None,
+    loop_video_params: Optional[VideoExportParams] = None,
+    intro_video_params: Optional[VideoExportParams] = None,
+    loop_image_path: Optional[str] = None,
+    options: Optional[ExportOptions] = None
+) -> List[ExportTask]:
+    """
+    构建导出任务列表
+
+    options.screens 非空时为每个分辨率生成一套任务（输出到 <分辨率>/ 子目录），
+    否则按 epconfig.screen 生成。
+    """
+    options = options or ExportOptions()
+    resolution = epconfig.screen.value
+    if options.screens:
+        resolutions = [screen.value for screen in options.screens]
+        prefixes = {res: f"{res}/" for res in resolutions}
+    else:
+        resolutions = [resolution]
+        prefixes = {resolution: ""}
+
+    tasks = []
+
+    # Logo/Icon
+    if logo_mat is not None:
+        for res in resolutions:
+            tasks.append(ExportTask(
+                export_type=ExportType.ICON,
+                output_path=f"{prefixes[res]}icon.png",
+                data=logo_mat
+            ))
+
+    # Overlay（按各分辨率缩放）
+    if overlay_mat is not None:
+        for res in resolutions:
+            tasks.append(ExportTask(
+                export_type=ExportType.OVERLAY,
+                output_path=f"{prefixes[res]}overlay.argb",
+                data=fit_overlay(overlay_mat, res)
+            ))
+
+    # Loop视频（图片模式优先）
+    loop_params = None
+    if loop_image_path is not None:
+        # 从图片生成循环视频
+        loop_params = VideoExportParams(
+            video_path=loop_image_path,
+            cropbox=(0, 0, 0, 0),  # 图片模式不需要裁剪
+            start_frame=0,
+            end_frame=30,
+            fps=30.0,
+            resolution=resolution,
+            is_image=True
+        )
+    elif loop_video_params is not None:
+        loop_video_params.resolution = resolution
+        loop_params = loop_video_params
+
+    video_tasks = [
+        (ExportType.LOOP_VIDEO, "loop.mp4", loop_params),
+        (ExportType.INTRO_VIDEO, "intro.mp4", intro_video_params),  # Intro视频
+    ]
+    for export_type, file_name, params in video_tasks:
+        if params is None:
+            continue
+        if options.screens:
+            data = MultiResolutionVideoParams(
+                source=params,
+                outputs={res: f"{prefixes[res]}{file_name}" for res in resolutions}
+            )
+        else:
+            params.resolution = resolution
+            data = params
+        tasks.append(ExportTask(export_type=export_type, output_path=file_name, data=data))
+
+    return tasks
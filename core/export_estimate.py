@@ -0,0 +1,200 @@
+"""
+导出开销估算 - 试运行（dry-run）的测量结果与预测模型
+
+ExportEngine.estimate() 不写出任何导出文件：在入点到出点之间均匀取几处各解码一小段，
+测出本机的单帧解码、变换耗时，再从中间取几秒实际跑一遍两遍编码，
+测出单帧编码耗时、输出大小和 2pass 日志大小，据此按总帧数外推每个产物的
+耗时、输出大小和临时磁盘占用。本模块包含数据结构和外推模型（不依赖 Qt）。
+
+试编码只有几秒，开头的关键帧在其中占比远高于完整导出，输出大小按关键帧和
+其他帧分别统计，再按完整导出的关键帧间隔外推。
+"""
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.ffmpeg_runner import get_popen_kwargs
+
+# 在入点到出点之间取样的位置数
+DEFAULT_SAMPLE_POINTS = 5
+# 每个取样位置连续解码的帧数（第一帧含定位开销，其余帧计算单帧解码耗时）
+SAMPLE_BURST = 4
+# 编码试运行的时长（秒）
+DEFAULT_PROBE_SECONDS = 2.0
+
+# 管道模式下同时运行的流水线级数（解码、变换、编码）
+PIPELINE_STAGES = 3
+
+# libx264 默认的最大关键帧间隔（整段编码未指定 -g）
+X264_DEFAULT_GOP = 250
+
+
+@dataclass
+class VideoProbe:
+    """试运行测得的单帧开销（耗时单位为秒）"""
+    seek: float = 0.0  # 每遍从入点开始解码的启动开销
+    decode: float = 0.0  # 单帧解码
+    transform: float = 0.0  # 单帧变换（单线程）
+    encode: List[float] = field(default_factory=lambda: [0.0, 0.0])  # 各遍单帧编码
+    encoder_startup: float = 0.0  # 每启动一次编码进程的固定开销
+    keyframe_bytes: float = 0.0  # 关键帧的平均大小
+    output_bytes: float = 0.0  # 其他帧的平均大小（含分摊的容器开销）
+    passlog_bytes: float = 0.0  # 单帧 2pass 日志（含 mbtree）大小
+
+    def pass_seconds(self, frames: int, pass_index: int, transform_workers: int, cpus: int) -> float:
+        """
+        预测一遍编码的耗时
+
+        管道模式下解码、变换、编码三级并行，单帧耗时取最慢一级；
+        CPU 核心数少于级数时各级争抢 CPU，单帧耗时不低于各级总和 / 可用核心数。
+        """
+        stages = [self.decode, self.transform / max(1, transform_workers), self.encode[pass_index]]
+        per_frame = max(max(stages), sum(stages) / max(1, min(cpus, PIPELINE_STAGES)))
+        return self.encoder_startup + self.seek + frames * per_frame
+
+    def output_size(self, frames: int, gop: int = X264_DEFAULT_GOP) -> int:
+        """按关键帧间隔外推 frames 帧的输出大小"""
+        keyframes = min(frames, -(-frames // max(1, gop)))
+        return int(keyframes * self.keyframe_bytes + (frames - keyframes) * self.output_bytes)
+
+
+@dataclass
+class ArtifactEstimate:
+    """单个产物的估算结果"""
+    name: str  # 相对导出目录的路径
+    frames: int = 0  # 编码帧数，非视频为 0
+    seconds: float = 0.0  # 预计耗时
+    output_bytes: int = 0  # 预计输出大小
+    scratch_bytes: int = 0  # 导出过程中额外占用的临时磁盘空间
+    cached: bool = False  # 命中导出缓存，无需重新编码
+    probe: Optional[VideoProbe] = None  # 视频的实测单帧开销
+
+
+@dataclass
+class ExportEstimate:
+    """一次导出的估算结果"""
+    artifacts: List[ArtifactEstimate] = field(default_factory=list)
+    free_bytes: Optional[int] = None  # 导出目录所在磁盘的剩余空间，未知时为 None
+    elapsed: float = 0.0  # 试运行本身的耗时
+
+    @property
+    def total_seconds(self) -> float:
+        """预计总耗时（各产物耗时之和；各产物的测量都已按全部 CPU 预算进行）"""
+        return sum(a.seconds for a in self.artifacts)
+
+    @property
+    def output_bytes(self) -> int:
+        return sum(a.output_bytes for a in self.artifacts)
+
+    @property
+    def scratch_bytes(self) -> int:
+        """临时磁盘占用峰值（按所有产物同时导出的最坏情况累加）"""
+        return sum(a.scratch_bytes for a in self.artifacts)
+
+    @property
+    def required_bytes(self) -> int:
+        return self.output_bytes + self.scratch_bytes
+
+    @property
+    def disk_sufficient(self) -> bool:
+        return self.free_bytes is None or self.free_bytes >= self.required_bytes
+
+    def summary_lines(self) -> List[str]:
+        """逐产物的估算说明，以及合计一行"""
+        lines = []
+        for artifact in self.artifacts:
+            if artifact.cached:
+                lines.append(f"{artifact.name}: 使用缓存，{format_bytes(artifact.output_bytes)}")
+                continue
+            line = f"{artifact.name}: 约 {format_duration(artifact.seconds)}，{format_bytes(artifact.output_bytes)}"
+            if artifact.frames:
+                line += f"（{artifact.frames} 帧）"
+            lines.append(line)
+        lines.append(
+            f"合计: 约 {format_duration(self.total_seconds)}，输出 {format_bytes(self.output_bytes)}，"
+            f"临时空间 {format_bytes(self.scratch_bytes)}"
+        )
+        if not self.disk_sufficient:
+            lines.append(
+                f"磁盘空间不足: 需要 {format_bytes(self.required_bytes)}，"
+                f"剩余 {format_bytes(self.free_bytes)}"
+            )
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(self.total_seconds, 3),
+            "output_bytes": self.output_bytes,
+            "scratch_bytes": self.scratch_bytes,
+            "free_bytes": self.free_bytes,
+            "elapsed": round(self.elapsed, 3),
+            "artifacts": [asdict(a) for a in self.artifacts],
+        }
+
+
+def scan_packet_sizes(ffmpeg_path: str, video_path: str) -> Tuple[List[int], List[int]]:
+    """
+    用 framecrc 读取视频流各数据包的大小（流复制，不解码）
+
+    Returns:
+        (关键帧大小列表, 其他帧大小列表)
+    """
+    result = subprocess.run([
+        ffmpeg_path, "-hide_banner", "-nostdin", "-loglevel", "error",
+        "-i", video_path, "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"
+    ], capture_output=True, text=True, check=True, **get_popen_kwargs())
+    keyframes, others = [], []
+    for line in result.stdout.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        # "流, dts, pts, 时长, 大小, 校验[, F=标志]"，关键帧的标志省略不写
+        parts = [part.strip() for part in line.split(",")]
+        flags = next((part for part in parts[6:] if part.startswith("F=")), None)
+        is_key = flags is None or bool(int(flags[2:], 16) & 1)
+        (keyframes if is_key else others).append(int(parts[4]))
+    return keyframes, others
+
+
+def free_disk_bytes(path: str) -> Optional[int]:
+    """path 所在磁盘的剩余空间（path 尚不存在时取最近的已存在上级目录）"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+
+def sample_starts(start_frame: int, end_frame: int, count: int, burst: int = SAMPLE_BURST) -> List[int]:
+    """在 [start_frame, end_frame) 中均匀分布的取样起点，每处可连续读 burst 帧"""
+    last = max(start_frame, end_frame - burst)
+    if count <= 1 or last == start_frame:
+        return [start_frame]
+    return sorted({start_frame + (last - start_frame) * i // (count - 1) for i in range(count)})
+
+
+def format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "未知"
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = max(0, int(round(seconds)))
+    if seconds < 60:
+        return f"{seconds} 秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} 分 {seconds} 秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} 小时 {minutes} 分"
@@ -0,0 +1,208 @@
+"""
+导出流水线 - 解码 → 变换 → 编码 三级并行
+
+解码线程读取源帧并提交到变换线程池（OpenCV 运算期间释放GIL），
+编码端按提交顺序取回结果，天然保证帧序。各级之间通过有界队列连接，
+在途帧数不超过 queue_size，内存占用有上限。
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 解码结束标记
+_END = object()
+
+
+def default_transform_workers() -> int:
+    """默认变换线程数：保留一个核心给解码/编码"""
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+@dataclass
+class StageStats:
+    """单级流水线统计"""
+    name: str
+    workers: int = 1
+    frames: int = 0
+    busy_seconds: float = 0.0  # 所有线程累计的工作时间
+
+    @property
+    def throughput(self) -> float:
+        """该级单独运行时的理论吞吐量（帧/秒）"""
+        if self.busy_seconds <= 0:
+            return float("inf")
+        return self.frames * self.workers / self.busy_seconds
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.frames}帧, {self.throughput:.1f} fps (x{self.workers})"
+
+
+@dataclass
+class PipelineStats:
+    """流水线整体统计"""
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    @property
+    def bottleneck(self) -> Optional[StageStats]:
+        """吞吐量最低的一级"""
+        if not self.stages:
+            return None
+        return min(self.stages.values(), key=lambda s: s.throughput)
+
+    def summary(self) -> str:
+        parts = [str(s) for s in self.stages.values()]
+        bottleneck = self.bottleneck
+        if bottleneck is not None:
+            parts.append(f"瓶颈: {bottleneck.name}")
+        return " | ".join(parts)
+
+
+class FramePipeline:
+    """
+    有序帧流水线
+
+    用法:
+        pipeline = FramePipeline(decode, transform, cancel_check=...)
+        for frame in pipeline.run():
+            encoder.write_frame(frame)   # 编码级由调用方完成
+    """
+
+    def __init__(
+        self,
+        decode: Callable[[], Iterator[np.ndarray]],
+        transform: Callable[[np.ndarray], np.ndarray],
+        workers: int = 0,
+        queue_size: int = 16,
+        cancel_check: Optional[Callable[[], bool]] = None,
+        release: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Args:
+            decode: 返回源帧迭代器的函数（在解码线程中调用）
+            transform: 单帧变换函数（在线程池中调用，需线程安全）
+            workers: 变换线程数，0 表示自动
+            queue_size: 最大在途帧数
+            cancel_check: 返回 True 表示已请求取消
+            release: 调用方处理完一帧（请求下一帧）后以该帧调用，用于归还缓冲区
+        """
+        self._decode = decode
+        self._transform = transform
+        self._release = release
+        self._workers = workers or default_transform_workers()
+        self._queue_size = max(2, queue_size)
+        self._cancel_check = cancel_check or (lambda: False)
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = PipelineStats(stages={
+            "decode": StageStats("decode"),
+            "transform": StageStats("transform", workers=self._workers),
+            "encode": StageStats("encode"),
+        })
+
+    def _cancelled(self) -> bool:
+        return self._stop.is_set() or self._cancel_check()
+
+    def _put(self, pending: "queue.Queue", item) -> bool:
+        """带取消检查的阻塞入队"""
+        while not self._cancelled():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _timed_transform(self, frame: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        result = self._transform(frame)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stage = self.stats.stages["transform"]
+            stage.frames += 1
+            stage.busy_seconds += elapsed
+        return result
+
+    def _decode_loop(self, executor: ThreadPoolExecutor, pending: "queue.Queue"):
+        """解码线程：读帧并按顺序提交变换任务"""
+        stage = self.stats.stages["decode"]
+        frames = None
+        try:
+            frames = iter(self._decode())
+            while not self._cancelled():
+                start = time.perf_counter()
+                frame = next(frames, None)
+                stage.busy_seconds += time.perf_counter() - start
+                if frame is None:
+                    break
+                stage.frames += 1
+                if not self._put(pending, executor.submit(self._timed_transform, frame)):
+                    break
+        except BaseException as e:
+            self._put(pending, e)
+            return
+        finally:
+            # 及时关闭解码生成器，释放 VideoCapture
+            close = getattr(frames, "close", None)
+            if close is not None:
+                close()
+        self._put(pending, _END)
+
+    def run(self) -> Iterator[np.ndarray]:
+        """按源顺序输出变换后的帧"""
+        pending: "queue.Queue" = queue.Queue(maxsize=self._queue_size)
+        executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="export-transform"
+        )
+        decoder = threading.Thread(
+            target=self._decode_loop, args=(executor, pending),
+            name="export-decode", daemon=True
+        )
+        encode_stage = self.stats.stages["encode"]
+        wall_start = time.perf_counter()
+        decoder.start()
+
+        try:
+            while True:
+                if self._cancel_check():
+                    raise InterruptedError("导出已取消")
+                try:
+                    item = pending.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                frame = item.result()
+                start = time.perf_counter()
+                yield frame
+                encode_stage.busy_seconds += time.perf_counter() - start
+                encode_stage.frames += 1
+                if self._release is not None:
+                    self._release(frame)
+        finally:
+            self._stop.set()
+            # 丢弃尚未处理的任务，解除解码线程的阻塞
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, Future):
+                    item.cancel()
+            decoder.join(timeout=5)
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.stats.wall_seconds = time.perf_counter() - wall_start
+            logger.info(f"导出流水线统计 ({self.stats.wall_seconds:.2f}s): {self.stats.summary()}")
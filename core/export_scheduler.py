@@ -0,0 +1,254 @@
+"""
+导出任务调度器 - 按依赖关系并发执行导出任务
+
+互不依赖的任务（图标、叠加层、循环视频、入场视频）并发执行，
+依赖其他任务的任务（如 epconfig.json）在前置任务全部成功后才开始。
+编码任务之间按当前并发数平分 CPU 预算，通过 FFmpeg 的 -threads 限制线程数。
+总进度按各任务的预估开销加权汇总。
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def default_cpu_budget() -> int:
+    """默认 CPU 预算：全部逻辑核心"""
+    return max(1, os.cpu_count() or 1)
+
+
+@dataclass
+class ScheduledTask:
+    """调度单元"""
+    name: str
+    run: Callable[["TaskContext"], None]
+    weight: float = 1.0  # 预估开销，用于加权进度
+    depends_on: List[str] = field(default_factory=list)
+    encodes: bool = False  # 是否为占用 CPU 预算的编码任务
+
+
+class TaskContext:
+    """任务执行上下文：上报进度、查询可用编码线程数"""
+
+    def __init__(
+        self,
+        scheduler: "TaskScheduler",
+        task: ScheduledTask,
+        offset: float = 0.0,
+        span: float = 1.0
+    ):
+        self._scheduler = scheduler
+        self.task = task
+        self._offset = offset
+        self._span = span
+
+    @property
+    def threads(self) -> int:
+        """当前可用的编码线程数（CPU 预算 / 正在运行的编码任务数）"""
+        return self._scheduler.threads_per_encode()
+
+    def report(self, fraction: float, message: str = ""):
+        """上报本任务完成比例 (0~1)"""
+        self._scheduler.report(self.task.name, self._offset + self._span * fraction, message)
+
+    def subcontext(self, index: int, count: int) -> "TaskContext":
+        """把任务均分为 count 段，返回第 index 段的上下文（进度映射到该段）"""
+        span = self._span / max(1, count)
+        return TaskContext(self._scheduler, self.task, self._offset + span * index, span)
+
+    def parallel_parts(self, count: int) -> List["TaskContext"]:
+        """
+        把任务拆成 count 个并发执行的部分
+
+        各部分的进度取平均后上报，编码线程数在各部分之间均分；
+        部分的任务名带 [i/n] 后缀，用于区分各自的进度消息和编码统计。
+        """
+        group = _PartGroup(self, count)
+        return [_PartContext(group, index) for index in range(count)]
+
+    def check_cancelled(self):
+        """已取消时抛出 InterruptedError"""
+        if self._scheduler.cancelled:
+            raise InterruptedError("导出已取消")
+
+
+class _PartGroup:
+    """parallel_parts 的共享状态"""
+
+    def __init__(self, parent: TaskContext, count: int):
+        self.parent = parent
+        self.count = count
+        self.fractions = [0.0] * count
+        self.lock = threading.Lock()
+
+    def report(self, index: int, fraction: float, message: str):
+        with self.lock:
+            self.fractions[index] = min(1.0, max(self.fractions[index], fraction))
+            total = sum(self.fractions) / self.count
+        self.parent.report(total, message)
+
+
+class _PartContext(TaskContext):
+    """并发部分的上下文"""
+
+    def __init__(self, group: _PartGroup, index: int, offset: float = 0.0, span: float = 1.0):
+        parent = group.parent
+        super().__init__(
+            parent._scheduler,
+            replace(parent.task, name=f"{parent.task.name}[{index + 1}/{group.count}]"),
+            offset, span
+        )
+        self._group = group
+        self._index = index
+
+    @property
+    def threads(self) -> int:
+        return max(1, self._group.parent.threads // self._group.count)
+
+    def report(self, fraction: float, message: str = ""):
+        self._group.report(self._index, self._offset + self._span * fraction, message)
+
+    def subcontext(self, index: int, count: int) -> "TaskContext":
+        span = self._span / max(1, count)
+        return _PartContext(self._group, self._index, self._offset + span * index, span)
+
+
+class TaskScheduler:
+    """
+    依赖感知的并发任务调度器（不依赖 Qt，可在任意线程中调用 run）
+
+    任一任务失败后不再启动新任务，并通过 cancelled 通知正在运行的任务尽快退出；
+    run() 等待所有已启动任务结束后抛出第一个错误。
+    """
+
+    def __init__(
+        self,
+        tasks: List[ScheduledTask],
+        max_concurrent: int = 0,
+        cpu_budget: int = 0,
+        cancel_check: Optional[Callable[[], bool]] = None,
+        on_progress: Optional[Callable[[int, str], None]] = None
+    ):
+        """
+        Args:
+            tasks: 待执行任务
+            max_concurrent: 最大并发任务数，0 表示不限制
+            cpu_budget: 编码可用的总线程数，0 表示全部核心
+            cancel_check: 返回 True 表示外部请求取消
+            on_progress: 进度回调 (百分比, 消息)，可能在任意工作线程中调用
+        """
+        self._tasks: Dict[str, ScheduledTask] = {}
+        for task in tasks:
+            if task.name in self._tasks:
+                raise ValueError(f"任务名重复: {task.name}")
+            self._tasks[task.name] = task
+        for task in tasks:
+            for dep in task.depends_on:
+                if dep not in self._tasks:
+                    raise ValueError(f"任务 {task.name} 依赖的 {dep} 不存在")
+
+        self._max_concurrent = max_concurrent or max(1, len(tasks))
+        self._cpu_budget = cpu_budget or default_cpu_budget()
+        self._cancel_check = cancel_check or (lambda: False)
+        self._on_progress = on_progress
+
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self._running_encodes = 0
+        self._fractions: Dict[str, float] = {name: 0.0 for name in self._tasks}
+        self._total_weight = sum(max(0.0, t.weight) for t in tasks) or 1.0
+        self._last_percent = -1
+
+    @property
+    def cancelled(self) -> bool:
+        return self._failed.is_set() or self._cancel_check()
+
+    def threads_per_encode(self) -> int:
+        with self._lock:
+            return max(1, self._cpu_budget // max(1, self._running_encodes))
+
+    def report(self, name: str, fraction: float, message: str = ""):
+        """更新单个任务进度并回调加权总进度"""
+        with self._lock:
+            self._fractions[name] = min(1.0, max(self._fractions[name], fraction))
+            done = sum(
+                max(0.0, self._tasks[n].weight) * f for n, f in self._fractions.items()
+            )
+            percent = int(done / self._total_weight * 100)
+            # 进度只增不减；同一百分比只在有消息时重复回调
+            if percent < self._last_percent or (percent == self._last_percent and not message):
+                return
+            self._last_percent = percent
+        if self._on_progress is not None:
+            self._on_progress(percent, message)
+
+    def _ready(self, name: str, finished: set) -> bool:
+        return all(dep in finished for dep in self._tasks[name].depends_on)
+
+    def _execute(self, task: ScheduledTask):
+        if task.encodes:
+            with self._lock:
+                self._running_encodes += 1
+        try:
+            if self.cancelled:
+                raise InterruptedError("导出已取消")
+            task.run(TaskContext(self, task))
+            self.report(task.name, 1.0, f"{task.name} 已完成")
+        finally:
+            if task.encodes:
+                with self._lock:
+                    self._running_encodes -= 1
+
+    def run(self):
+        """
+        执行全部任务，阻塞直到结束
+
+        Raises:
+            InterruptedError: 已取消
+            Exception: 第一个失败任务抛出的异常
+        """
+        pending = list(self._tasks)
+        finished: set = set()
+        running: Dict[Future, str] = {}
+        first_error: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(
+            max_workers=self._max_concurrent, thread_name_prefix="export-task"
+        ) as executor:
+            while pending or running:
+                if first_error is None and self._cancel_check():
+                    first_error = InterruptedError("导出已取消")
+                    self._failed.set()
+
+                if first_error is None:
+                    for name in [n for n in pending if self._ready(n, finished)]:
+                        if len(running) >= self._max_concurrent:
+                            break
+                        pending.remove(name)
+                        logger.info(f"开始导出任务: {name}")
+                        running[executor.submit(self._execute, self._tasks[name])] = name
+
+                if not running:
+                    if first_error is None and pending:
+                        raise RuntimeError(f"任务依赖无法满足: {', '.join(pending)}")
+                    break
+
+                done, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        finished.add(name)
+                        logger.info(f"导出任务完成: {name}")
+                    elif first_error is None:
+                        first_error = error
+                        self._failed.set()
+                        if not isinstance(error, InterruptedError):
+                            logger.error(f"导出任务 {name} 失败: {error}")
+
+        if first_error is not None:
+            raise first_error
@@ -0,0 +1,106 @@
+"""
+FFmpeg滤镜图 - 将导出参数编译为单个 -vf 滤镜链
+
+导出时的每一步像素变换都有对应的FFmpeg滤镜：
+    用户旋转 → transpose / hflip,vflip
+    裁剪框   → crop
+    缩放     → scale
+    180度旋转 → hflip,vflip
+    32像素对齐补边 → pad
+滤镜图模式下由FFmpeg完成全部像素处理，Python 不再逐帧读写数据。
+"""
+from typing import Any, Dict, List, Tuple
+
+# 用户旋转角度 → 滤镜（与 cv2.rotate 方向一致）
+ROTATION_FILTERS: Dict[int, List[str]] = {
+    0: [],
+    90: ["transpose=clock"],
+    180: ["hflip", "vflip"],
+    270: ["transpose=cclock"],
+}
+
+# 与 cv2.resize 默认的 INTER_LINEAR 对应
+SCALE_FLAGS = "bilinear"
+
+
+def rotate_cropbox(
+    cropbox: Tuple[int, int, int, int],
+    rotation: int,
+    source_width: int,
+    source_height: int
+) -> Tuple[int, int, int, int]:
+    """
+    将cropbox从原始坐标变换到旋转后坐标
+
+    Args:
+        cropbox: 原始坐标系下的 (x, y, w, h)
+        rotation: 用户旋转角度 (0, 90, 180, 270)
+        source_width: 源视频宽度
+        source_height: 源视频高度
+    """
+    x, y, w, h = cropbox
+    if rotation == 90:
+        return (source_height - y - h, x, h, w)
+    elif rotation == 180:
+        return (source_width - x - w, source_height - y - h, w, h)
+    elif rotation == 270:
+        return (y, source_width - x - w, h, w)
+    return (x, y, w, h)
+
+
+def build_video_filter(
+    cropbox: Tuple[int, int, int, int],
+    rotation: int,
+    source_size: Tuple[int, int],
+    spec: Dict[str, Any]
+) -> str:
+    """
+    构建导出用的 -vf 滤镜链
+
+    Args:
+        cropbox: 原始坐标系下的裁剪框 (x, y, w, h)
+        rotation: 用户旋转角度
+        source_size: 源视频尺寸 (宽, 高)
+        spec: 分辨率规格 (get_resolution_spec 的返回值)
+
+    Returns:
+        逗号分隔的滤镜链字符串
+    """
+    source_w, source_h = source_size
+    rx, ry, rw, rh = rotate_cropbox(cropbox, rotation, source_w, source_h)
+
+    # 先转为 bgr24：与 OpenCV 解码后的像素一致，奇数坐标裁剪也不受色度下采样影响，
+    # 缩放结果与逐帧路径（cv2.resize）等价；最终由编码器转回 yuv420p
+    filters = ["format=bgr24"]
+    filters.extend(ROTATION_FILTERS.get(rotation, []))
+    filters.append(f"crop={rw}:{rh}:{rx}:{ry}")
+    filters.append(f"scale={spec['width']}:{spec['height']}:flags={SCALE_FLAGS}")
+
+    if spec["rotate_180"]:
+        filters.extend(["hflip", "vflip"])
+
+    padding_side = spec["padding_side"]
+    if padding_side == "right" and spec["padded_width"] > spec["width"]:
+        filters.append(f"pad={spec['padded_width']}:{spec['height']}:0:0:black")
+    elif padding_side == "bottom" and spec["padded_height"] > spec["height"]:
+        filters.append(f"pad={spec['width']}:{spec['padded_height']}:0:0:black")
+
+    return ",".join(filters)
+
+
+def build_trim_args(start_frame: int, end_frame: int, fps: float) -> Tuple[List[str], List[str]]:
+    """
+    构建帧精确的裁切参数
+
+    输入端 -ss 先跳到入点前最近的关键帧再解码丢弃，结果是帧精确的；
+    时间点取入点帧前半帧，避免浮点误差把入点帧本身丢掉。
+
+    Returns:
+        (放在 -i 之前的参数, 放在输出端的参数)
+    """
+    input_args: List[str] = []
+    if start_frame > 0 and fps > 0:
+        seek_seconds = max(0.0, (start_frame - 0.5) / fps)
+        input_args = ["-ss", f"{seek_seconds:.6f}"]
+    output_args = ["-frames:v", str(max(0, end_frame - start_frame))]
+    return input_args, output_args
@@ -0,0 +1,343 @@
+"""
+FFmpeg进程封装 - 原始帧管道输入/输出、stderr收集、进度解析和取消
+"""
+import collections
+import logging
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Callable, Deque, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# stderr 只保留末尾若干行用于错误信息
+STDERR_TAIL_LINES = 50
+
+# 进度回调的最小间隔（秒）
+PROGRESS_INTERVAL = 0.25
+
+
+@dataclass
+class FFmpegProgress:
+    """FFmpeg -progress 输出的一次快照"""
+    frame: int = 0
+    total_frames: int = 0  # 已知的总帧数，0 表示未知
+    out_time_us: int = 0
+    duration_us: int = 0  # 已知的输出时长，0 表示未知
+    speed: float = 0.0  # 相对实时播放的倍速
+    elapsed: float = 0.0  # 进程启动后经过的秒数
+    finished: bool = False
+
+    @property
+    def fraction(self) -> float:
+        """完成比例 (0~1)，优先按帧数计算，其次按输出时间"""
+        if self.finished:
+            return 1.0
+        if self.total_frames > 0:
+            return min(1.0, self.frame / self.total_frames)
+        if self.duration_us > 0:
+            return min(1.0, self.out_time_us / self.duration_us)
+        return 0.0
+
+    @property
+    def fps(self) -> float:
+        """平均编码帧率"""
+        return self.frame / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """预计剩余秒数，无法估计时为 None"""
+        fraction = self.fraction
+        if fraction <= 0 or self.elapsed <= 0:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+
+def get_popen_kwargs() -> dict:
+    """获取平台相关的 Popen 参数（Windows 下隐藏控制台窗口）"""
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+    return kwargs
+
+
+def rawvideo_input_args(width: int, height: int, fps: float, pix_fmt: str = "bgr24") -> List[str]:
+    """
+    构建从 stdin 读取原始帧的输入参数
+
+    Args:
+        width: 帧宽度
+        height: 帧高度
+        fps: 帧率
+        pix_fmt: 原始像素格式（OpenCV 帧为 bgr24）
+    """
+    return [
+        "-f", "rawvideo",
+        "-pix_fmt", pix_fmt,
+        "-s", f"{width}x{height}",
+        "-framerate", str(fps),
+        "-i", "pipe:0",
+    ]
+
+
+class FFmpegRunner:
+    """
+    单个FFmpeg子进程
+
+    stdin 用于写入原始帧，stdout 用于读取原始帧或 -progress 输出；stderr 由后台线程持续读取，
+    避免管道写满导致 FFmpeg 阻塞、进而使写帧端死锁。
+    """
+
+    def __init__(self, ffmpeg_path: str, cancel_check: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            ffmpeg_path: ffmpeg可执行文件路径
+            cancel_check: 返回 True 表示已请求取消
+        """
+        self._ffmpeg_path = ffmpeg_path
+        self._cancel_check = cancel_check or (lambda: False)
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr_tail: Deque[str] = collections.deque(maxlen=STDERR_TAIL_LINES)
+        self._stderr_thread: Optional[threading.Thread] = None
+        self._progress_thread: Optional[threading.Thread] = None
+        self._progress = FFmpegProgress()
+
+    @property
+    def process(self) -> Optional[subprocess.Popen]:
+        return self._process
+
+    @property
+    def stderr_tail(self) -> str:
+        return "\n".join(self._stderr_tail)
+
+    @property
+    def progress(self) -> FFmpegProgress:
+        """最近一次进度快照"""
+        return self._progress
+
+    def start(
+        self,
+        args: List[str],
+        stdin: bool = False,
+        on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+        total_frames: int = 0,
+        duration: float = 0.0,
+        stdout: bool = False
+    ):
+        """
+        启动FFmpeg
+
+        Args:
+            args: ffmpeg 之后的参数列表
+            stdin: 是否打开 stdin 管道用于写入原始帧
+            on_progress: 进度回调（在后台线程中调用，间隔不小于 PROGRESS_INTERVAL）
+            total_frames: 预计输出帧数，用于计算进度
+            duration: 预计输出时长（秒），帧数未知时用于计算进度
+            stdout: 是否打开 stdout 管道用于读取原始帧（与 on_progress 互斥）
+        """
+        if stdout and on_progress is not None:
+            raise ValueError("stdout 管道不能同时用于读取帧和进度")
+        cmd = [self._ffmpeg_path, "-hide_banner"]
+        if not stdin:
+            cmd.append("-nostdin")
+        if on_progress is not None:
+            # 机器可读的进度写到 stdout，关闭 stderr 上的统计行
+            cmd.extend(["-progress", "pipe:1", "-nostats"])
+        cmd.extend(args)
+        logger.info(f"执行ffmpeg: {' '.join(cmd)}")
+
+        self._stderr_tail.clear()
+        self._progress = FFmpegProgress(
+            total_frames=max(0, total_frames), duration_us=int(max(0.0, duration) * 1_000_000)
+        )
+        self._process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+            stdout=subprocess.PIPE if stdout or on_progress is not None else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            **get_popen_kwargs()
+        )
+        self._stderr_thread = threading.Thread(
+            target=self._drain_stderr, name="ffmpeg-stderr", daemon=True
+        )
+        self._stderr_thread.start()
+        if on_progress is not None:
+            self._progress_thread = threading.Thread(
+                target=self._read_progress, args=(on_progress, time.perf_counter()),
+                name="ffmpeg-progress", daemon=True
+            )
+            self._progress_thread.start()
+
+    def _drain_stderr(self):
+        """后台读取 stderr"""
+        stream = self._process.stderr
+        for raw in iter(stream.readline, b""):
+            self._stderr_tail.append(raw.decode("utf-8", errors="replace").rstrip())
+        stream.close()
+
+    def _read_progress(self, on_progress: Callable[[FFmpegProgress], None], start_time: float):
+        """
+        后台解析 -progress 输出
+
+        每个进度块由若干 key=value 行组成，以 progress=continue/end 结尾。
+        """
+        stream = self._process.stdout
+        block: Dict[str, str] = {}
+        last_emit = 0.0
+        for raw in iter(stream.readline, b""):
+            key, sep, value = raw.decode("utf-8", errors="replace").strip().partition("=")
+            if not sep:
+                continue
+            if key != "progress":
+                block[key] = value
+                continue
+
+            progress = FFmpegProgress(
+                frame=_parse_int(block.get("frame")),
+                total_frames=self._progress.total_frames,
+                out_time_us=_parse_int(block.get("out_time_us")),
+                duration_us=self._progress.duration_us,
+                speed=_parse_float(block.get("speed", "").rstrip("x")),
+                elapsed=time.perf_counter() - start_time,
+                finished=(value == "end"),
+            )
+            self._progress = progress
+            block = {}
+
+            if progress.finished or progress.elapsed - last_emit >= PROGRESS_INTERVAL:
+                last_emit = progress.elapsed
+                try:
+                    on_progress(progress)
+                except Exception as e:
+                    logger.warning(f"FFmpeg进度回调出错: {e}")
+        stream.close()
+
+    def write_frame(self, frame: np.ndarray):
+        """
+        写入一帧原始数据
+
+        Raises:
+            InterruptedError: 已取消
+            RuntimeError: FFmpeg 提前退出
+        """
+        if self._cancel_check():
+            self.kill()
+            raise InterruptedError("导出已取消")
+        try:
+            self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except (BrokenPipeError, OSError):
+            if self._cancel_check():
+                raise InterruptedError("导出已取消")
+            self.wait()
+            raise RuntimeError(
+                f"ffmpeg 提前退出 (code {self._process.returncode}): {self.stderr_tail[-500:]}"
+            )
+
+    def read_frame(self, shape) -> Optional[np.ndarray]:
+        """
+        从 stdout 读取一帧原始数据
+
+        Args:
+            shape: 帧形状，如 (高, 宽, 3)
+
+        Returns:
+            uint8 数组；输出已结束时返回 None
+        """
+        frame = np.empty(shape, dtype=np.uint8)
+        buffer = memoryview(frame).cast("B")
+        stream = self._process.stdout
+        filled = 0
+        while filled < len(buffer):
+            count = stream.readinto(buffer[filled:])
+            if not count:
+                return None
+            filled += count
+        return frame
+
+    def wait(self, poll_interval: float = 0.5) -> int:
+        """
+        关闭 stdin 并等待进程结束，期间响应取消
+
+        Returns:
+            进程退出码
+        """
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+        while True:
+            try:
+                self._process.wait(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                if self._cancel_check():
+                    self.kill()
+                    raise InterruptedError("导出已取消")
+
+        if self._stderr_thread is not None:
+            self._stderr_thread.join(timeout=5)
+        if self._progress_thread is not None:
+            self._progress_thread.join(timeout=5)
+        return self._process.returncode
+
+    def finish(self, description: str = "ffmpeg"):
+        """
+        等待进程结束并检查退出码
+
+        Raises:
+            RuntimeError: 退出码非零
+        """
+        returncode = self.wait()
+        if returncode != 0:
+            stderr = self.stderr_tail
+            logger.error(f"{description} stderr: {stderr}")
+            raise RuntimeError(
+                f"{description}失败 (code {returncode}): {stderr[-500:] or '未知错误'}"
+            )
+
+    def terminate(self):
+        """请求进程终止（SIGTERM / TerminateProcess）"""
+        if self._process is not None and self._process.poll() is None:
+            try:
+                self._process.terminate()
+            except Exception as e:
+                logger.warning(f"终止FFmpeg进程时出错: {e}")
+
+    def kill(self):
+        """强制结束进程并回收"""
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            try:
+                self._process.kill()
+            except Exception as e:
+                logger.warning(f"结束FFmpeg进程时出错: {e}")
+        try:
+            if self._process.stdin and not self._process.stdin.closed:
+                self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        # 读帧模式下由调用方读取 stdout，这里关闭；-progress 模式由后台线程关闭
+        if self._progress_thread is None and self._process.stdout and not self._process.stdout.closed:
+            self._process.stdout.close()
+        self._process.wait()
+
+
+def _parse_int(value: Optional[str]) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
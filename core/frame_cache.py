@@ -0,0 +1,317 @@
+"""
+解码帧缓存 - 预览定位和逐帧步进时复用已解码的帧
+
+每个源视频一个缓存，以帧号为键、按字节预算做LRU淘汰；同一文件的循环视频、入场视频等
+多个预览共享同一个缓存（按源文件路径、大小、修改时间区分）。
+预览定位到某帧后，后台线程用独立的 VideoCapture 解码该帧前后的相邻帧放入缓存
+（沿最近的移动方向多预热一些），之后的单帧步进和在附近来回拖动直接命中缓存，不再重复解码。
+要取的帧正在被预热时，等待预热线程解码出来，而不是在界面线程再解码同一个 GOP。
+"""
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, OrderedDict, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from core.export_cache import source_identity
+from core.keyframe_index import KeyframeIndex
+from core.preview_decoder import seek_capture
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRAME_CACHE_BYTES = 256 * 1024 * 1024  # 每个源视频 256 MB
+
+# 预热窗口：沿移动方向/反方向各解码多少帧（两者之和再受缓存预算的一半限制）
+WARM_FRAMES_FORWARD = 12
+WARM_FRAMES_BACKWARD = 4
+
+# 等待预热线程解码某帧的最长时间（秒），超时后由调用方自行解码
+WARM_WAIT_SECONDS = 2.0
+
+
+@dataclass
+class FrameCacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    warmed: int = 0  # 后台预热解码放入缓存的帧数
+
+    def summary(self) -> str:
+        return f"帧缓存命中 {self.hits} / 未命中 {self.misses}"
+
+
+class FrameCache:
+    """单个源视频的解码帧缓存（线程安全）；通过 acquire_frame_cache 获取共享实例"""
+
+    def __init__(self, path: str, total_frames: int, max_bytes: int = DEFAULT_FRAME_CACHE_BYTES):
+        """
+        Args:
+            path: 视频路径
+            total_frames: 总帧数，预热不超出范围
+            max_bytes: 缓存帧的总字节上限
+        """
+        self._path = path
+        self._total_frames = total_frames
+        self._max_bytes = max_bytes
+        self._frames: OrderedDict[int, np.ndarray] = collections.OrderedDict()
+        self._bytes = 0
+        self._cond = threading.Condition()
+        self._warm_thread: Optional[threading.Thread] = None
+        self._warm_center: Optional[int] = None
+        self._last_center: Optional[int] = None
+        self._warm_direction = 1
+        # 预热线程正在解码的区间 (下一帧, 最后一帧)，空闲时为 None
+        self._warm_span: Optional[Tuple[int, int]] = None
+        self._closed = False
+        self._refs = 0
+        self._key: Optional[Tuple] = None
+        # 关键帧索引在后台建立，完成后由预览组件赋值，供预热定位使用
+        self.keyframe_index: Optional[KeyframeIndex] = None
+        self.stats = FrameCacheStats()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def size_bytes(self) -> int:
+        with self._cond:
+            return self._bytes
+
+    def set_max_bytes(self, max_bytes: int):
+        """修改字节预算，超出部分立即淘汰"""
+        with self._cond:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        """
+        取出第 index 帧
+
+        Returns:
+            只读的帧图像（调用方需要修改时先 copy()）；未缓存时返回 None
+        """
+        with self._cond:
+            frame = self._frames.get(index)
+            if frame is None:
+                self.stats.misses += 1
+                return None
+            self._frames.move_to_end(index)
+            self.stats.hits += 1
+            return frame
+
+    def wait(self, index: int, timeout: float = WARM_WAIT_SECONDS) -> Optional[np.ndarray]:
+        """
+        第 index 帧正在被预热时等待它解码完成
+
+        Returns:
+            帧图像；没有在预热该帧、预热被打断或超时时返回 None（调用方自行解码）
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                frame = self._frames.get(index)
+                if frame is not None:
+                    self._frames.move_to_end(index)
+                    self.stats.hits += 1
+                    return frame
+                span = self._warm_span
+                remaining = deadline - time.perf_counter()
+                if span is None or not (span[0] <= index <= span[1]) or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def put(self, index: int, frame: np.ndarray):
+        """放入第 index 帧（帧被设为只读，调用方之后不得再修改）"""
+        if frame.nbytes > self._max_bytes:
+            return
+        frame.flags.writeable = False
+        with self._cond:
+            self._put_locked(index, frame)
+
+    def _put_locked(self, index: int, frame: np.ndarray):
+        old = self._frames.pop(index, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._frames[index] = frame
+        self._bytes += frame.nbytes
+        self._evict()
+        self._cond.notify_all()
+
+    def _evict(self):
+        """超出预算时淘汰最久未使用的帧（调用时须持有锁）"""
+        while self._bytes > self._max_bytes and self._frames:
+            _, frame = self._frames.popitem(last=False)
+            self._bytes -= frame.nbytes
+            self.stats.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._cond:
+            self._frames.clear()
+            self._bytes = 0
+
+    def warm(self, index: int):
+        """在后台解码第 index 帧前后的相邻帧（新请求会打断尚未完成的预热）"""
+        with self._cond:
+            if self._closed:
+                return
+            if self._last_center is not None and index != self._last_center:
+                self._warm_direction = 1 if index > self._last_center else -1
+            self._last_center = index
+            self._warm_center = index
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(
+                    target=self._warm_loop, name="frame-cache-warm", daemon=True
+                )
+                self._warm_thread.start()
+            self._cond.notify_all()
+
+    def _warm_range(self, center: int, frame_bytes: int) -> Tuple[int, int]:
+        """预热窗口 [lo, hi]：沿移动方向多取，帧数之和不超过预算的一半（调用时须持有锁）"""
+        forward, backward = WARM_FRAMES_FORWARD, WARM_FRAMES_BACKWARD
+        if frame_bytes > 0:
+            limit = max(1, self._max_bytes // 2 // frame_bytes)
+            if forward + backward > limit:
+                forward = max(1, limit * forward // (forward + backward))
+                backward = max(0, limit - forward)
+        if self._warm_direction < 0:
+            forward, backward = backward, forward
+        return max(0, center - backward), min(self._total_frames - 1, center + forward)
+
+    def _warm_loop(self):
+        """预热线程：从窗口内第一个未缓存的帧顺序解码到最后一个未缓存的帧"""
+        cap = None
+        position = -1
+        frame_bytes = 0
+        try:
+            while True:
+                with self._cond:
+                    self._warm_span = None
+                    self._cond.notify_all()
+                    while not self._closed and self._warm_center is None:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    center = self._warm_center
+                    self._warm_center = None
+                    keyframe_index = self.keyframe_index
+                    lo, hi = self._warm_range(center, frame_bytes)
+                    missing = [i for i in range(lo, hi + 1) if i not in self._frames]
+                    if missing:
+                        self._warm_span = (missing[0], missing[-1])
+                if not missing:
+                    continue
+
+                if cap is None:
+                    cap = cv2.VideoCapture(self._path)
+                    if not cap.isOpened():
+                        logger.warning(f"帧缓存预热无法打开视频: {self._path}")
+                        return
+                start, end = missing[0], missing[-1]
+                position = seek_capture(cap, position, start, keyframe_index)
+                if position != start:
+                    position = -1
+                    continue
+                while position <= end:
+                    with self._cond:
+                        if self._closed or self._warm_center is not None:
+                            break
+                        cached = position in self._frames
+                    if cached:
+                        ok = cap.grab()
+                    else:
+                        ok, frame = cap.read()
+                        if ok:
+                            frame_bytes = frame.nbytes
+                            frame.flags.writeable = False
+                            with self._cond:
+                                if frame.nbytes <= self._max_bytes:
+                                    self._put_locked(position, frame)
+                                    self.stats.warmed += 1
+                    if not ok:
+                        position = -1
+                        break
+                    position += 1
+                    with self._cond:
+                        self._warm_span = (position, end)
+        finally:
+            if cap is not None:
+                cap.release()
+
+    def close(self, wait: bool = False):
+        """
+        停止预热线程并释放缓存的帧（共享实例应通过 release_frame_cache 释放）
+
+        Args:
+            wait: 是否等待预热线程退出（进程退出前调用，避免线程仍在解码）
+        """
+        with self._cond:
+            self._closed = True
+            self._frames.clear()
+            self._bytes = 0
+            self._warm_span = None
+            self._cond.notify_all()
+            thread = self._warm_thread
+        if wait and thread is not None:
+            thread.join()
+
+
+_registry: Dict[Tuple, FrameCache] = {}
+_registry_lock = threading.Lock()
+_default_max_bytes = DEFAULT_FRAME_CACHE_BYTES
+
+
+def set_frame_cache_budget(max_bytes: int):
+    """设置每个源视频的帧缓存字节预算（对已有和之后创建的缓存都生效）"""
+    global _default_max_bytes
+    with _registry_lock:
+        _default_max_bytes = max_bytes
+        caches = list(_registry.values())
+    for cache in caches:
+        cache.set_max_bytes(max_bytes)
+
+
+def acquire_frame_cache(path: str, total_frames: int) -> FrameCache:
+    """
+    获取源视频的共享帧缓存（引用计数，用完后调用 release_frame_cache）
+
+    源文件大小或修改时间变化后得到新的缓存。
+    """
+    try:
+        identity = source_identity(path)
+    except OSError:
+        identity = {"path": path}
+    key = tuple(sorted(identity.items()))
+    with _registry_lock:
+        cache = _registry.get(key)
+        if cache is None:
+            cache = FrameCache(path, total_frames, _default_max_bytes)
+            cache._key = key
+            _registry[key] = cache
+        cache._refs += 1
+        return cache
+
+
+def release_frame_cache(cache: FrameCache, wait: bool = False):
+    """释放一次引用，最后一个使用者释放后停止预热并丢弃缓存（wait 见 FrameCache.close）"""
+    with _registry_lock:
+        cache._refs -= 1
+        if cache._refs > 0:
+            return
+        _registry.pop(cache._key, None)
+    cache.close(wait)
@@ -0,0 +1,213 @@
+"""
+帧变换计划 - 预先计算的 旋转 + 裁剪 + 缩放 + 补边，逐帧不分配内存
+
+原实现每帧依次生成：整帧旋转副本、裁剪视图、缩放结果、可选的180度旋转副本、
+补边用的 np.zeros 以及 hstack/vstack 拼接结果。变换计划改为：
+
+1. 裁剪框换算回源帧坐标，直接在源帧上取视图（不旋转整帧）
+2. 用户旋转与分辨率规格要求的180度旋转合并为一次旋转
+3. 无旋转时缩放结果直接写入补边输出缓冲区的画面区域；
+   有旋转时先缩放到线程私有的小缓冲区，再旋转写入画面区域（只旋转缩放后的小图）
+4. 输出缓冲区由缓冲池复用，补边区域在分配时清零一次，之后不再写入
+5. 可选直接输出 I420 (yuv420p)：像素格式转换在变换线程中完成，
+   编码器无需再转换，管道数据量减半
+"""
+import collections
+import threading
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+# 送入编码器的原始像素格式（FFmpeg -pix_fmt 名称）
+PIX_FMT_BGR24 = "bgr24"
+PIX_FMT_I420 = "yuv420p"
+
+# BT.601 有限范围 (16-235/16-240) 的色度系数，按 OpenCV 的 B, G, R 通道顺序，末列为偏移
+_BGR_TO_U = np.array([[0.439, -0.291, -0.148, 128.0]], dtype=np.float32)
+_BGR_TO_V = np.array([[-0.071, -0.368, 0.439, 128.0]], dtype=np.float32)
+
+# 合并后的旋转角度 -> cv2.rotate 的旋转代码
+_ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+} if HAS_CV2 else {}
+
+
+class FrameBufferPool:
+    """
+    固定形状的帧缓冲池（线程安全）
+
+    acquire() 优先复用已归还的缓冲区，没有时新分配（已清零）；
+    稳定运行后缓冲区数量等于最大在途帧数，不再分配内存。
+    未归还的缓冲区由调用方持有，不会被复用。
+    """
+
+    def __init__(self, shape: Tuple[int, ...]):
+        self.shape = shape
+        self._free: "collections.deque[np.ndarray]" = collections.deque()
+        self.allocated = 0
+
+    def acquire(self) -> np.ndarray:
+        try:
+            return self._free.pop()
+        except IndexError:
+            self.allocated += 1
+            return np.zeros(self.shape, dtype=np.uint8)
+
+    def release(self, buffer: np.ndarray):
+        if buffer.shape == self.shape:
+            self._free.append(buffer)
+
+
+def bgr_to_i420(frame: np.ndarray, out: np.ndarray, half: np.ndarray) -> np.ndarray:
+    """
+    BGR 帧转换为 I420 (yuv420p)，写入 out
+
+    cv2 的 COLOR_BGR2YUV_I420 只取每个 2x2 块左上角像素的色度，边缘处色度与
+    FFmpeg 的转换差异明显；这里亮度用 cvtColor，色度改由 2x2 块平均后的半尺寸图计算。
+
+    Args:
+        frame: (高, 宽, 3) BGR，宽高须为偶数
+        out: (高*3/2, 宽) 输出缓冲区
+        half: (高/2, 宽/2, 3) 中间缓冲区
+    """
+    height, width = frame.shape[:2]
+    cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=out)
+    cv2.resize(frame, (width // 2, height // 2), dst=half, interpolation=cv2.INTER_AREA)
+    chroma_rows = height // 4
+    u_plane = out[height:height + chroma_rows].reshape(height // 2, width // 2)
+    v_plane = out[height + chroma_rows:].reshape(height // 2, width // 2)
+    cv2.transform(half, _BGR_TO_U, dst=u_plane)
+    cv2.transform(half, _BGR_TO_V, dst=v_plane)
+    return out
+
+
+def i420_shape(width: int, height: int) -> Tuple[int, int]:
+    """
+    I420 帧缓冲区形状
+
+    Raises:
+        ValueError: 宽高不是偶数（色度平面为 2x2 子采样）
+    """
+    if width % 2 or height % 2:
+        raise ValueError(f"I420 输出要求帧宽高为偶数: {width}x{height}")
+    return height * 3 // 2, width
+
+
+def output_frame_size(spec: Dict[str, Any]) -> Tuple[int, int]:
+    """补边后送入编码器的帧尺寸 (宽, 高)"""
+    if spec["padding_side"] == "right":
+        return spec["padded_width"], spec["height"]
+    if spec["padding_side"] == "bottom":
+        return spec["width"], spec["padded_height"]
+    return spec["width"], spec["height"]
+
+
+class FrameTransformPlan:
+    """
+    单个 (源尺寸, 旋转, 裁剪框, 分辨率规格) 的帧变换
+
+    可在多个线程中并发调用；返回的帧来自缓冲池，编码端用完后调用 release() 归还。
+    """
+
+    def __init__(
+        self,
+        source_size: Tuple[int, int],
+        rotation: int,
+        cropbox: Tuple[int, int, int, int],
+        spec: Dict[str, Any],
+        pix_fmt: str = PIX_FMT_BGR24
+    ):
+        """
+        Args:
+            source_size: 源帧 (宽, 高)
+            rotation: 用户旋转角度 (0, 90, 180, 270)
+            cropbox: 原始坐标系下的裁剪框 (x, y, w, h)
+            spec: 分辨率规格
+            pix_fmt: 输出像素格式，PIX_FMT_BGR24 或 PIX_FMT_I420
+
+        Raises:
+            ValueError: 不支持的像素格式，或 I420 输出时帧宽高不是偶数
+        """
+        source_w, source_h = source_size
+        x, y, w, h = cropbox
+        # 与在旋转后的整帧上切片等价：超出源帧的部分被截掉
+        x0, y0 = max(0, x), max(0, y)
+        self._rows = slice(y0, min(source_h, y + h))
+        self._cols = slice(x0, min(source_w, x + w))
+
+        target_w, target_h = spec["width"], spec["height"]
+        rotation = (rotation + (180 if spec["rotate_180"] else 0)) % 360
+        self._rotate_code = _ROTATE_CODES.get(rotation)
+        # 先缩放再旋转：90/270度时缩放目标的宽高互换
+        if rotation in (90, 270):
+            self._resize_size = (target_h, target_w)
+        else:
+            self._resize_size = (target_w, target_h)
+
+        frame_w, frame_h = output_frame_size(spec)
+        self.frame_size = (frame_w, frame_h)
+        self.pix_fmt = pix_fmt
+        if pix_fmt == PIX_FMT_BGR24:
+            self._pool = FrameBufferPool((frame_h, frame_w, 3))
+        elif pix_fmt == PIX_FMT_I420:
+            # 补边后的尺寸按 32 像素对齐，天然为偶数；这里仍显式校验
+            self._pool = FrameBufferPool(i420_shape(frame_w, frame_h))
+        else:
+            raise ValueError(f"不支持的像素格式: {pix_fmt}")
+        self._target_shape = (target_h, target_w)
+        self._local = threading.local()
+
+    @property
+    def allocated_buffers(self) -> int:
+        """已分配的输出缓冲区数量"""
+        return self._pool.allocated
+
+    def _scratch(self) -> np.ndarray:
+        """线程私有的缩放中间缓冲区（仅旋转时使用）"""
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            width, height = self._resize_size
+            scratch = self._local.scratch = np.empty((height, width, 3), dtype=np.uint8)
+        return scratch
+
+    def _bgr_buffers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """线程私有的补边 BGR 帧和半尺寸色度中间缓冲区（仅 I420 输出时使用）"""
+        buffers = getattr(self._local, "bgr", None)
+        if buffers is None:
+            frame_w, frame_h = self.frame_size
+            buffers = self._local.bgr = (
+                np.zeros((frame_h, frame_w, 3), dtype=np.uint8),
+                np.empty((frame_h // 2, frame_w // 2, 3), dtype=np.uint8),
+            )
+        return buffers
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        if self.pix_fmt == PIX_FMT_I420:
+            bgr, half = self._bgr_buffers()
+            return bgr_to_i420(self._render(frame, bgr), self._pool.acquire(), half)
+        return self._render(frame, self._pool.acquire())
+
+    def _render(self, frame: np.ndarray, output: np.ndarray) -> np.ndarray:
+        """旋转 + 裁剪 + 缩放写入补边 BGR 帧的画面区域"""
+        target_h, target_w = self._target_shape
+        roi = output[:target_h, :target_w]
+        crop = frame[self._rows, self._cols]
+        if self._rotate_code is None:
+            cv2.resize(crop, self._resize_size, dst=roi)
+        else:
+            scratch = self._scratch()
+            cv2.resize(crop, self._resize_size, dst=scratch)
+            cv2.rotate(scratch, self._rotate_code, dst=roi)
+        return output
+
+    def release(self, frame: np.ndarray):
+        """归还已写入编码器的帧"""
+        self._pool.release(frame)
@@ -0,0 +1,321 @@
+"""
+关键帧索引 - 帧精确的快速定位
+
+对每个源视频扫描一次视频流的数据包（不解码），记录每一帧的显示时间戳和关键帧位置，
+保存在用户缓存目录中（不在素材目录里留下任何文件），源文件大小或修改时间变化后自动重建。
+
+有了索引，从任意入点开始读取只需：跳到入点之前最近的关键帧开始解码，
+再用 trim 滤镜按入点帧的真实时间戳丢弃之前的帧——解码量不超过一个 GOP，
+且无论容器的定位精度如何，得到的第一帧一定是入点帧。
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.ffmpeg_runner import FFmpegRunner, get_popen_kwargs
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# 数据包标志 AV_PKT_FLAG_DISCARD：编辑列表裁掉的包，解码后被丢弃、不会输出帧
+PACKET_FLAG_DISCARD = 0x0004
+
+# 扫描数据包的超时（秒），只读不解码，很长的视频也很快
+SCAN_TIMEOUT_SECONDS = 300
+
+
+@dataclass
+class KeyframeIndex:
+    """单个视频流的帧索引"""
+    time_base: Tuple[int, int]  # 时间戳单位 (分子, 分母) 秒
+    pts: List[int]  # 每一帧的显示时间戳，按显示顺序
+    keyframes: List[int]  # 关键帧的帧序号，升序
+    width: int = 0
+    height: int = 0
+    source_size: int = 0
+    source_mtime_ns: int = 0
+    version: int = INDEX_VERSION
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.pts)
+
+    def frame_time(self, frame: int) -> float:
+        """某帧的显示时间（秒，未减去流的起始时间）"""
+        num, den = self.time_base
+        return self.pts[frame] * num / den
+
+    def keyframe_before(self, frame: int) -> int:
+        """不晚于 frame 的最近关键帧的帧序号"""
+        position = bisect.bisect_right(self.keyframes, frame) - 1
+        return self.keyframes[position] if position >= 0 else 0
+
+    def seek_input_args(self, start_frame: int) -> List[str]:
+        """
+        放在 -i 之前的定位参数：跳到 start_frame 之前最近的关键帧
+
+        -seek_timestamp 使 -ss 按原始时间戳解释，-copyts 保留原始时间戳供 trim_filter 比较；
+        -noaccurate_seek 让解码从关键帧开始输出，丢弃多余帧的工作交给 trim。
+        """
+        keyframe = self.keyframe_before(start_frame)
+        # 取关键帧与下一帧的中点，避免浮点误差落到前一个关键帧
+        seek = self.frame_time(keyframe)
+        if keyframe + 1 < self.frame_count:
+            seek = (seek + self.frame_time(keyframe + 1)) / 2
+        return [
+            "-seek_timestamp", "1",
+            "-noaccurate_seek",
+            "-ss", f"{seek:.6f}",
+            "-copyts",
+        ]
+
+    def trim_filter(self, start_frame: int) -> str:
+        """丢弃 start_frame 之前的帧并把时间戳归零的滤镜"""
+        # 阈值取入点帧与前一帧的中点，可变帧率时同样精确
+        if start_frame > 0:
+            start = (self.frame_time(start_frame - 1) + self.frame_time(start_frame)) / 2
+        else:
+            start = self.frame_time(0) - 1.0
+        return f"trim=start={start:.6f},setpts=PTS-STARTPTS"
+
+    def matches(self, video_path: str) -> bool:
+        """索引是否仍对应该文件"""
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return False
+        return (
+            self.version == INDEX_VERSION
+            and self.source_size == stat.st_size
+            and self.source_mtime_ns == stat.st_mtime_ns
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KeyframeIndex":
+        data = dict(data)
+        data["time_base"] = tuple(data["time_base"])
+        return cls(**data)
+
+
+def find_ffprobe(ffmpeg_path: str) -> str:
+    """查找与 ffmpeg 同目录的 ffprobe，其次在 PATH 中查找"""
+    if ffmpeg_path:
+        directory, name = os.path.split(ffmpeg_path)
+        candidate = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+        if candidate != ffmpeg_path and os.path.isfile(candidate):
+            return candidate
+    return shutil.which("ffprobe") or ""
+
+
+def _parse_time_base(text: str) -> Tuple[int, int]:
+    num, _, den = text.strip().partition("/")
+    return int(num), int(den or 1)
+
+
+def _scan_with_ffprobe(ffprobe_path: str, video_path: str) -> Tuple[Tuple[int, int], int, int, List[Tuple[int, bool]]]:
+    result = subprocess.run([
+        ffprobe_path, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=time_base,width,height:packet=pts,flags",
+        "-of", "json",
+        video_path
+    ], capture_output=True, text=True, check=True, timeout=SCAN_TIMEOUT_SECONDS, **get_popen_kwargs())
+    data = json.loads(result.stdout)
+    stream = data["streams"][0]
+    packets = [
+        (int(packet["pts"]), "K" in packet.get("flags", ""))
+        for packet in data.get("packets", [])
+        if packet.get("pts") not in (None, "N/A") and "D" not in packet.get("flags", "")
+    ]
+    return (
+        _parse_time_base(stream["time_base"]),
+        int(stream.get("width", 0)), int(stream.get("height", 0)),
+        packets
+    )
+
+
+def _scan_with_ffmpeg(ffmpeg_path: str, video_path: str) -> Tuple[Tuple[int, int], int, int, List[Tuple[int, bool]]]:
+    """
+    没有 ffprobe 时用 framecrc 输出数据包信息（流复制，不解码）
+
+    每行为 "流, dts, pts, 时长, 大小, 校验[, F=标志]"，关键帧的标志省略不写。
+    """
+    result = subprocess.run([
+        ffmpeg_path, "-hide_banner", "-nostdin", "-loglevel", "error",
+        "-copyts", "-i", video_path,
+        "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"
+    ], capture_output=True, text=True, check=True, timeout=SCAN_TIMEOUT_SECONDS, **get_popen_kwargs())
+    time_base = (1, 1)
+    width = height = 0
+    packets = []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            time_base = _parse_time_base(line.split(":", 1)[1])
+        elif line.startswith("#dimensions 0:"):
+            w, _, h = line.split(":", 1)[1].strip().partition("x")
+            width, height = int(w), int(h)
+        elif line and not line.startswith("#"):
+            parts = [part.strip() for part in line.split(",")]
+            flags = next((part for part in parts[6:] if part.startswith("F=")), None)
+            flag_bits = 1 if flags is None else int(flags[2:], 16)
+            if flag_bits & PACKET_FLAG_DISCARD:
+                continue
+            packets.append((int(parts[2]), bool(flag_bits & 1)))
+    return time_base, width, height, packets
+
+
+def build_keyframe_index(video_path: str, ffmpeg_path: str) -> KeyframeIndex:
+    """
+    扫描视频流的数据包，构建索引
+
+    Raises:
+        RuntimeError: 扫描失败或视频流为空
+    """
+    stat = os.stat(video_path)
+    ffprobe_path = find_ffprobe(ffmpeg_path)
+    try:
+        if ffprobe_path:
+            time_base, width, height, packets = _scan_with_ffprobe(ffprobe_path, video_path)
+        else:
+            time_base, width, height, packets = _scan_with_ffmpeg(ffmpeg_path, video_path)
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError, IndexError) as e:
+        raise RuntimeError(f"构建关键帧索引失败: {e}") from e
+    if not packets:
+        raise RuntimeError(f"视频中没有可索引的帧: {video_path}")
+
+    # 数据包按解码顺序排列，按时间戳排序得到显示顺序（B 帧的显示顺序与解码顺序不同）
+    packets.sort()
+    keyframes = [frame for frame, (_, is_key) in enumerate(packets) if is_key] or [0]
+    return KeyframeIndex(
+        time_base=time_base,
+        pts=[pts for pts, _ in packets],
+        keyframes=keyframes,
+        width=width,
+        height=height,
+        source_size=stat.st_size,
+        source_mtime_ns=stat.st_mtime_ns,
+    )
+
+
+def index_path_for(video_path: str) -> str:
+    """索引文件路径：用户缓存目录下以源视频绝对路径的摘要命名的 json"""
+    digest = hashlib.sha1(os.path.abspath(video_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir("keyframe_index"), f"{digest}.json")
+
+
+def _read_index(path: str) -> Optional[KeyframeIndex]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return KeyframeIndex.from_dict(json.load(f))
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+
+def _write_index(path: str, index: KeyframeIndex):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(asdict(index), f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+_memory_cache: Dict[str, KeyframeIndex] = {}
+_build_locks: Dict[str, threading.Lock] = {}
+_cache_lock = threading.Lock()
+
+
+def load_keyframe_index(video_path: str, ffmpeg_path: str) -> KeyframeIndex:
+    """
+    读取视频的关键帧索引，不存在或已过期时构建并保存（线程安全，同一文件只构建一次）
+
+    Raises:
+        RuntimeError: 构建失败
+    """
+    key = os.path.normcase(os.path.abspath(video_path))
+    with _cache_lock:
+        lock = _build_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        index = _memory_cache.get(key)
+        if index is not None and index.matches(video_path):
+            return index
+
+        path = index_path_for(video_path)
+        index = _read_index(path)
+        if index is not None and index.matches(video_path):
+            _memory_cache[key] = index
+            return index
+
+        index = build_keyframe_index(video_path, ffmpeg_path)
+        logger.info(
+            f"已建立关键帧索引: {os.path.basename(video_path)} "
+            f"({index.frame_count} 帧, {len(index.keyframes)} 个关键帧)"
+        )
+        try:
+            _write_index(path, index)
+        except OSError as e:
+            logger.debug(f"无法保存关键帧索引到 {path}: {e}")
+        _memory_cache[key] = index
+        return index
+
+
+def iter_indexed_frames(
+    ffmpeg_path: str,
+    video_path: str,
+    index: KeyframeIndex,
+    start_frame: int,
+    frame_count: int,
+    frame_size: Tuple[int, int],
+    cancel_check: Optional[Callable[[], bool]] = None,
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+    on_exit: Optional[Callable[[subprocess.Popen], None]] = None
+) -> Iterator[np.ndarray]:
+    """
+    从 start_frame 开始帧精确地解码 frame_count 帧 (BGR)
+
+    Args:
+        frame_size: 解码输出的 (宽, 高)
+        on_start / on_exit: 解码进程启动后 / 结束后调用（用于登记进程以支持取消）
+    """
+    width, height = frame_size
+    runner = FFmpegRunner(ffmpeg_path, cancel_check=cancel_check)
+    runner.start(
+        index.seek_input_args(start_frame) + [
+            "-i", video_path,
+            "-map", "0:v:0",
+            "-vf", index.trim_filter(start_frame),
+            "-fps_mode", "passthrough",
+            "-frames:v", str(frame_count),
+            "-an",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+        ],
+        stdout=True
+    )
+    if on_start is not None:
+        on_start(runner.process)
+    try:
+        for _ in range(frame_count):
+            if cancel_check is not None and cancel_check():
+                raise InterruptedError("导出已取消")
+            frame = runner.read_frame((height, width, 3))
+            if frame is None:
+                break
+            yield frame
+        runner.kill()
+    except BaseException:
+        runner.kill()
+        raise
+    finally:
+        if on_exit is not None:
+            on_exit(runner.process)
@@ -1,8 +1,18 @@
 """
 叠加UI渲染器 - 在视频帧上渲染Arknights风格的UI元素
+
+叠加UI与视频内容无关，只取决于选项和帧尺寸：首次渲染时编译成预乘 alpha 的 BGRA 图层并缓存，
+之后每帧只做一次 out = 图层颜色 + (1 - alpha) * 帧 的合成，选项或尺寸变化时重新编译。
+导出烧录叠加UI时用 composite_arknights_batch / composite_arknights_chunks 对整组帧原地合成，
+appear_time 之前的帧保持原样。
 """
+import collections
+import dataclasses
+import functools
 import logging
-from typing import Optional, Tuple
+import os
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, OrderedDict, Tuple
 
 import numpy as np
 
@@ -18,16 +28,120 @@ try:
 except ImportError:
     HAS_PIL = False
 
+from config.constants import microseconds_to_frames
 from config.epconfig import ArknightsOverlayOptions
+from utils.file_utils import get_app_dir
 
 logger = logging.getLogger(__name__)
 
+# 旋转文字使用与模拟器相同的内置字体，不依赖系统字体
+BUNDLED_FONT = os.path.join("simulator", "resources", "fonts", "DejaVuSans-Bold.ttf")
+
+# 旋转文字块缓存的最大数量（编辑文字时每个新字符串产生一个）
+MAX_TEXT_TILES = 32
+
+
+@dataclass
+class OverlayLayer:
+    """预乘 alpha 的叠加图层（整帧的叠加UI，或一个旋转文字块）"""
+    bgra: np.ndarray  # (H, W, 4) 预乘 alpha 的 BGRA
+    color: np.ndarray  # (H, W, 3) 预乘后的颜色（bgra 的前三个通道，连续存储便于合成）
+    transmission: np.ndarray  # (H, W, 3) 255 - alpha，按通道展开
+
+    @classmethod
+    def from_image(cls, image: np.ndarray, width: int, height: int) -> "OverlayLayer":
+        """由 BGR / BGRA / 灰度图片（如图片叠加UI）生成铺满 width x height 的图层，没有 alpha 时不透明"""
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        elif image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        alpha = image[:, :, 3]
+        color = cv2.multiply(image[:, :, :3], cv2.merge([alpha] * 3), scale=1 / 255)
+        return cls(
+            bgra=np.dstack([color, alpha]),
+            color=color,
+            transmission=cv2.merge([255 - alpha] * 3)
+        )
+
+    def composite(self, frame: np.ndarray) -> np.ndarray:
+        """把图层合成到 frame 上，返回新的帧（frame 不被修改）"""
+        result = cv2.multiply(frame, self.transmission, scale=1 / 255)
+        cv2.add(result, self.color, dst=result)
+        return result
+
+    def blend_into(self, region: np.ndarray):
+        """把图层原地合成到 region（与图层同尺寸，可以是帧的子区域视图）"""
+        cv2.multiply(region, self.transmission, dst=region, scale=1 / 255)
+        cv2.add(region, self.color, dst=region)
+
+    def blend_frames(self, frames: np.ndarray):
+        """
+        把图层原地合成到 (N, H, W, 3) 的每一帧上
+
+        逐帧调用 cv2 而不是把图层平铺成 N 份整体运算：平铺多出 N 份图层的内存读写，实测反而更慢。
+        """
+        for frame in frames:
+            self.blend_into(frame)
+
+
+def _font_path() -> str:
+    """内置字体的路径"""
+    return os.path.join(get_app_dir(), BUNDLED_FONT)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_font(path: str, size: int):
+    """按字号加载字体（结果缓存）：内置字体 → 系统 arial → Pillow 默认字体"""
+    for name in (path, "arial"):
+        try:
+            return ImageFont.truetype(name, size)
+        except (IOError, OSError):
+            continue
+    logger.warning(f"无法加载字体 {path}，使用默认字体")
+    return ImageFont.load_default()
+
+
+def _render_rotated_text(
+    text: str,
+    font_size: int,
+    color_rgb: Tuple[int, int, int],
+    width: int, height: int
+) -> OverlayLayer:
+    """绘制水平文字后顺时针旋转90°，裁剪到 width x height 以内，返回预乘 alpha 的文字块"""
+    # 旋转90°后: 原始水平文字的宽度对应旋转后的高度
+    # 所以先绘制水平文字，尺寸为 (height, width)
+    text_img = Image.new('RGBA', (height, width), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(text_img)
+    draw.text((2, 0), text, fill=(*color_rgb, 255), font=_load_font(_font_path(), font_size))
+
+    # 顺时针旋转90° (PIL的rotate是逆时针，所以用270°或-90°)
+    rotated = text_img.rotate(-90, expand=True)
+
+    # 裁剪到目标尺寸
+    rotated = rotated.crop((0, 0, min(rotated.width, width), min(rotated.height, height)))
+
+    rgba = np.array(rotated)
+    alpha = rgba[:, :, 3]
+    # RGBA -> 预乘的 BGR
+    color = cv2.multiply(
+        cv2.cvtColor(rgba[:, :, :3], cv2.COLOR_RGB2BGR), cv2.merge([alpha] * 3), scale=1 / 255
+    )
+    return OverlayLayer(
+        bgra=np.dstack([color, alpha]),
+        color=color,
+        transmission=cv2.merge([255 - alpha] * 3)
+    )
+
 
 class OverlayRenderer:
     """叠加UI渲染器"""
 
     def __init__(self):
         self._font = cv2.FONT_HERSHEY_SIMPLEX if HAS_CV2 else None
+        self._layer: Optional[OverlayLayer] = None
+        self._layer_key: Optional[tuple] = None
+        self._text_tiles: OrderedDict[tuple, OverlayLayer] = collections.OrderedDict()
 
     @staticmethod
     def hex_to_bgr(hex_color: str) -> Tuple[int, int, int]:
@@ -46,7 +160,7 @@ class OverlayRenderer:
         options: Optional[ArknightsOverlayOptions]
     ) -> np.ndarray:
         """
-        渲染Arknights风格叠加UI
+        渲染Arknights风格叠加UI（使用缓存的图层）
 
         Args:
             frame: 输入帧 (BGR格式)
@@ -57,8 +171,121 @@ class OverlayRenderer:
         """
         if not HAS_CV2 or options is None:
             return frame
+        h, w = frame.shape[:2]
+        return self.get_arknights_layer(options, w, h).composite(frame)
+
+    def composite_arknights_batch(
+        self,
+        frames: np.ndarray,
+        options: Optional[ArknightsOverlayOptions],
+        fps: float,
+        start_index: int = 0
+    ) -> np.ndarray:
+        """
+        把Arknights风格叠加UI原地合成到一组帧上（导出烧录叠加UI用）
+
+        Args:
+            frames: (N, H, W, 3) BGR 帧序列，原地修改
+            options: Arknights叠加选项
+            fps: 帧率，用于把 appear_time 换算成帧号
+            start_index: frames[0] 在整段视频中的帧号
+
+        Returns:
+            frames 本身；早于 appear_time 的帧不变
+        """
+        if not HAS_CV2 or options is None or len(frames) == 0:
+            return frames
+        # 叠加UI从第 appear_time 换算出的帧开始显示
+        first = microseconds_to_frames(options.appear_time, fps) - start_index
+        if first >= len(frames):
+            return frames
+        h, w = frames.shape[1:3]
+        self.get_arknights_layer(options, w, h).blend_frames(frames[max(0, first):])
+        return frames
+
+    def composite_arknights_chunks(
+        self,
+        chunks: Iterable[np.ndarray],
+        options: Optional[ArknightsOverlayOptions],
+        fps: float,
+        start_index: int = 0
+    ) -> Iterator[np.ndarray]:
+        """
+        对按顺序到来的帧块逐块调用 composite_arknights_batch（帧号跨块累计）
+
+        Args:
+            chunks: 依次产生 (n, H, W, 3) 帧块的可迭代对象
+            options: Arknights叠加选项
+            fps: 帧率
+            start_index: 第一块第一帧的帧号
+
+        Yields:
+            原地合成后的帧块
+        """
+        index = start_index
+        for chunk in chunks:
+            yield self.composite_arknights_batch(chunk, options, fps, index)
+            index += len(chunk)
+
+    def get_arknights_layer(
+        self,
+        options: ArknightsOverlayOptions,
+        width: int,
+        height: int
+    ) -> OverlayLayer:
+        """取得选项和尺寸对应的叠加图层，与上次不同时重新编译"""
+        key = (dataclasses.astuple(options), width, height)
+        if self._layer is None or self._layer_key != key:
+            self._layer = self.compile_arknights_layer(options, width, height)
+            self._layer_key = key
+        return self._layer
+
+    def compile_arknights_layer(
+        self,
+        options: ArknightsOverlayOptions,
+        width: int,
+        height: int
+    ) -> OverlayLayer:
+        """
+        把叠加UI编译成预乘 alpha 的图层
 
-        result = frame.copy()
+        叠加UI的每一步（半透明矩形、抗锯齿文字、旋转文字）都是帧像素与常量颜色的线性混合，
+        整体可写成 out = C + (1 - a) * frame：在全黑帧上绘制得到 C，在全白帧上绘制得到 C + (1 - a) * 255，
+        两者相减即得 alpha，绘制代码只有 draw_arknights_overlay 一份。
+        """
+        black = np.zeros((height, width, 3), dtype=np.uint8)
+        white = np.full((height, width, 3), 255, dtype=np.uint8)
+        self.draw_arknights_overlay(black, options)
+        self.draw_arknights_overlay(white, options)
+
+        color = black
+        # 取三个通道的平均作为 alpha，消除各通道舍入误差的差别
+        transmission = np.clip(
+            white.astype(np.int16) - black, 0, 255
+        ).mean(axis=2).round().astype(np.uint8)
+        alpha = 255 - transmission
+        # 预乘颜色不能超过 alpha（舍入误差）
+        np.minimum(color, alpha[:, :, None], out=color)
+
+        logger.debug(f"已编译叠加图层: {width}x{height}")
+        return OverlayLayer(
+            bgra=np.dstack([color, alpha]),
+            color=color,
+            transmission=cv2.merge([transmission] * 3)
+        )
+
+    def draw_arknights_overlay(
+        self,
+        result: np.ndarray,
+        options: ArknightsOverlayOptions
+    ):
+        """
+        直接在帧上逐项绘制Arknights风格叠加UI（原地修改）
+
+        Args:
+            result: 要绘制的帧 (BGR格式)
+            options: Arknights叠加选项
+        """
         h, w = result.shape[:2]
 
         # 获取主题色
@@ -198,8 +425,6 @@ class OverlayRenderer:
         cv2.line(result, (w - corner_size, h - 1), (w, h - 1), color, corner_thickness)
         cv2.line(result, (w - 1, h - corner_size), (w - 1, h - 1), color, corner_thickness)
 
-        return result
-
     def _draw_rotated_text(
         self,
         frame: np.ndarray,
@@ -212,42 +437,39 @@ class OverlayRenderer:
 
         使用 Pillow 绘制水平文字后旋转90°，再叠加到 OpenCV 帧上。
         模拟固件 fbdraw_text_rot90 的效果。
+        旋转后的文字块按 (文字, 字体, 字号, 颜色, 区域) 缓存，叠加只做一次向量化合成。
         """
         if not HAS_PIL or width <= 0 or height <= 0:
             return
 
-        # 旋转90°后: 原始水平文字的宽度对应旋转后的高度
-        # 所以先绘制水平文字，尺寸为 (height, width)
-        text_img = Image.new('RGBA', (height, width), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(text_img)
-
-        # 使用默认字体，按比例缩放
         font_size = max(8, int(font_scale))
-        try:
-            font = ImageFont.truetype("arial", font_size)
-        except (IOError, OSError):
-            font = ImageFont.load_default()
-
-        draw.text((2, 0), text, fill=(*color_rgb, 255), font=font)
-
-        # 顺时针旋转90° (PIL的rotate是逆时针，所以用270°或-90°)
-        rotated = text_img.rotate(-90, expand=True)
-
-        # 裁剪到目标尺寸
-        rotated = rotated.crop((0, 0, min(rotated.width, width), min(rotated.height, height)))
-
-        # 转为 numpy array 并叠加到帧上
-        rot_array = np.array(rotated)
-        if rot_array.shape[2] == 4:
-            alpha = rot_array[:, :, 3] / 255.0
-            # RGBA -> BGR for OpenCV
-            for c in range(3):
-                bgr_c = 2 - c  # RGB -> BGR
-                region = frame[y:y + rot_array.shape[0], x:x + rot_array.shape[1], bgr_c]
-                if region.shape == alpha.shape:
-                    frame[y:y + rot_array.shape[0], x:x + rot_array.shape[1], bgr_c] = (
-                        region * (1 - alpha) + rot_array[:, :, c] * alpha
-                    ).astype(np.uint8)
+        tile = self._get_text_tile(text, font_size, color_rgb, width, height)
+        tile_h, tile_w = tile.color.shape[:2]
+        region = frame[y:y + tile_h, x:x + tile_w]
+        # 超出帧范围时不绘制
+        if region.shape[:2] == (tile_h, tile_w):
+            tile.blend_into(region)
+
+    def _get_text_tile(
+        self,
+        text: str,
+        font_size: int,
+        color_rgb: Tuple[int, int, int],
+        width: int, height: int
+    ) -> OverlayLayer:
+        """取得旋转文字块（LRU 缓存）"""
+        font_path = _font_path()
+        key = (text, font_path, font_size, color_rgb, width, height)
+        tile = self._text_tiles.get(key)
+        if tile is not None:
+            self._text_tiles.move_to_end(key)
+            return tile
+
+        tile = _render_rotated_text(text, font_size, color_rgb, width, height)
+        self._text_tiles[key] = tile
+        while len(self._text_tiles) > MAX_TEXT_TILES:
+            self._text_tiles.popitem(last=False)
+        return tile
 
     def _draw_transparent_rect(
         self,
@@ -0,0 +1,299 @@
+"""
+预览解码器 - 播放时在后台线程中预先解码帧
+
+每个预览组件一个解码线程，用自己的 VideoCapture 从播放头开始顺序解码，
+旋转后放入有界的环形缓冲区；界面线程的定时器只按墙上时钟取出当前应显示的帧，不做解码。
+设置了显示尺寸时，解码线程同时把帧缩小到显示尺寸（INTER_AREA），界面线程不再缩放整帧。
+解码跟不上时按时钟丢帧：已经过时的帧直接跳过（跨过关键帧时跳到播放头之前最近的关键帧），
+播放速度不受解码速度影响，丢帧数记录在 PlaybackStats 中。
+"""
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from core.keyframe_index import KeyframeIndex
+
+logger = logging.getLogger(__name__)
+
+# 缓冲区上限：帧数和总字节数取较小者（4K BGR 帧约 24 MB）
+MAX_BUFFERED_FRAMES = 12
+MIN_BUFFERED_FRAMES = 2
+MAX_BUFFER_BYTES = 192 * 1024 * 1024
+
+
+def rotate_frame(frame: np.ndarray, degrees: int) -> np.ndarray:
+    """按顺时针角度 (0, 90, 180, 270) 旋转帧"""
+    if degrees == 90:
+        return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    if degrees == 180:
+        return cv2.rotate(frame, cv2.ROTATE_180)
+    if degrees == 270:
+        return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return frame
+
+
+def fit_size(width: int, height: int, box_width: int, box_height: int) -> Tuple[int, int]:
+    """保持宽高比放入 box 的最大尺寸"""
+    if width <= 0 or height <= 0:
+        return max(box_width, 1), max(box_height, 1)
+    scale = min(box_width / width, box_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def resize_to_fit(frame: np.ndarray, box: Tuple[int, int]) -> np.ndarray:
+    """
+    保持宽高比缩放到 box (宽, 高) 内，尺寸已经合适时原样返回，不复制
+
+    缩小时先用 INTER_AREA 逐次缩小一半（整数倍的区域平均有快速实现，
+    4K 直接按非整数倍做 INTER_AREA 要慢数倍），剩下不到 2 倍的部分用 INTER_LINEAR。
+    """
+    height, width = frame.shape[:2]
+    size = fit_size(width, height, *box)
+    if size == (width, height):
+        return frame
+    while frame.shape[1] >= 2 * size[0] and frame.shape[0] >= 2 * size[1]:
+        frame = cv2.resize(
+            frame, (frame.shape[1] // 2, frame.shape[0] // 2), interpolation=cv2.INTER_AREA
+        )
+    if frame.shape[1::-1] == size:
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+
+
+def seek_capture(
+    cap,
+    position: int,
+    index: int,
+    keyframe_index: Optional[KeyframeIndex]
+) -> int:
+    """
+    使 cap 下一次 read() 返回第 index 帧
+
+    目标在当前位置之后且中间没有关键帧时，逐帧 grab() 前进（不做颜色转换）；
+    否则跳到目标之前最近的关键帧再 grab() 到目标，解码量不超过一个 GOP。
+    没有索引时退回 CAP_PROP_POS_FRAMES 定位。
+
+    Args:
+        cap: cv2.VideoCapture
+        position: cap 下一次 read() 将返回的帧号（未知时为 -1）
+        index: 目标帧号
+        keyframe_index: 关键帧索引，None 表示尚未建立
+
+    Returns:
+        定位后 cap 下一次 read() 将返回的帧号
+    """
+    if index == position:
+        return position
+    if keyframe_index is None or index >= keyframe_index.frame_count:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        return index
+
+    keyframe = keyframe_index.keyframe_before(index)
+    if not (keyframe <= position < index):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        position = keyframe
+    while position < index and cap.grab():
+        position += 1
+    return position
+
+
+@dataclass
+class PlaybackStats:
+    """一次播放（start 到 stop）的统计"""
+    presented: int = 0  # 已显示的帧数
+    dropped: int = 0  # 时钟已走过但没有显示的帧数
+    decoded: int = 0  # 解码线程放入缓冲区的帧数
+
+
+class PreviewDecoder:
+    """单个视频的后台预解码器（线程安全）"""
+
+    def __init__(self, path: str, fps: float, total_frames: int, frame_bytes: int):
+        """
+        Args:
+            path: 视频路径
+            fps: 播放帧率
+            total_frames: 总帧数，播放到末尾后从第 0 帧循环
+            frame_bytes: 单帧字节数，用于确定缓冲区容量
+        """
+        self._path = path
+        self._fps = fps
+        self._total_frames = max(total_frames, 1)
+        self._capacity = max(
+            MIN_BUFFERED_FRAMES,
+            min(MAX_BUFFERED_FRAMES, MAX_BUFFER_BYTES // max(frame_bytes, 1))
+        )
+        # 关键帧索引在后台建立，完成后由预览组件赋值
+        self.keyframe_index: Optional[KeyframeIndex] = None
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # 缓冲区中的帧以不回绕的序号标识：帧号 = 序号 % 总帧数；
+        # 每项为 (序号, 旋转后的帧, 缩小到显示尺寸的帧或 None)
+        self._buffer: Deque[Tuple[int, np.ndarray, Optional[np.ndarray]]] = collections.deque()
+        self._generation = 0
+        self._playing = False
+        self._closed = False
+        self._rotation = 0
+        self._display_size: Optional[Tuple[int, int]] = None
+        self._next_seq = 0
+        self._last_presented = 0
+        self._clock_seq = 0
+        self._clock_start = 0.0
+        self._stats = PlaybackStats()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def stats(self) -> PlaybackStats:
+        with self._cond:
+            return replace(self._stats)
+
+    def start(self, frame_index: int, rotation: int = 0):
+        """
+        从 frame_index 之后开始播放（frame_index 本身视为已显示），时钟从此刻起算
+
+        播放中再次调用会丢弃已缓冲的帧，用于跳转或改变旋转角度。
+        """
+        with self._cond:
+            self._generation += 1
+            self._buffer.clear()
+            self._rotation = rotation
+            self._clock_seq = frame_index
+            self._clock_start = time.perf_counter()
+            self._last_presented = frame_index
+            self._next_seq = frame_index + 1
+            self._stats = PlaybackStats()
+            self._playing = True
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="preview-decoder", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def set_display_size(self, size: Optional[Tuple[int, int]]):
+        """
+        设置显示尺寸 (宽, 高)，之后解码的帧同时缩小到该尺寸内；None 表示不缩小
+
+        已缓冲的帧不重新缩放，尺寸不符时由调用方自行缩放。
+        """
+        with self._cond:
+            self._display_size = size
+
+    def stop(self):
+        """停止播放并清空缓冲区（解码线程保持空闲，下次播放不必重新打开视频）"""
+        with self._cond:
+            self._generation += 1
+            self._buffer.clear()
+            self._playing = False
+            self._cond.notify_all()
+
+    def close(self, wait: bool = False):
+        """
+        结束解码线程并释放视频
+
+        Args:
+            wait: 是否等待解码线程退出（进程退出前调用，避免线程仍在解码）
+        """
+        with self._cond:
+            self._closed = True
+            self._playing = False
+            self._buffer.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+    def take_due_frame(self) -> Optional[Tuple[int, np.ndarray, Optional[np.ndarray]]]:
+        """
+        取出按时钟此刻应显示的帧（界面线程调用，不阻塞）
+
+        Returns:
+            (帧号, 已旋转的帧, 缩小到显示尺寸的帧)；未设置显示尺寸时第三项为 None。
+            没有新的到期帧时返回 None，调用方保持当前画面
+        """
+        with self._cond:
+            if not self._playing:
+                return None
+            due = self._due_seq()
+            chosen = None
+            while self._buffer and self._buffer[0][0] <= due:
+                chosen = self._buffer.popleft()
+            if chosen is None:
+                return None
+            seq, frame, display = chosen
+            self._stats.dropped += seq - self._last_presented - 1
+            self._stats.presented += 1
+            self._last_presented = seq
+            self._cond.notify_all()
+        return seq % self._total_frames, frame, display
+
+    def _due_seq(self) -> int:
+        """当前应显示的帧序号（调用时须持有锁）"""
+        return self._clock_seq + int((time.perf_counter() - self._clock_start) * self._fps)
+
+    def _run(self):
+        """解码线程：在缓冲区未满时从 _next_seq 开始顺序解码"""
+        cap = cv2.VideoCapture(self._path)
+        if not cap.isOpened():
+            logger.error(f"预览解码器无法打开视频: {self._path}")
+            cap.release()
+            return
+        position = 0
+        try:
+            while True:
+                with self._cond:
+                    while not self._closed and (
+                        not self._playing or len(self._buffer) >= self._capacity
+                    ):
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    generation = self._generation
+                    rotation = self._rotation
+                    display_size = self._display_size
+                    # 已经过时的帧不再解码，直接追到当前应显示的帧
+                    seq = max(self._next_seq, self._due_seq())
+                    keyframe_index = self.keyframe_index
+
+                index = seq % self._total_frames
+                position = seek_capture(cap, position, index, keyframe_index)
+                ok, frame = cap.read() if position == index else (False, None)
+                if not ok:
+                    position = -1
+                    with self._cond:
+                        if generation != self._generation:
+                            continue
+                        if index == 0:
+                            logger.warning(f"预览解码器无法读取视频: {self._path}")
+                            self._playing = False
+                            continue
+                        # 实际帧数少于容器声明的帧数：提前回到开头
+                        self._next_seq = seq - index + self._total_frames
+                    continue
+                position = index + 1
+                frame = rotate_frame(frame, rotation)
+                display = resize_to_fit(frame, display_size) if display_size else None
+
+                with self._cond:
+                    if generation != self._generation:
+                        continue
+                    self._buffer.append((seq, frame, display))
+                    self._next_seq = seq + 1
+                    self._stats.decoded += 1
+        finally:
+            cap.release()
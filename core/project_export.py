@@ -0,0 +1,236 @@
+"""
+项目导出数据 - 从保存的项目配置收集导出所需的数据（不依赖 Qt）
+
+GUI 从编辑器控件读取裁剪框和出入点；命令行批量导出没有界面状态，
+只能从 epconfig.json 推导：循环视频取整段、居中裁剪出目标宽高比的最大区域，
+入场视频与 GUI 未加载入场预览时一致，取整段整帧。
+"""
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from config.constants import ARK_CLASS_ICON_SIZE, ARK_LOGO_SIZE, get_resolution_spec
+from config.epconfig import EPConfig, OverlayType, ScreenType
+from core.export_engine import VideoExportParams
+from core.image_processor import ImageProcessor
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE_NAME = "epconfig.json"
+
+
+def load_project(path: str) -> Tuple[str, EPConfig]:
+    """
+    加载项目
+
+    Args:
+        path: 项目目录或 epconfig.json 路径
+
+    Returns:
+        (项目目录, 配置)
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, CONFIG_FILE_NAME)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"找不到项目配置: {path}")
+    return os.path.dirname(os.path.abspath(path)), EPConfig.load_from_file(path)
+
+
+def resolve_project_file(base_dir: str, path: str) -> str:
+    """项目内的相对路径转为绝对路径"""
+    if not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    return path
+
+
+def output_dirs(output_dir: str, screens: List[ScreenType]) -> List[str]:
+    """素材实际写入的目录：多分辨率导出时为各分辨率子目录"""
+    if screens:
+        return [os.path.join(output_dir, screen.value) for screen in screens]
+    return [output_dir]
+
+
+def centered_cropbox(
+    width: int,
+    height: int,
+    resolution: str
+) -> Tuple[int, int, int, int]:
+    """源画面中居中、宽高比与目标分辨率一致的最大裁剪框 (x, y, w, h)"""
+    spec = get_resolution_spec(resolution)
+    aspect = spec["width"] / spec["height"]
+    crop_w, crop_h = width, int(round(width / aspect))
+    if crop_h > height:
+        crop_w, crop_h = int(round(height * aspect)), height
+    return (width - crop_w) // 2, (height - crop_h) // 2, crop_w, crop_h
+
+
+def probe_video(path: str) -> Tuple[float, int, int, int]:
+    """读取视频的 (帧率, 总帧数, 宽, 高)"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频: {path}")
+    try:
+        return (
+            cap.get(cv2.CAP_PROP_FPS) or 30.0,
+            int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+    finally:
+        cap.release()
+
+
+def collect_project_export_data(epconfig: EPConfig, base_dir: str) -> Dict[str, Any]:
+    """
+    收集导出所需的数据（键与 build_export_tasks 的参数一致）
+
+    Raises:
+        RuntimeError: 缺少 opencv-python 或源视频无法打开
+    """
+    if not HAS_CV2:
+        raise RuntimeError("未安装opencv-python，无法处理视频")
+
+    data: Dict[str, Any] = {}
+    resolution = epconfig.screen.value
+
+    # Logo/Icon
+    if epconfig.icon:
+        icon_path = resolve_project_file(base_dir, epconfig.icon)
+        if os.path.exists(icon_path):
+            logo_img = ImageProcessor.load_image(icon_path)
+            if logo_img is not None:
+                data['logo_mat'] = ImageProcessor.process_for_logo(logo_img)
+
+    # 循环素材
+    if epconfig.loop.file:
+        loop_path = resolve_project_file(base_dir, epconfig.loop.file)
+        if epconfig.loop.is_image:
+            data['loop_image_path'] = loop_path
+        else:
+            fps, total_frames, width, height = probe_video(loop_path)
+            data['loop_video_params'] = VideoExportParams(
+                video_path=loop_path,
+                cropbox=centered_cropbox(width, height, resolution),
+                start_frame=0,
+                end_frame=total_frames,
+                fps=fps,
+                resolution=resolution
+            )
+
+    # 入场视频
+    if epconfig.intro.enabled and epconfig.intro.file:
+        intro_path = resolve_project_file(base_dir, epconfig.intro.file)
+        if os.path.exists(intro_path):
+            fps, total_frames, width, height = probe_video(intro_path)
+            data['intro_video_params'] = VideoExportParams(
+                video_path=intro_path,
+                cropbox=(0, 0, width, height),
+                start_frame=0,
+                end_frame=total_frames,
+                fps=fps,
+                resolution=resolution
+            )
+
+    # ImageOverlay 图片（由导出引擎按各目标分辨率缩放）
+    if epconfig.overlay.type == OverlayType.IMAGE:
+        options = epconfig.overlay.image_options
+        if options and options.image:
+            img_path = resolve_project_file(base_dir, options.image)
+            if os.path.exists(img_path):
+                overlay_img = ImageProcessor.load_image(img_path)
+                if overlay_img is not None:
+                    data['overlay_mat'] = overlay_img
+
+    return data
+
+
+def _write_png(img, dst_path: str) -> bool:
+    success, encoded = cv2.imencode('.png', img)
+    if success:
+        with open(dst_path, 'wb') as f:
+            f.write(encoded.tobytes())
+    return success
+
+
+def export_arknights_custom_images(
+    epconfig: EPConfig,
+    base_dir: str,
+    target_dirs: List[str]
+):
+    """
+    处理arknights叠加的自定义图片
+
+    将自定义的logo和operator_class_icon缩放后写入各导出目录
+    """
+    if epconfig.overlay.type != OverlayType.ARKNIGHTS:
+        return
+
+    ark_opts = epconfig.overlay.arknights_options
+    if not ark_opts:
+        return
+
+    images = [
+        (ark_opts.operator_class_icon, ARK_CLASS_ICON_SIZE, "class_icon.png", "职业图标"),  # 50x50
+        (ark_opts.logo, ARK_LOGO_SIZE, "ark_logo.png", "Logo"),  # 75x35
+    ]
+    for src, size, dst_filename, label in images:
+        if not src:
+            continue
+        src_path = resolve_project_file(base_dir, src)
+        if not os.path.exists(src_path):
+            continue
+        img = ImageProcessor.load_image(src_path)
+        if img is None:
+            continue
+        # 缩放到目标尺寸
+        img = cv2.resize(img, size)
+        for target_dir in target_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            dst_path = os.path.join(target_dir, dst_filename)
+            if _write_png(img, dst_path):
+                logger.info(f"已导出{label}: {dst_path}")
+
+
+def export_image_overlay(
+    epconfig: EPConfig,
+    base_dir: str,
+    target_dirs: List[str]
+):
+    """处理 ImageOverlay 的图片导出（epconfig 中的路径导出时标准化为 overlay.png）"""
+    if epconfig.overlay.type != OverlayType.IMAGE:
+        return
+
+    options = epconfig.overlay.image_options
+    if not options or not options.image:
+        return
+
+    src_path = resolve_project_file(base_dir, options.image)
+    if not os.path.exists(src_path):
+        return
+    img = ImageProcessor.load_image(src_path)
+    if img is None:
+        return
+    for target_dir in target_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        dst_path = os.path.join(target_dir, "overlay.png")
+        if _write_png(img, dst_path):
+            logger.info(f"已导出叠加图片: {dst_path}")
+
+
+def prepare_export(
+    epconfig: EPConfig,
+    base_dir: str,
+    output_dir: str,
+    screens: Optional[List[ScreenType]] = None
+) -> Dict[str, Any]:
+    """收集导出数据并写出叠加层附带的图片，返回 build_export_tasks 的参数"""
+    target_dirs = output_dirs(output_dir, screens or [])
+    export_arknights_custom_images(epconfig, base_dir, target_dirs)
+    export_image_overlay(epconfig, base_dir, target_dirs)
+    return collect_project_export_data(epconfig, base_dir)
@@ -0,0 +1,207 @@
+"""
+代理媒体 - 为大尺寸/高帧率源视频生成低分辨率的全帧内编码副本供预览使用
+
+代理与源视频帧号一一对应（不改帧率、不丢帧），短边缩到 PROXY_SHORT_EDGE，
+每一帧都是关键帧，任意定位只需解码一帧。代理只用于预览显示：
+裁剪框始终使用源视频坐标，导出和截取帧始终读取源视频。
+代理文件按源文件标识保存在用户缓存目录下的 proxies 中，按总大小上限做LRU淘汰。
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from core.export_cache import source_identity
+from core.ffmpeg_runner import FFmpegRunner
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：代理的编码方式变化时递增，使旧代理全部失效
+PROXY_VERSION = 1
+
+PROXY_SHORT_EDGE = 720  # 代理短边（不小于导出的最大目标宽度）
+PROXY_CRF = 20
+PROXY_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024  # 4 GB
+
+# 需要代理的源：短边超过 1080，或短边超过代理尺寸且帧率高于 40
+PROXY_TRIGGER_SHORT_EDGE = 1080
+PROXY_TRIGGER_FPS = 40.0
+
+# 键 -> [锁, 使用中的线程数]
+_build_locks: Dict[str, List] = {}
+_locks_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def build_lock(key: str) -> Iterator[None]:
+    """
+    同一缓存键同时只允许一个线程生成
+
+    锁按引用计数保存，最后一个使用者离开后移除，不会随生成过的键无限增长。
+    """
+    with _locks_lock:
+        entry = _build_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _build_locks[key]
+
+
+def needs_proxy(width: int, height: int, fps: float) -> bool:
+    """源视频是否值得生成代理"""
+    short_edge = min(width, height)
+    if short_edge > PROXY_TRIGGER_SHORT_EDGE:
+        return True
+    return short_edge > PROXY_SHORT_EDGE and fps > PROXY_TRIGGER_FPS
+
+
+def proxy_ffmpeg_args(source_path: str, output_path: str) -> list:
+    """生成代理的 ffmpeg 参数：短边缩放、全帧内编码、保留原始时间戳"""
+    scale = (
+        f"scale=w='if(lt(iw,ih),{PROXY_SHORT_EDGE},-2)'"
+        f":h='if(lt(iw,ih),-2,{PROXY_SHORT_EDGE})':flags=area"
+    )
+    return [
+        "-y", "-i", source_path,
+        "-map", "0:v:0", "-an", "-sn", "-dn",
+        "-vf", scale, "-fps_mode", "passthrough",
+        "-c:v", "libx264", "-preset", "ultrafast", "-tune", "fastdecode",
+        "-g", "1", "-crf", str(PROXY_CRF), "-pix_fmt", "yuv420p",
+        "-f", "mp4", output_path
+    ]
+
+
+class ProxyCache:
+    """代理文件缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = PROXY_CACHE_MAX_BYTES):
+        self._cache_dir = cache_dir or get_cache_dir("proxies")
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(source_path: str) -> Optional[str]:
+        """缓存键；源文件不可访问时返回 None"""
+        try:
+            source = source_identity(source_path)
+        except OSError:
+            return None
+        payload = json.dumps(
+            {"version": PROXY_VERSION, "source": source,
+             "short_edge": PROXY_SHORT_EDGE, "crf": PROXY_CRF},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.mp4")
+
+    def lookup(self, key: Optional[str]) -> Optional[str]:
+        """已有代理时返回其路径并刷新最近使用时间"""
+        if key is None:
+            return None
+        path = self.entry_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def evict(self):
+        """超出大小上限时按最近使用时间从旧到新删除"""
+        entries = []
+        total = 0
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            logger.debug(f"代理缓存淘汰: {path}")
+
+
+def _frame_count(path: str) -> int:
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else -1
+    finally:
+        cap.release()
+
+
+def load_proxy(
+    source_path: str,
+    ffmpeg_path: str,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Optional[str]:
+    """
+    读取源视频的代理，不存在时生成（在后台线程中调用；同一文件只生成一次）
+
+    Returns:
+        代理文件路径；生成失败、被中止或代理与源视频帧数不一致时返回 None
+    """
+    cache = ProxyCache()
+    key = cache.make_key(source_path)
+    if key is None:
+        return None
+    with build_lock(key):
+        proxy_path = cache.lookup(key)
+        if proxy_path is not None:
+            return proxy_path
+
+        entry = cache.entry_path(key)
+        temp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+        runner = FFmpegRunner(ffmpeg_path, is_cancelled)
+        try:
+            runner.start(proxy_ffmpeg_args(source_path, temp_path))
+            runner.finish("生成代理")
+            expected = _frame_count(source_path)
+            actual = _frame_count(temp_path)
+            if actual != expected:
+                logger.warning(f"代理帧数与源视频不一致 ({actual} != {expected})，不使用代理")
+                return None
+            os.replace(temp_path, entry)
+        except InterruptedError:
+            logger.debug(f"已中止生成代理: {source_path}")
+            return None
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"生成代理失败: {e}")
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    logger.info(f"已生成代理: {os.path.basename(source_path)}")
+    cache.evict()
+    return entry
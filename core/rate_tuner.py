@@ -0,0 +1,332 @@
+"""
+码率自动调节 - 按设备存储预算或画质下限选择 2pass 编码的目标码率
+
+默认以固定的 3000k 码率编码：短循环视频白白占用设备空间，画面复杂的视频又可能画质不够。
+调节时在入点到出点之间均匀取几小段代表性片段，变换为导出画面后以几个 CRF 值并行试编码，
+与变换后的参考画面逐帧对比测出画质（PSNR 或 VMAF），得到 “画质 ~ ln(码率)” 曲线，
+再按目标文件大小或画质下限选出码率交给 2pass 最终编码（相同平均码率下 2pass 与 CRF 画质相当）。
+试编码结果按源文件和导出参数缓存在用户缓存目录下，重新导出时不再重复搜索。
+
+本模块包含数据结构、曲线拟合和选码率的规则（不依赖 Qt），试编码由 ExportEngine 完成。
+"""
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import subprocess
+import uuid
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.export_cache import source_identity
+from core.ffmpeg_runner import get_popen_kwargs
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：试编码方式变化导致测量结果不同时递增
+TUNER_VERSION = 1
+
+# 试编码的 CRF 取值（由高画质到低画质，覆盖常见的码率范围）
+DEFAULT_CRF_POINTS = (18, 23, 28, 33)
+# 代表性片段数和每段时长（秒）
+PROBE_SEGMENTS = 3
+PROBE_SEGMENT_SECONDS = 1.0
+
+# 选出的码率范围（kbps）
+MIN_BITRATE_KBPS = 100
+MAX_BITRATE_KBPS = 20000
+
+# 按大小预算换算码率时预留的余量：2pass 码控误差按比例，容器头和开头的关键帧按固定大小
+SIZE_MARGIN = 0.03
+CONTAINER_OVERHEAD_BYTES = 16 * 1024
+
+
+class QualityMetric(Enum):
+    """画质指标（值为 FFmpeg 滤镜名）"""
+    PSNR = "psnr"
+    VMAF = "libvmaf"
+
+
+# 超过该画质肉眼已难以分辨：只给定大小预算时，码率不超过达到该画质所需
+TRANSPARENT_QUALITY = {
+    QualityMetric.PSNR: 45.0,
+    QualityMetric.VMAF: 95.0,
+}
+
+
+@dataclass
+class RateTarget:
+    """自动码率目标（两项都为 0 时不调节，使用默认码率）"""
+    storage_budget_bytes: int = 0  # 整台设备的存储预算，按槽位均分后再分给各视频
+    quality_floor: float = 0.0  # 画质下限
+    metric: QualityMetric = QualityMetric.VMAF
+
+    @property
+    def enabled(self) -> bool:
+        return self.storage_budget_bytes > 0 or self.quality_floor > 0
+
+
+@dataclass
+class ProbePoint:
+    """一次试编码的结果"""
+    crf: int
+    bitrate: float  # 比特/秒
+    quality: float
+
+
+@dataclass
+class RateCurve:
+    """
+    画质 ~ ln(码率) 曲线：相邻试编码点之间线性插值，超出试编码范围时沿两端的线段外推
+
+    画质随码率的变化在高码率端趋于饱和，单条直线拟合误差较大，分段插值更贴合实测。
+    """
+    metric: QualityMetric
+    points: List[ProbePoint] = field(default_factory=list)  # 按码率从低到高
+
+    @classmethod
+    def fit(cls, metric: QualityMetric, points: List[ProbePoint]) -> "RateCurve":
+        if not points:
+            raise ValueError("没有试编码结果，无法拟合码率曲线")
+        ordered = sorted(points, key=lambda p: p.bitrate)
+        # 测量误差可能让画质随码率略有下降，取累计最大值保证曲线单调
+        quality = -math.inf
+        monotonic = []
+        for point in ordered:
+            quality = max(quality, point.quality)
+            monotonic.append(ProbePoint(point.crf, max(1.0, point.bitrate), quality))
+        return cls(metric, monotonic)
+
+    def _segment(self, index: int) -> Tuple[float, float, float]:
+        """第 index 段的 (起点 ln码率, 起点画质, 斜率)"""
+        a, b = self.points[index], self.points[index + 1]
+        x0, x1 = math.log(a.bitrate), math.log(b.bitrate)
+        slope = (b.quality - a.quality) / (x1 - x0) if x1 > x0 else 0.0
+        return x0, a.quality, slope
+
+    def quality_at(self, bitrate: float) -> float:
+        """预测码率 bitrate（比特/秒）下的画质"""
+        if len(self.points) < 2:
+            return self.points[0].quality
+        x = math.log(max(1.0, bitrate))
+        index = 0
+        while index < len(self.points) - 2 and x > math.log(self.points[index + 1].bitrate):
+            index += 1
+        x0, q0, slope = self._segment(index)
+        quality = q0 + slope * (x - x0)
+        return min(quality, 100.0) if self.metric == QualityMetric.VMAF else quality
+
+    def bitrate_for(self, quality: float) -> float:
+        """达到画质 quality 所需的码率（比特/秒）"""
+        if len(self.points) < 2:
+            return self.points[0].bitrate
+        index = 0
+        while index < len(self.points) - 2 and quality > self.points[index + 1].quality:
+            index += 1
+        x0, q0, slope = self._segment(index)
+        if slope <= 0:
+            # 画质不再随码率变化（如静止画面）：取这一段的起点
+            return self.points[index].bitrate if quality <= q0 else self.points[index + 1].bitrate
+        return math.exp(x0 + (quality - q0) / slope)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"metric": self.metric.value, "points": [asdict(p) for p in self.points]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RateCurve":
+        return cls.fit(QualityMetric(data["metric"]), [ProbePoint(**p) for p in data["points"]])
+
+
+@dataclass
+class RateDecision:
+    """选码率的结果"""
+    bitrate_kbps: int
+    predicted_quality: Optional[float] = None
+    reason: str = ""
+
+    @property
+    def ffmpeg_bitrate(self) -> str:
+        """FFmpeg -b:v 参数值"""
+        return f"{self.bitrate_kbps}k"
+
+
+def choose_bitrate(
+    curve: Optional[RateCurve],
+    duration: float,
+    default_kbps: int,
+    size_budget_bytes: int = 0,
+    quality_floor: float = 0.0,
+    pieces: int = 1
+) -> RateDecision:
+    """
+    按预算和画质下限选择码率
+
+    给定画质下限时取达到下限的最低码率（省空间），但不超过大小预算（预算优先）；
+    只给定大小预算时用满预算，但不超过画质达到 TRANSPARENT_QUALITY 所需的码率；
+    都未给定时使用默认码率。
+
+    Args:
+        curve: 码率曲线，None 时只能按预算换算
+        duration: 视频时长（秒）
+        default_kbps: 默认码率
+        size_budget_bytes: 该视频的大小预算，0 表示不限制
+        quality_floor: 画质下限，0 表示不限制
+        pieces: 独立编码后拼接的段数（每段各有一份关键帧和容器开销）
+    """
+    budget_rate = None
+    if size_budget_bytes > 0 and duration > 0:
+        payload = max(0, size_budget_bytes - CONTAINER_OVERHEAD_BYTES * max(1, pieces))
+        budget_rate = payload * 8 * (1 - SIZE_MARGIN) / duration
+
+    if quality_floor > 0 and curve is not None:
+        rate = curve.bitrate_for(quality_floor)
+        reason = f"达到画质下限 {curve.metric.name} {quality_floor:g}"
+        if budget_rate is not None and rate > budget_rate:
+            logger.warning(
+                f"存储预算不足以达到画质下限 {curve.metric.name} {quality_floor:g}，按预算编码"
+                f"（预计 {curve.metric.name} {curve.quality_at(budget_rate):.1f}）"
+            )
+            rate, reason = budget_rate, "存储预算（不足以达到画质下限）"
+    elif budget_rate is not None:
+        rate, reason = budget_rate, "存储预算"
+        if curve is not None:
+            ceiling = curve.bitrate_for(TRANSPARENT_QUALITY[curve.metric])
+            if ceiling < rate:
+                rate, reason = ceiling, "存储预算（画质已足够，不再多占空间）"
+    else:
+        rate, reason = default_kbps * 1000.0, "默认码率"
+
+    kbps = int(round(rate / 1000))
+    if kbps < MIN_BITRATE_KBPS:
+        if rate == budget_rate:
+            logger.warning(f"存储预算过小（折合 {kbps} kbps），使用最低码率 {MIN_BITRATE_KBPS} kbps")
+        elif curve is not None:
+            # 码率来自画质曲线：目标画质低于试编码范围，外推结果不可靠，与预算无关
+            logger.info(
+                f"按{reason}外推出的码率（{kbps} kbps）低于试编码范围"
+                f"（最低 {curve.points[0].bitrate / 1000:.0f} kbps），使用最低码率 {MIN_BITRATE_KBPS} kbps"
+            )
+    kbps = max(MIN_BITRATE_KBPS, min(MAX_BITRATE_KBPS, kbps))
+    quality = curve.quality_at(kbps * 1000.0) if curve is not None else None
+    return RateDecision(kbps, quality, reason)
+
+
+def probe_ranges(
+    start_frame: int,
+    end_frame: int,
+    fps: float,
+    count: int = PROBE_SEGMENTS,
+    seconds: float = PROBE_SEGMENT_SECONDS
+) -> List[Tuple[int, int]]:
+    """在 [start_frame, end_frame) 中均匀分布、互不重叠的试编码片段（左闭右开）"""
+    span = max(1, int(round(seconds * fps)))
+    total = end_frame - start_frame
+    if count <= 1 or total <= span * count:
+        # 视频很短：整段都用来试编码
+        return [(start_frame, end_frame)]
+    step = (total - span) / (count - 1)
+    return [
+        (start_frame + int(step * i), start_frame + int(step * i) + span) for i in range(count)
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def vmaf_available(ffmpeg_path: str) -> bool:
+    """FFmpeg 是否带有 libvmaf 滤镜"""
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-filters"],
+            capture_output=True, text=True, **get_popen_kwargs()
+        )
+    except OSError:
+        return False
+    return re.search(r"\blibvmaf\b", result.stdout) is not None
+
+
+def quality_filter(metric: QualityMetric, width: int, height: int, threads: int = 1) -> str:
+    """
+    对比滤镜图：输入 0 为试编码结果，输入 1 为参考画面
+
+    只比较画面区域（左上角 width x height），补边的黑边不参与计算。
+    """
+    crop = f"crop={width}:{height}:0:0"
+    compare = metric.value
+    if metric == QualityMetric.VMAF:
+        compare += f"=n_threads={max(1, threads)}"
+    return f"[0:v]{crop}[dist];[1:v]{crop}[ref];[dist][ref]{compare}"
+
+
+_QUALITY_PATTERNS = {
+    QualityMetric.PSNR: re.compile(r"PSNR .*average:(inf|[\d.]+)"),
+    QualityMetric.VMAF: re.compile(r"VMAF score: ([\d.]+)"),
+}
+
+
+def parse_quality(metric: QualityMetric, stderr: str) -> Optional[float]:
+    """从对比滤镜的日志中读出平均画质"""
+    match = _QUALITY_PATTERNS[metric].search(stderr)
+    if match is None:
+        return None
+    # 与参考完全相同时 PSNR 为 inf
+    return 100.0 if match.group(1) == "inf" else float(match.group(1))
+
+
+class RateProbeCache:
+    """试编码结果缓存：每个键一个 JSON 文件（体积很小，不做淘汰）"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._cache_dir = cache_dir or get_cache_dir("rate_tuner")
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(source_path: str, params: Any, settings: Dict[str, Any]) -> Optional[str]:
+        """
+        缓存键：源文件标识 + 导出参数 + 试编码设置
+
+        Returns:
+            十六进制键；源文件不可访问时返回 None（不使用缓存）
+        """
+        try:
+            source = source_identity(source_path)
+        except OSError:
+            return None
+        payload = json.dumps(
+            {"version": TUNER_VERSION, "source": source, "params": params, "settings": settings},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.json")
+
+    def load(self, key: Optional[str]) -> Optional[RateCurve]:
+        if key is None or not os.path.isfile(self._entry_path(key)):
+            return None
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                return RateCurve.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"读取码率试编码缓存失败: {e}")
+            return None
+
+    def store(self, key: Optional[str], curve: RateCurve):
+        if key is None:
+            return
+        path = self._entry_path(key)
+        # 同一键可能被并发的试编码同时写入，临时文件名各不相同
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(curve.to_dict(), f, indent=2)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"写入码率试编码缓存失败: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
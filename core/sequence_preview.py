@@ -0,0 +1,603 @@
+"""
+完整播放序列预览 - 不依赖 Rust 模拟器，按固件的播放流程离线渲染 入场过渡 → 入场 → 循环过渡 → 循环
+
+播放流程与模拟器 SimulatorApp 的状态机一致，按 50 fps 的渲染时钟逐帧推进：
+  - 有入场视频时先做进入过渡（显示循环视频首帧），过渡进入保持阶段时切到入场视频；
+  - 入场视频按自身帧率推进，播放完后做循环过渡（保持阶段之前显示入场视频末帧，之后显示循环视频）；
+  - 循环过渡结束后等待 appear_time，之后叠加UI出现，循环视频继续播放。
+plan_sequence 只计算每个渲染帧的状态和源帧号，不解码；SequenceRenderer 按计划解码、
+裁剪缩放（与导出相同的 FrameTransformPlan）后分块产生 (N, H, W, 3) 帧，过渡效果和叠加UI
+都对整块向量化合成。结果编码为 50 fps 的预览 MP4，按配置和源文件标识缓存在用户缓存目录下的
+sequence_previews 中，按总大小上限做LRU淘汰；应用内播放可直接迭代 SequenceRenderer.iter_chunks()。
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from config.constants import get_resolution_spec, microseconds_to_frames
+from config.epconfig import EPConfig, OverlayType, TransitionType
+from core.export_cache import source_identity
+from core.export_engine import VideoExportParams
+from core.ffmpeg_runner import FFmpegRunner, rawvideo_input_args
+from core.frame_transform import FrameTransformPlan
+from core.image_processor import ImageProcessor
+from core.overlay_renderer import OverlayLayer, OverlayRenderer
+from core.proxy_media import ProxyCache, build_lock
+from core.transition_renderer import (
+    TRANSITION_FPS, TransitionRenderer, hold_start_frame, transition_frame_count
+)
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：渲染流程或编码方式变化时递增，使旧预览全部失效
+SEQUENCE_PREVIEW_VERSION = 1
+
+SEQUENCE_FPS = TRANSITION_FPS
+TICK_US = 1_000_000 // SEQUENCE_FPS  # 每个渲染帧 20000 微秒
+
+# 每块渲染的帧数：过渡和叠加UI按块整体合成
+CHUNK_FRAMES = 25
+# 未指定循环段时长时至少渲染的秒数（循环素材很短或是图片时）
+MIN_LOOP_SECONDS = 2.0
+# 没有 appear_time 可用时的默认值（微秒，与模拟器一致）
+DEFAULT_APPEAR_TIME = 100000
+
+# 图片模式的循环素材：导出为 1 秒 30 帧
+IMAGE_LOOP_FPS = 30.0
+
+PREVIEW_CRF = 23
+SEQUENCE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+class SequenceStage(Enum):
+    """播放阶段（对应模拟器的 PlayState）"""
+    TRANSITION_IN = "transition_in"
+    INTRO = "intro"
+    TRANSITION_LOOP = "transition_loop"
+    PRE_OPINFO = "pre_opinfo"  # 循环过渡结束、叠加UI出现之前
+    LOOP = "loop"
+
+
+# 渲染帧的画面来源
+SOURCE_BLACK = ""
+SOURCE_INTRO = "intro"
+SOURCE_LOOP = "loop"
+
+
+@dataclass
+class SequenceTick:
+    """一个渲染帧的状态"""
+    stage: SequenceStage
+    source: str  # SOURCE_INTRO / SOURCE_LOOP / SOURCE_BLACK
+    frame_index: int  # 源素材内的帧号（相对于导出范围的起点）
+    transition_frame: int = 0  # 过渡阶段的过渡帧号
+
+
+@dataclass
+class SequencePlan:
+    """整段预览的渲染计划"""
+    ticks: List[SequenceTick]
+    transition_in: Optional[TransitionType]  # 进入过渡的效果，没有入场视频时为 None
+    transition_loop: TransitionType
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    @property
+    def duration(self) -> float:
+        """预览时长（秒）"""
+        return len(self.ticks) / SEQUENCE_FPS
+
+
+def appear_time_of(config: EPConfig) -> int:
+    """叠加UI出现时间（微秒）"""
+    overlay = config.overlay
+    if overlay.type == OverlayType.ARKNIGHTS and overlay.arknights_options:
+        return overlay.arknights_options.appear_time
+    if overlay.type == OverlayType.IMAGE and overlay.image_options:
+        return overlay.image_options.appear_time
+    return DEFAULT_APPEAR_TIME
+
+
+def _transition_duration(transition) -> int:
+    return transition.options.duration if transition.options else 500000
+
+
+def plan_sequence(
+    config: EPConfig,
+    loop_frames: int,
+    loop_fps: float,
+    intro_frames: int = 0,
+    intro_fps: float = 0.0,
+    loop_seconds: Optional[float] = None,
+    first_transition_swipe: bool = False
+) -> SequencePlan:
+    """
+    按模拟器的状态机计算每个渲染帧显示什么
+
+    Args:
+        config: 素材配置
+        loop_frames: 循环素材帧数
+        loop_fps: 循环素材帧率
+        intro_frames: 入场视频帧数，0 表示没有入场视频
+        intro_fps: 入场视频帧率
+        loop_seconds: 叠加UI出现后渲染多少秒；None 表示播放一遍循环素材（至少 MIN_LOOP_SECONDS）
+        first_transition_swipe: 第一个过渡固定为 SWIPE（固件开机后首次播放的行为），
+            否则使用配置的过渡效果
+
+    Returns:
+        渲染计划
+    """
+    loop_frames = max(1, loop_frames)
+    loop_frame_us = int(1_000_000 / loop_fps) if loop_fps > 0 else TICK_US
+    intro_frame_us = int(1_000_000 / intro_fps) if intro_fps > 0 else TICK_US
+    has_intro = intro_frames > 0
+    if loop_seconds is None:
+        loop_seconds = max(loop_frames * loop_frame_us / 1_000_000, MIN_LOOP_SECONDS)
+    loop_ticks = max(1, math.ceil(loop_seconds * SEQUENCE_FPS))
+    appear_frames = microseconds_to_frames(appear_time_of(config), SEQUENCE_FPS)
+
+    transition_loop = config.transition_loop.type
+    if has_intro:
+        transition_in = TransitionType.SWIPE if first_transition_swipe else config.transition_in.type
+        stage = SequenceStage.TRANSITION_IN
+        total = transition_frame_count(_transition_duration(config.transition_in))
+    else:
+        transition_in = None
+        if first_transition_swipe:
+            transition_loop = TransitionType.SWIPE
+        stage = SequenceStage.TRANSITION_LOOP
+        total = transition_frame_count(_transition_duration(config.transition_loop))
+        switch = hold_start_frame(total)
+
+    ticks: List[SequenceTick] = []
+    transition_frame = 0
+    switched = False
+    accumulator = 0
+    pre_opinfo = 0
+    loop_index, loop_next = 0, 1  # 模拟器加载后先读出循环素材首帧
+    intro_index, intro_next = -1, 0
+
+    def advance_loop():
+        nonlocal accumulator, loop_index, loop_next
+        accumulator += TICK_US
+        if accumulator >= loop_frame_us:
+            accumulator -= loop_frame_us
+            loop_index = loop_next
+            loop_next = (loop_next + 1) % loop_frames
+
+    while True:
+        # 先推进状态，再按新状态渲染（与模拟器每帧的 update / render 顺序一致）
+        if stage == SequenceStage.TRANSITION_IN:
+            transition_frame += 1
+            if transition_frame >= total:
+                stage = SequenceStage.INTRO
+                accumulator = 0
+        elif stage == SequenceStage.INTRO:
+            accumulator += TICK_US
+            if accumulator >= intro_frame_us:
+                accumulator -= intro_frame_us
+                if intro_next < intro_frames:
+                    intro_index, intro_next = intro_next, intro_next + 1
+                else:
+                    # 入场视频播放完，进入循环过渡（本帧即为过渡第 0 帧）
+                    stage = SequenceStage.TRANSITION_LOOP
+                    transition_frame = 0
+                    switched = False
+                    total = transition_frame_count(_transition_duration(config.transition_loop))
+                    switch = hold_start_frame(total)
+        elif stage == SequenceStage.TRANSITION_LOOP:
+            transition_frame += 1
+            if transition_frame >= switch and not switched:
+                switched = True
+                loop_next = 0
+            if transition_frame >= total:
+                stage = SequenceStage.PRE_OPINFO
+                pre_opinfo = 0
+                accumulator = 0
+                loop_next = 0
+        elif stage == SequenceStage.PRE_OPINFO:
+            pre_opinfo += 1
+            advance_loop()
+            if pre_opinfo >= appear_frames:
+                stage = SequenceStage.LOOP
+        else:
+            advance_loop()
+
+        if stage == SequenceStage.TRANSITION_IN:
+            ticks.append(SequenceTick(stage, SOURCE_LOOP, loop_index, transition_frame))
+        elif stage == SequenceStage.TRANSITION_LOOP and not switched:
+            source = SOURCE_INTRO if intro_index >= 0 else SOURCE_BLACK
+            ticks.append(SequenceTick(stage, source, intro_index, transition_frame))
+        elif stage == SequenceStage.TRANSITION_LOOP:
+            ticks.append(SequenceTick(stage, SOURCE_LOOP, loop_index, transition_frame))
+        elif stage == SequenceStage.INTRO:
+            source = SOURCE_INTRO if intro_index >= 0 else SOURCE_BLACK
+            ticks.append(SequenceTick(stage, source, intro_index))
+        else:
+            ticks.append(SequenceTick(stage, SOURCE_LOOP, loop_index))
+            if stage == SequenceStage.LOOP:
+                loop_ticks -= 1
+                if loop_ticks <= 0:
+                    break
+
+    return SequencePlan(ticks, transition_in, transition_loop)
+
+
+def _resolve_path(path: str, base_dir: str) -> str:
+    if path and not os.path.isabs(path) and base_dir:
+        return os.path.join(base_dir, path)
+    return path
+
+
+def _load_bgr_image(path: str) -> Optional[np.ndarray]:
+    """读取过渡图片为 BGR，读取失败时返回 None"""
+    image = ImageProcessor.load_image(path) if path else None
+    if image is None:
+        return None
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return image
+
+
+def source_length(params: VideoExportParams) -> Tuple[int, float]:
+    """素材的 (帧数, 帧率)；图片模式与导出一致视为 1 秒的视频"""
+    if params.is_image:
+        return int(IMAGE_LOOP_FPS), IMAGE_LOOP_FPS
+    return max(1, params.end_frame - params.start_frame), params.fps
+
+
+class _FrameSource:
+    """按帧号读取一段素材并变换到预览尺寸；计划中帧号基本递增，只保留当前帧"""
+
+    def __init__(self, params: VideoExportParams, spec: dict):
+        self._params = params
+        self._index = -1
+        self._frame: Optional[np.ndarray] = None
+        self._cap = None
+        self._position = -1  # cap 下一次 read() 返回的帧号（相对于 start_frame）
+        self._plan: Optional[FrameTransformPlan] = None
+        if params.is_image:
+            image = _load_bgr_image(params.video_path)
+            if image is None:
+                raise RuntimeError(f"无法打开图片: {params.video_path}")
+            # 与导出一致：图片整体缩放到目标分辨率，不裁剪
+            self._frame = cv2.resize(image, (spec["width"], spec["height"]))
+            return
+        self._cap = cv2.VideoCapture(params.video_path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"无法打开视频: {params.video_path}")
+        source_size = (
+            int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        )
+        self._plan = FrameTransformPlan(source_size, params.rotation, params.cropbox, spec)
+
+    def frame(self, index: int) -> Optional[np.ndarray]:
+        """第 index 帧；读取失败时保持上一帧（与模拟器一致），从未读到过时返回 None"""
+        if self._cap is None or index == self._index:
+            return self._frame
+        if index != self._position:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, self._params.start_frame + index)
+        ok, raw = self._cap.read()
+        if not ok:
+            self._position = -1
+            return self._frame
+        self._position = index + 1
+        frame = self._plan(raw)
+        if self._frame is not None:
+            self._plan.release(self._frame)
+        self._frame, self._index = frame, index
+        return frame
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class SequenceRenderer:
+    """完整播放序列的离线渲染器"""
+
+    def __init__(
+        self,
+        config: EPConfig,
+        loop: VideoExportParams,
+        intro: Optional[VideoExportParams] = None,
+        base_dir: str = "",
+        loop_seconds: Optional[float] = None,
+        first_transition_swipe: bool = False
+    ):
+        """
+        Args:
+            config: 素材配置（分辨率、过渡、叠加UI）
+            loop: 循环素材（路径、原始坐标系的裁剪框、旋转、入出点、帧率），与导出参数相同
+            intro: 入场视频，None 表示没有
+            base_dir: 项目目录，用于解析配置中的相对路径（过渡图片、叠加图片）
+            loop_seconds: 叠加UI出现后渲染的秒数，见 plan_sequence
+            first_transition_swipe: 第一个过渡固定为 SWIPE，见 plan_sequence
+        """
+        spec = get_resolution_spec(config.screen.value)
+        self.width, self.height = spec["width"], spec["height"]
+        # 预览显示设备上看到的画面，不补对齐黑边
+        self._spec = dict(spec, padding_side=None)
+        self._config = config
+        self._loop = loop
+        self._intro = intro
+        self._base_dir = base_dir
+
+        loop_frames, loop_fps = source_length(loop)
+        intro_frames, intro_fps = source_length(intro) if intro is not None else (0, 0.0)
+        self.plan = plan_sequence(
+            config, loop_frames, loop_fps, intro_frames, intro_fps,
+            loop_seconds, first_transition_swipe
+        )
+        self._stages = np.array([tick.stage.value for tick in self.plan.ticks])
+        self._transition_frames = np.array([tick.transition_frame for tick in self.plan.ticks])
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.plan)
+
+    def _transition_renderers(self) -> Dict[str, TransitionRenderer]:
+        renderers = {}
+        for stage, transition, transition_type in (
+            (SequenceStage.TRANSITION_IN, self._config.transition_in, self.plan.transition_in),
+            (SequenceStage.TRANSITION_LOOP, self._config.transition_loop, self.plan.transition_loop),
+        ):
+            if transition_type is None or transition_type == TransitionType.NONE:
+                continue
+            image = None
+            if transition.options and transition.options.image:
+                image = _load_bgr_image(_resolve_path(transition.options.image, self._base_dir))
+            renderers[stage.value] = TransitionRenderer(
+                transition_type, transition.options, self.width, self.height, image
+            )
+        return renderers
+
+    def _image_overlay_span(self) -> Optional[Tuple[OverlayLayer, int, int]]:
+        """图片叠加的 (图层, 起始帧, 结束帧)：从进入 LOOP 阶段起显示；没有图片叠加时为 None"""
+        loop_ticks = np.flatnonzero(self._stages == SequenceStage.LOOP.value)
+        overlay = self._config.overlay
+        if not len(loop_ticks) or overlay.type != OverlayType.IMAGE or not (
+                overlay.image_options and overlay.image_options.image):
+            return None
+        image = ImageProcessor.load_image(_resolve_path(overlay.image_options.image, self._base_dir))
+        if image is None:
+            return None
+        start, end = int(loop_ticks[0]), len(self.plan)
+        if overlay.image_options.duration > 0:
+            end = min(end, start + microseconds_to_frames(overlay.image_options.duration, SEQUENCE_FPS))
+        return OverlayLayer.from_image(image, self.width, self.height), start, end
+
+    def iter_chunks(self, chunk_frames: int = CHUNK_FRAMES) -> Iterator[np.ndarray]:
+        """
+        按顺序产生 (n, H, W, 3) 的 BGR 帧块（50 fps），可直接写入编码器或交给播放器显示
+
+        Raises:
+            RuntimeError: 素材无法打开
+        """
+        chunks = self._iter_frames(chunk_frames)
+        overlay = self._config.overlay
+        if overlay.type == OverlayType.ARKNIGHTS and overlay.arknights_options:
+            opinfo = np.flatnonzero(self._stages == SequenceStage.PRE_OPINFO.value)
+            if len(opinfo):
+                # appear_time 从循环过渡结束（PRE_OPINFO 的第一帧）起计时，与模拟器一致；
+                # 以该帧为 0 号帧交给批量合成，显示时刻与 plan_sequence 的 LOOP 阶段相同
+                chunks = OverlayRenderer().composite_arknights_chunks(
+                    chunks, overlay.arknights_options, SEQUENCE_FPS, start_index=-int(opinfo[0])
+                )
+        return chunks
+
+    def _iter_frames(self, chunk_frames: int) -> Iterator[np.ndarray]:
+        """解码各阶段的画面并应用过渡；图片叠加也在这里按 LOOP 阶段的帧范围合成"""
+        spec = self._spec
+        sources: Dict[str, _FrameSource] = {}
+        try:
+            sources[SOURCE_LOOP] = _FrameSource(self._loop, spec)
+            if self._intro is not None:
+                sources[SOURCE_INTRO] = _FrameSource(self._intro, spec)
+            transitions = self._transition_renderers()
+            overlay = self._image_overlay_span()
+
+            for chunk_start in range(0, len(self.plan), chunk_frames):
+                chunk_end = min(chunk_start + chunk_frames, len(self.plan))
+                frames = np.empty((chunk_end - chunk_start, self.height, self.width, 3), dtype=np.uint8)
+                for i, tick in enumerate(self.plan.ticks[chunk_start:chunk_end]):
+                    frame = sources[tick.source].frame(tick.frame_index) if tick.source else None
+                    if frame is None:
+                        frames[i] = 0
+                    else:
+                        frames[i] = frame
+
+                # 同一阶段的帧在计划中是连续的，块内按阶段切片整体合成
+                stages = self._stages[chunk_start:chunk_end]
+                for stage, renderer in transitions.items():
+                    rows = np.flatnonzero(stages == stage)
+                    if len(rows):
+                        lo, hi = rows[0], rows[-1] + 1
+                        renderer.apply(
+                            frames[lo:hi],
+                            self._transition_frames[chunk_start + lo:chunk_start + hi]
+                        )
+                if overlay is not None:
+                    layer, start, end = overlay
+                    lo, hi = max(start - chunk_start, 0), min(end - chunk_start, len(frames))
+                    if lo < hi:
+                        layer.blend_frames(frames[lo:hi])
+                yield frames
+        finally:
+            for source in sources.values():
+                source.close()
+
+
+def sequence_preview_args(width: int, height: int, output_path: str) -> list:
+    """预览编码的 ffmpeg 参数：从 stdin 读取 BGR 帧，快速编码为 50 fps 的 H.264"""
+    return rawvideo_input_args(width, height, SEQUENCE_FPS) + [
+        "-an", "-c:v", "libx264", "-preset", "ultrafast", "-crf", str(PREVIEW_CRF),
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart", "-f", "mp4", output_path
+    ]
+
+
+def encode_sequence_preview(
+    renderer: SequenceRenderer,
+    output_path: str,
+    ffmpeg_path: str,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> float:
+    """
+    渲染并编码到 output_path
+
+    Returns:
+        渲染加编码的耗时（秒）
+
+    Raises:
+        InterruptedError: 已取消
+        RuntimeError: 素材无法打开或 FFmpeg 失败
+    """
+    start = time.perf_counter()
+    runner = FFmpegRunner(ffmpeg_path, is_cancelled)
+    runner.start(sequence_preview_args(renderer.width, renderer.height, output_path), stdin=True)
+    try:
+        for frames in renderer.iter_chunks():
+            runner.write_frame(frames)
+    except BaseException:
+        runner.kill()
+        raise
+    runner.finish("生成序列预览")
+    return time.perf_counter() - start
+
+
+class SequencePreviewCache(ProxyCache):
+    """序列预览文件缓存（与代理缓存相同的存放和LRU淘汰方式）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = SEQUENCE_CACHE_MAX_BYTES):
+        super().__init__(cache_dir or get_cache_dir("sequence_previews"), max_bytes)
+
+    @staticmethod
+    def make_key(
+        config: EPConfig,
+        loop: VideoExportParams,
+        intro: Optional[VideoExportParams] = None,
+        base_dir: str = "",
+        loop_seconds: Optional[float] = None,
+        first_transition_swipe: bool = False
+    ) -> Optional[str]:
+        """
+        缓存键：影响画面的配置项、各素材的文件标识和裁剪参数；素材不可访问时返回 None
+
+        名称、描述、图标、uuid 不影响画面，不计入。
+        """
+        fields = {
+            key: value for key, value in config.to_dict().items()
+            if key in ("screen", "loop", "intro", "transition_in", "transition_loop", "overlay")
+        }
+        try:
+            files = {
+                path: source_identity(path)
+                for path in _referenced_files(config, loop, intro, base_dir)
+            }
+        except OSError:
+            return None
+        payload = json.dumps(
+            {"version": SEQUENCE_PREVIEW_VERSION, "config": fields, "files": files,
+             "loop": dataclasses.asdict(loop),
+             "intro": dataclasses.asdict(intro) if intro is not None else None,
+             "loop_seconds": loop_seconds, "first_transition_swipe": first_transition_swipe,
+             "crf": PREVIEW_CRF},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _referenced_files(
+    config: EPConfig,
+    loop: VideoExportParams,
+    intro: Optional[VideoExportParams],
+    base_dir: str
+) -> List[str]:
+    """预览画面用到的所有文件"""
+    files = [loop.video_path]
+    if intro is not None:
+        files.append(intro.video_path)
+    for transition in (config.transition_in, config.transition_loop):
+        if transition.options and transition.options.image:
+            files.append(_resolve_path(transition.options.image, base_dir))
+    image_options = config.overlay.image_options
+    if config.overlay.type == OverlayType.IMAGE and image_options and image_options.image:
+        files.append(_resolve_path(image_options.image, base_dir))
+    return files
+
+
+def load_sequence_preview(
+    config: EPConfig,
+    loop: VideoExportParams,
+    ffmpeg_path: str,
+    intro: Optional[VideoExportParams] = None,
+    base_dir: str = "",
+    loop_seconds: Optional[float] = None,
+    first_transition_swipe: bool = False,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Optional[str]:
+    """
+    读取配置对应的序列预览，不存在时渲染（在后台线程中调用；同一配置只渲染一次）
+
+    Returns:
+        预览 MP4 路径；渲染失败或被中止时返回 None
+    """
+    cache = SequencePreviewCache()
+    key = cache.make_key(config, loop, intro, base_dir, loop_seconds, first_transition_swipe)
+    if key is None:
+        logger.warning("序列预览的素材文件不可访问")
+        return None
+    with build_lock(key):
+        preview_path = cache.lookup(key)
+        if preview_path is not None:
+            return preview_path
+
+        entry = cache.entry_path(key)
+        temp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+        try:
+            renderer = SequenceRenderer(
+                config, loop, intro, base_dir, loop_seconds, first_transition_swipe
+            )
+            elapsed = encode_sequence_preview(renderer, temp_path, ffmpeg_path, is_cancelled)
+            os.replace(temp_path, entry)
+        except InterruptedError:
+            logger.debug("已中止生成序列预览")
+            return None
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"生成序列预览失败: {e}")
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    logger.info(
+        f"已生成序列预览: {renderer.plan.duration:.1f} 秒，耗时 {elapsed:.1f} 秒"
+        f"（{renderer.plan.duration / max(elapsed, 1e-6):.1f}x 实时）"
+    )
+    cache.evict()
+    return entry
@@ -0,0 +1,209 @@
+"""
+时间轴缩略图 - 在后台为源视频生成一组小尺寸缩略图
+
+取样位置为等间隔的 N 个位置；有关键帧索引时吸附到各位置之前最近的关键帧，
+每张缩略图只需解码一个关键帧，不必解码整个 GOP。
+结果按源文件标识（路径、大小、修改时间）和取样参数保存在用户缓存目录下的 thumbnails 中，
+再次打开同一视频时直接读取。
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from core.export_cache import source_identity
+from core.keyframe_index import KeyframeIndex
+from core.preview_decoder import seek_capture
+from utils.file_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：取样或缩放方式变化时递增，使旧缓存全部失效
+THUMBNAIL_VERSION = 1
+
+DEFAULT_THUMBNAIL_COUNT = 48
+# 缩略图高度（像素）：悬停预览直接使用，时间轴轨道上的小图由它再缩小
+DEFAULT_THUMBNAIL_HEIGHT = 90
+
+
+@dataclass
+class ThumbnailStrip:
+    """一个源视频的缩略图序列"""
+    frame_indices: List[int]  # 每张缩略图对应的帧号，升序
+    images: np.ndarray  # (N, H, W, 3) BGR
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    @property
+    def aspect_ratio(self) -> float:
+        """缩略图宽高比"""
+        return self.images.shape[2] / self.images.shape[1]
+
+    def nearest(self, frame: int) -> int:
+        """不晚于 frame 的最后一张缩略图的序号（frame 早于第一张时为 0）"""
+        return max(0, bisect.bisect_right(self.frame_indices, frame) - 1)
+
+
+def sample_positions(
+    total_frames: int,
+    count: int = DEFAULT_THUMBNAIL_COUNT,
+    keyframe_index: Optional[KeyframeIndex] = None
+) -> List[int]:
+    """
+    缩略图的取样帧号
+
+    等间隔取 count 个位置（各区间的中点）；有关键帧索引时吸附到之前最近的关键帧并去重，
+    去重后不足一半时不吸附。
+    """
+    if total_frames <= 0:
+        return []
+    count = min(count, total_frames)
+    positions = [int((i + 0.5) * total_frames / count) for i in range(count)]
+    if keyframe_index is not None:
+        snapped = sorted({
+            keyframe_index.keyframe_before(min(p, keyframe_index.frame_count - 1))
+            for p in positions
+        })
+        # 关键帧过稀（长 GOP 的短视频）时保留等间隔位置，宁可多解码也不让缩略图太少
+        if len(snapped) * 2 >= len(positions):
+            return snapped
+    return positions
+
+
+def _thumbnail_size(width: int, height: int, thumb_height: int):
+    thumb_w = max(2, round(width * thumb_height / max(height, 1)))
+    return thumb_w, thumb_height
+
+
+def generate_thumbnail_strip(
+    video_path: str,
+    positions: List[int],
+    thumb_height: int = DEFAULT_THUMBNAIL_HEIGHT,
+    keyframe_index: Optional[KeyframeIndex] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Optional[ThumbnailStrip]:
+    """
+    解码各取样位置的帧并缩小
+
+    Args:
+        video_path: 视频路径
+        positions: 取样帧号（升序）
+        thumb_height: 缩略图高度
+        keyframe_index: 关键帧索引，用于定位（同一 GOP 内的后续位置顺序 grab 过去）
+        is_cancelled: 返回 True 时中止生成
+
+    Returns:
+        缩略图序列；无法打开视频、没有读到任何帧或被中止时返回 None
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.warning(f"生成缩略图时无法打开视频: {video_path}")
+        return None
+    try:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        size = _thumbnail_size(width, height, thumb_height)
+        indices = []
+        images = []
+        cap_position = 0
+        for position in positions:
+            if is_cancelled is not None and is_cancelled():
+                return None
+            cap_position = seek_capture(cap, cap_position, position, keyframe_index)
+            ok, frame = cap.read() if cap_position == position else (False, None)
+            if not ok:
+                cap_position = -1
+                continue
+            cap_position = position + 1
+            indices.append(position)
+            images.append(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+    finally:
+        cap.release()
+    if not images:
+        return None
+    return ThumbnailStrip(indices, np.stack(images))
+
+
+class ThumbnailCache:
+    """缩略图磁盘缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._cache_dir = cache_dir or get_cache_dir("thumbnails")
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_path: str, positions: List[int], thumb_height: int) -> Optional[str]:
+        """缓存键；源文件不可访问时返回 None"""
+        try:
+            source = source_identity(video_path)
+        except OSError:
+            return None
+        payload = json.dumps(
+            {"version": THUMBNAIL_VERSION, "source": source,
+             "positions": positions, "height": thumb_height},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.npz")
+
+    def load(self, key: Optional[str]) -> Optional[ThumbnailStrip]:
+        if key is None:
+            return None
+        try:
+            with np.load(self._entry_path(key)) as data:
+                return ThumbnailStrip(data["frame_indices"].tolist(), data["images"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def store(self, key: Optional[str], strip: ThumbnailStrip):
+        if key is None:
+            return
+        entry = self._entry_path(key)
+        temp_path = f"{entry}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(f, frame_indices=np.asarray(strip.frame_indices), images=strip.images)
+            os.replace(temp_path, entry)
+        except OSError as e:
+            logger.warning(f"写入缩略图缓存失败: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def load_thumbnail_strip(
+    video_path: str,
+    total_frames: int,
+    keyframe_index: Optional[KeyframeIndex] = None,
+    count: int = DEFAULT_THUMBNAIL_COUNT,
+    thumb_height: int = DEFAULT_THUMBNAIL_HEIGHT,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Optional[ThumbnailStrip]:
+    """读取视频的缩略图，不存在时生成并保存（在后台线程中调用）"""
+    positions = sample_positions(total_frames, count, keyframe_index)
+    cache = ThumbnailCache()
+    key = cache.make_key(video_path, positions, thumb_height)
+    strip = cache.load(key)
+    if strip is not None:
+        return strip
+    strip = generate_thumbnail_strip(video_path, positions, thumb_height, keyframe_index, is_cancelled)
+    if strip is not None:
+        cache.store(key, strip)
+        logger.info(f"已生成缩略图: {os.path.basename(video_path)} ({len(strip)} 张)")
+    return strip
@@ -0,0 +1,237 @@
+"""
+过渡效果渲染器 - FADE / MOVE / SWIPE 过渡效果的 Python 参考实现
+
+与 Rust 模拟器的 render/transition.rs 及 SimulatorApp::apply_transition_overlay 逐项对应：
+过渡总帧数为三个阶段（进入 / 保持 / 退出）各 duration，按模拟器的 50 fps 渲染时钟计；
+每帧的参数（淡入淡出 alpha、移动偏移、擦除位置）按过渡帧号预先算成表，
+应用到 (N, H, W, 3) 帧序列时整组向量化处理，不逐像素循环。
+"""
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+from config.constants import microseconds_to_frames
+from config.epconfig import TransitionOptions, TransitionType
+
+logger = logging.getLogger(__name__)
+
+# 模拟器（固件）的渲染帧率，过渡和 appear_time 都按这个时钟换算帧数
+TRANSITION_FPS = 50
+# duration 为 0 时的过渡总帧数（固件默认值）
+DEFAULT_TRANSITION_FRAMES = 75
+
+# 阶段分界：进入 [0, 0.333)、保持 [0.333, 0.667)、退出 [0.667, 1)
+PHASE_HOLD = 0.333
+PHASE_OUT = 0.667
+
+# 过渡中画出的分隔线颜色 (BGR)
+MOVE_LINE_COLOR = (255, 255, 255)
+SWIPE_LINE_COLOR = (200, 200, 200)
+
+
+def transition_frame_count(duration: int) -> int:
+    """过渡总帧数：三个阶段各 duration（微秒）；duration 不大于 0 时为固件默认值"""
+    if duration > 0:
+        return microseconds_to_frames(duration, TRANSITION_FPS) * 3
+    return DEFAULT_TRANSITION_FRAMES
+
+
+def hold_start_frame(total_frames: int) -> int:
+    """过渡进入保持阶段的第一个帧号（模拟器在此切换到下一段视频）"""
+    progress = np.arange(total_frames + 1, dtype=np.float32) / np.float32(max(total_frames, 1))
+    hold = np.flatnonzero(progress >= np.float32(PHASE_HOLD))
+    return int(hold[0]) if len(hold) else total_frames
+
+
+def cubic_bezier(t: np.ndarray, p1x: float, p1y: float, p2x: float, p2y: float) -> np.ndarray:
+    """
+    三次贝塞尔缓动曲线 (0,0)-(p1x,p1y)-(p2x,p2y)-(1,1)，对数组逐元素求值
+
+    与固件的 lv_cubic_bezier 相同：Newton 迭代 8 次由 x 求参数 s，再求 y(s)。
+    """
+    t = np.asarray(t, dtype=np.float32)
+    s = np.clip(t, 0.0, 1.0)
+    for _ in range(8):
+        s2 = s * s
+        inv = 1.0 - s
+        x = 3.0 * inv * inv * s * p1x + 3.0 * inv * s2 * p2x + s2 * s
+        dx = 3.0 * inv * inv * p1x + 6.0 * inv * s * (p2x - p1x) + 3.0 * s2 * (1.0 - p2x)
+        # 导数过小的元素不再迭代
+        step = np.divide(x - t, dx, out=np.zeros_like(s), where=np.abs(dx) >= 1e-10)
+        s = np.clip(s - step, 0.0, 1.0)
+    inv = 1.0 - s
+    y = np.clip(3.0 * inv * inv * s * p1y + 3.0 * inv * s * s * p2y + s * s * s, 0.0, 1.0)
+    # 端点处直接取 0 / 1
+    return np.where(t <= 0.0, 0.0, np.where(t >= 1.0, 1.0, y)).astype(np.float32)
+
+
+def ease_in(t: np.ndarray) -> np.ndarray:
+    """慢起快收，MOVE 退出阶段使用"""
+    return cubic_bezier(t, 0.42, 0.0, 1.0, 1.0)
+
+
+def ease_out(t: np.ndarray) -> np.ndarray:
+    """快起慢收，MOVE 进入阶段使用"""
+    return cubic_bezier(t, 0.0, 0.0, 0.58, 1.0)
+
+
+def ease_in_out(t: np.ndarray) -> np.ndarray:
+    """两端慢中间快，SWIPE 使用"""
+    return cubic_bezier(t, 0.42, 0.0, 0.58, 1.0)
+
+
+def parse_hex_color(hex_color: str) -> Tuple[int, int, int]:
+    """过渡背景色 "#RRGGBB" 转为 BGR；与模拟器一致，不足 6 位时为白色"""
+    hex_color = hex_color.lstrip("#")
+    if len(hex_color) < 6:
+        return (255, 255, 255)
+
+    def channel(text: str) -> int:
+        try:
+            return int(text, 16)
+        except ValueError:
+            return 0
+
+    r, g, b = channel(hex_color[0:2]), channel(hex_color[2:4]), channel(hex_color[4:6])
+    return (b, g, r)
+
+
+def contain_image(image: np.ndarray, width: int, height: int, background: Tuple[int, int, int]) -> np.ndarray:
+    """把过渡图片保持宽高比完整放入 width x height 并居中，其余部分填背景色"""
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[:] = background
+    image_h, image_w = image.shape[:2]
+    if image_w * height > image_h * width:
+        scaled_w, scaled_h = width, max(1, int(width * image_h / image_w))
+    else:
+        scaled_w, scaled_h = max(1, int(height * image_w / image_h)), height
+    x, y = (width - scaled_w) // 2, (height - scaled_h) // 2
+    # 模拟器按最近邻取样
+    canvas[y:y + scaled_h, x:x + scaled_w] = cv2.resize(
+        image, (scaled_w, scaled_h), interpolation=cv2.INTER_NEAREST
+    )
+    return canvas
+
+
+class TransitionRenderer:
+    """单个过渡（类型、选项、画面尺寸固定）的渲染器"""
+
+    def __init__(
+        self,
+        transition_type: TransitionType,
+        options: Optional[TransitionOptions],
+        width: int,
+        height: int,
+        image: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            transition_type: 过渡类型
+            options: 过渡选项，None 时使用默认时长和黑色背景
+            width: 画面宽度
+            height: 画面高度
+            image: 已读取的过渡图片 (BGR)，FADE 的保持阶段显示；None 表示没有
+        """
+        options = options or TransitionOptions()
+        self.transition_type = transition_type
+        self.total_frames = transition_frame_count(options.duration)
+        self._width = width
+        self._height = height
+        self._background = parse_hex_color(options.background_color)
+        self._hold_image = (
+            contain_image(image, width, height, self._background)
+            if image is not None and transition_type == TransitionType.FADE else None
+        )
+
+        # 帧号 0..total 的进度和阶段（float32 与模拟器的 f32 运算一致）
+        frames = np.arange(self.total_frames + 1, dtype=np.float32)
+        progress = np.minimum(frames / np.float32(self.total_frames), np.float32(1.0))
+        self._in = progress < PHASE_HOLD
+        self._hold = (progress >= PHASE_HOLD) & (progress < PHASE_OUT)
+        self._out = (progress >= PHASE_OUT) & (progress < 1.0)
+        phase_in = progress / np.float32(PHASE_HOLD)
+        phase_out = (progress - np.float32(PHASE_OUT)) / np.float32(PHASE_HOLD)
+
+        if transition_type == TransitionType.FADE:
+            alpha = np.zeros_like(progress)
+            alpha[self._in] = np.minimum(phase_in[self._in] * 255.0, 255.0)
+            alpha[self._hold] = 255.0
+            alpha[self._out] = np.maximum((1.0 - phase_out[self._out]) * 255.0, 0.0)
+            self._alpha = alpha.astype(np.uint8)
+        elif transition_type == TransitionType.MOVE:
+            # 模拟器按画面宽度计算偏移，再把偏移当作行号画线
+            offset = np.full(progress.shape, -width, dtype=np.int32)
+            offset[self._in] = ((1.0 - ease_out(phase_in[self._in])) * width).astype(np.int32)
+            offset[self._hold] = 0
+            offset[self._out] = -(ease_in(phase_out[self._out]) * width).astype(np.int32)
+            self._offset = offset
+        elif transition_type == TransitionType.SWIPE:
+            swipe = np.zeros_like(progress)
+            swipe[self._in] = ease_in_out(phase_in[self._in])
+            swipe[self._hold] = 1.0
+            swipe[self._out] = 1.0 - ease_in_out(phase_out[self._out])
+            self._swipe_y = (swipe * height).astype(np.int32)
+
+    def apply(self, frames: np.ndarray, transition_frames: np.ndarray) -> np.ndarray:
+        """
+        把过渡效果原地应用到一组帧上
+
+        Args:
+            frames: (N, H, W, 3) BGR 帧序列，尺寸与构造时一致
+            transition_frames: 每帧对应的过渡帧号 (N,)
+
+        Returns:
+            frames 本身
+        """
+        indices = np.clip(np.asarray(transition_frames), 0, self.total_frames)
+        if self.transition_type == TransitionType.FADE:
+            self._apply_fade(frames, indices)
+        elif self.transition_type == TransitionType.MOVE:
+            self._apply_move(frames, indices)
+        elif self.transition_type == TransitionType.SWIPE:
+            self._apply_swipe(frames, indices)
+        return frames
+
+    def _apply_fade(self, frames: np.ndarray, indices: np.ndarray):
+        """整帧与背景色按 alpha 混合；保持阶段有过渡图片时显示图片"""
+        blend = np.arange(len(frames))
+        if self._hold_image is not None:
+            # 保持阶段 alpha 为 255，混合结果就是居中的过渡图片
+            hold = self._hold[indices]
+            frames[hold] = self._hold_image
+            blend = blend[~hold]
+        alpha = self._alpha[indices[blend]].astype(np.uint16)[:, None, None, None]
+        if not len(alpha):
+            return
+        # out = (frame * (255 - a) + bg * a) / 255，在 uint16 中整组计算
+        blended = frames[blend] * (255 - alpha)
+        blended += alpha * np.array(self._background, dtype=np.uint16)
+        blended //= 255
+        frames[blend] = blended
+
+    def _apply_move(self, frames: np.ndarray, indices: np.ndarray):
+        """在偏移位置画一条白线（保持阶段偏移为 0，不需要填充）"""
+        rows = self._offset[indices]
+        visible = (rows > 0) & (rows < self._height)
+        frames[np.flatnonzero(visible), rows[visible]] = MOVE_LINE_COLOR
+
+    def _apply_swipe(self, frames: np.ndarray, indices: np.ndarray):
+        """擦除线以上填背景色（背景为黑色时压暗为 1/3），擦除线为浅灰色"""
+        rows = self._swipe_y[indices]
+        visible = (rows > 0) & (rows < self._height)
+        if not visible.any():
+            return
+        above = np.arange(self._height)[None, :] < np.where(visible, rows, 0)[:, None]
+        where = above[:, :, None, None]
+        if self._background == (0, 0, 0):
+            np.floor_divide(frames, 3, out=frames, where=where)
+        else:
+            np.copyto(frames, np.array(self._background, dtype=np.uint8), where=where)
+        frames[np.flatnonzero(visible), rows[visible]] = SWIPE_LINE_COLOR
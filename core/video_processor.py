@@ -3,17 +3,21 @@
 融合 OpenCV 读取和 FFmpeg 编码
 """
 import subprocess
-import sys
 import os
 import logging
+import time
 from dataclasses import dataclass
 from typing import Optional, Callable, Tuple, Dict, Any
 
 from config.constants import RESOLUTION_SPECS, get_resolution_spec
+from core.ffmpeg_runner import FFmpegRunner, FFmpegProgress
 from utils.file_utils import get_app_dir
 
 logger = logging.getLogger(__name__)
 
+# 单个视频处理的超时时间
+PROCESS_TIMEOUT_SECONDS = 600
+
 
 @dataclass
 class VideoInfo:
@@ -205,8 +209,8 @@ class VideoProcessor:
         pad_dir = spec["padding_side"]
         rotate_180 = spec["rotate_180"]
 
-        # 构建FFmpeg命令
-        cmd = [self.ffmpeg_path, "-y", "-i", input_path]
+        # 构建FFmpeg参数
+        args = ["-y", "-i", input_path]
 
         # 视频滤镜
         filters = []
@@ -224,10 +228,10 @@ class VideoProcessor:
 
         # 组合滤镜
         if filters:
-            cmd.extend(["-vf", ",".join(filters)])
+            args.extend(["-vf", ",".join(filters)])
 
         # 编码参数
-        cmd.extend([
+        args.extend([
             "-c:v", "libx264",
             "-preset", "medium",
             "-crf", "18",
@@ -237,37 +241,44 @@ class VideoProcessor:
         ])
 
         if progress_callback:
-            progress_callback(0.1, "开始处理视频...")
-
+            progress_callback(0.0, "开始处理视频...")
+
+        # 已知总帧数/时长时按FFmpeg -progress 输出计算真实进度
+        info = self.get_video_info(input_path)
+        deadline = time.monotonic() + PROCESS_TIMEOUT_SECONDS
+
+        def on_progress(progress: FFmpegProgress):
+            if progress_callback is None:
+                return
+            message = f"正在编码... 帧 {progress.frame}"
+            if progress.fps > 0:
+                message += f" ({progress.fps:.1f} fps)"
+            eta = progress.eta_seconds
+            if eta is not None:
+                message += f" 预计剩余 {eta:.0f} 秒"
+            progress_callback(progress.fraction, message)
+
+        runner = FFmpegRunner(self.ffmpeg_path, cancel_check=lambda: time.monotonic() > deadline)
         try:
-            popen_kwargs = {
-                'stdout': subprocess.PIPE,
-                'stderr': subprocess.PIPE,
-                'universal_newlines': True
-            }
-            if sys.platform == 'win32':
-                popen_kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-
-            process = subprocess.Popen(cmd, **popen_kwargs)
-
-            if progress_callback:
-                progress_callback(0.5, "正在编码...")
-
-            stdout, stderr = process.communicate(timeout=600)
-
-            if process.returncode == 0:
-                if progress_callback:
-                    progress_callback(1.0, "处理完成")
-                return True, ""
-            else:
-                return False, f"FFmpeg错误: {stderr}"
-
-        except subprocess.TimeoutExpired:
-            process.kill()
+            runner.start(
+                args,
+                on_progress=on_progress,
+                total_frames=info.total_frames if info else 0,
+                duration=info.duration if info else 0.0
+            )
+            returncode = runner.wait()
+        except InterruptedError:
             return False, "视频处理超时（超过10分钟）"
         except Exception as e:
+            runner.kill()
             return False, f"视频处理异常: {e}"
 
+        if returncode == 0:
+            if progress_callback:
+                progress_callback(1.0, "处理完成")
+            return True, ""
+        return False, f"FFmpeg错误: {runner.stderr_tail}"
+
     def generate_ffmpeg_command(
         self,
         input_path: str,
@@ -1,23 +1,30 @@
 """
 导出进度对话框
+
+先显示试运行估算的耗时、输出大小和临时空间，用户确认后再开始导出。
 """
 from PyQt6.QtWidgets import (
-    QDialog, QVBoxLayout, QLabel
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 from qfluentwidgets import (
-    PushButton, SubtitleLabel, BodyLabel, ProgressBar
+    PushButton, PrimaryPushButton, SubtitleLabel, BodyLabel, ProgressBar
 )
 
+from core.export_estimate import ExportEstimate
+
 
 class ExportProgressDialog(QDialog):
     """导出进度对话框"""
 
     cancel_requested = pyqtSignal()
+    start_requested = pyqtSignal()  # 用户确认估算结果，开始导出
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._is_completed = False
+        self._confirming = False  # 估算完成，等待用户确认
+        self._cancelling = False
         self._setup_ui()
 
     def _setup_ui(self):
@@ -50,22 +57,94 @@ class ExportProgressDialog(QDialog):
         self.label_detail.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.label_detail)
 
-        # 按钮 - 使用Fluent PushButton
+        # 编码速度/剩余时间标签，有数据时才显示
+        self.label_speed = BodyLabel("")
+        self.label_speed.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_speed.setVisible(False)
+        layout.addWidget(self.label_speed)
+
+        # 统计信息标签（缓存命中等），有数据时才显示
+        self.label_stats = BodyLabel("")
+        self.label_stats.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_stats.setVisible(False)
+        layout.addWidget(self.label_stats)
+
+        # 按钮 - 使用Fluent PushButton；开始导出按钮只在估算完成后显示
+        btn_layout = QHBoxLayout()
+        self.btn_start = PrimaryPushButton("开始导出")
+        self.btn_start.clicked.connect(self._on_start_clicked)
+        self.btn_start.setVisible(False)
+        btn_layout.addWidget(self.btn_start)
         self.btn_action = PushButton("取消")
         self.btn_action.clicked.connect(self._on_action_clicked)
-        layout.addWidget(self.btn_action)
+        btn_layout.addWidget(self.btn_action)
+        layout.addLayout(btn_layout)
+
+    def begin_estimate(self):
+        """进入估算阶段"""
+        self.label_status.setText("正在估算导出开销...")
+
+    def show_estimate(self, estimate: ExportEstimate):
+        """显示估算结果，等待用户确认"""
+        self._confirming = True
+        self.label_status.setText("导出预估")
+        self.progress_bar.setValue(0)
+        self.label_detail.setText("\n".join(estimate.summary_lines()))
+        self.label_detail.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        if not estimate.disk_sufficient:
+            self.label_status.setStyleSheet("color: red;")
+        self.label_speed.setVisible(False)
+        self.btn_start.setVisible(True)
+
+    def show_estimate_failed(self, message: str):
+        """估算失败：用户取消时直接关闭，否则仍允许开始导出"""
+        if self._cancelling:
+            self.reject()
+            return
+        self._confirming = True
+        self.label_status.setText("无法估算导出开销")
+        self.label_detail.setText(message)
+        self.label_speed.setVisible(False)
+        self.btn_start.setVisible(True)
+
+    def _on_start_clicked(self):
+        """确认开始导出"""
+        self._confirming = False
+        self.btn_start.setVisible(False)
+        self.label_status.setText("准备导出...")
+        self.label_status.setStyleSheet("")
+        self.label_detail.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_detail.setText("")
+        self.start_requested.emit()
 
     def update_progress(self, value: int, message: str):
         """更新进度"""
         self.progress_bar.setValue(value)
         self.label_detail.setText(message)
 
+    def update_encode_stats(self, fps: float, eta_seconds: float):
+        """更新编码帧率和预计剩余时间（eta_seconds < 0 表示未知）"""
+        parts = []
+        if fps > 0:
+            parts.append(f"编码速度 {fps:.1f} fps")
+        if eta_seconds >= 0:
+            minutes, seconds = divmod(int(round(eta_seconds)), 60)
+            parts.append(f"预计剩余 {minutes:02d}:{seconds:02d}")
+        self.label_speed.setText(" · ".join(parts))
+        self.label_speed.setVisible(bool(parts))
+
+    def update_cache_stats(self, hits: int, misses: int):
+        """更新导出缓存命中统计"""
+        self.label_stats.setText(f"导出缓存: 命中 {hits} / 未命中 {misses}")
+        self.label_stats.setVisible(True)
+
     def set_completed(self, success: bool, message: str):
         """设置完成状态"""
         self._is_completed = True
         self.progress_bar.setValue(100 if success else self.progress_bar.value())
         self.label_status.setText("导出完成!" if success else "导出失败")
         self.label_detail.setText(message)
+        self.label_speed.setVisible(False)
         self.btn_action.setText("确定")
 
         if success:
@@ -77,15 +156,18 @@ class ExportProgressDialog(QDialog):
         """按钮点击"""
         if self._is_completed:
             self.accept()
+        elif self._confirming:
+            self.reject()
         else:
             # 请求取消
+            self._cancelling = True
             self.cancel_requested.emit()
             self.label_status.setText("正在取消...")
             self.btn_action.setEnabled(False)
 
     def closeEvent(self, event):
         """关闭事件"""
-        if self._is_completed:
+        if self._is_completed or self._confirming:
             event.accept()
         else:
-            event.ignore()  # 导出过程中禁止关闭
+            event.ignore()  # 估算和导出过程中禁止关闭
@@ -2,12 +2,13 @@
 from core.error_handler import ErrorHandler, show_error
 from core.crash_recovery_service import CrashRecoveryService
 from core.auto_save_service import AutoSaveService, AutoSaveConfig
+from core.frame_cache import DEFAULT_FRAME_CACHE_BYTES, set_frame_cache_budget
 from gui.widgets.json_preview import JsonPreviewWidget
 from gui.widgets.timeline import TimelineWidget
 from gui.widgets.transition_preview import TransitionPreviewWidget
 from gui.widgets.video_preview import VideoPreviewWidget
 from gui.widgets.config_panel import ConfigPanel
-from config.constants import APP_NAME, APP_VERSION, get_resolution_spec
+from config.constants import APP_NAME, APP_VERSION, get_device_slot_count, get_resolution_spec
 from config.epconfig import EPConfig
 from qfluentwidgets import (
     PushButton, PrimaryPushButton, ToolButton,
@@ -18,7 +19,7 @@ from qfluentwidgets import (
     ScrollArea, FluentIcon,
     setCustomStyleSheet, isDarkTheme
 )
-from PyQt6.QtGui import QAction, QKeySequence, QIcon
+from PyQt6.QtGui import QAction, QKeySequence, QIcon, QDesktopServices
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QSplitter, QMenuBar, QMenu, QStatusBar,
@@ -26,7 +27,7 @@ from PyQt6.QtWidgets import (
     QGroupBox, QCheckBox, QComboBox, QDoubleSpinBox,
     QSpinBox, QLineEdit, QTabWidget
 )
-from PyQt6.QtCore import Qt, QSettings, QTimer, QUrl, QCoreApplication
+from PyQt6.QtCore import Qt, QSettings, QTimer, QUrl, QCoreApplication, pyqtSignal
 import os
 import sys
 import logging
@@ -48,6 +49,9 @@ QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
 class MainWindow(QMainWindow):
     """主窗口"""
 
+    # 序列预览视频渲染完成（后台线程发出），参数为视频路径，失败时为空字符串
+    _sequence_preview_finished = pyqtSignal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -554,6 +558,7 @@ class MainWindow(QMainWindow):
         self.action_shortcuts.triggered.connect(self._on_shortcuts)
         self.action_check_update.triggered.connect(self._on_check_update)
         self.action_about.triggered.connect(self._on_about)
+        self._sequence_preview_finished.connect(self._on_sequence_preview_finished)
 
         # 高级配置面板信号
         self.advanced_config_panel.config_changed.connect(
@@ -597,6 +602,8 @@ class MainWindow(QMainWindow):
         self.video_preview.playback_state_changed.connect(
             self._on_playback_changed)
         self.video_preview.rotation_changed.connect(self.timeline.set_rotation)
+        self.video_preview.thumbnails_ready.connect(
+            lambda strip: self._on_preview_thumbnails_ready(self.video_preview, strip))
 
         # 侧边栏导航
         self.btn_firmware.clicked.connect(self._on_sidebar_firmware)
@@ -612,6 +619,8 @@ class MainWindow(QMainWindow):
             self._on_intro_playback_changed)
         self.intro_preview.rotation_changed.connect(
             self._on_intro_rotation_changed)
+        self.intro_preview.thumbnails_ready.connect(
+            lambda strip: self._on_preview_thumbnails_ready(self.intro_preview, strip))
 
         # 时间轴（默认连接到入场视频预览）
         self._connect_timeline_to_preview(self.intro_preview)
@@ -688,12 +697,32 @@ class MainWindow(QMainWindow):
                 if hasattr(self, 'hwaccel_check'):
                     self.hwaccel_check.setChecked(
                         settings.get('hardware_acceleration', True))
+                if hasattr(self, 'frame_cache_spin'):
+                    self.frame_cache_spin.setValue(settings.get(
+                        'frame_cache_mb', DEFAULT_FRAME_CACHE_BYTES // (1024 * 1024)))
+                    set_frame_cache_budget(self.frame_cache_spin.value() * 1024 * 1024)
                 if hasattr(self, 'export_quality_combo'):
                     self.export_quality_combo.setCurrentText(
                         settings.get('export_quality', '高'))
-                if hasattr(self, 'export_thread_spin'):
-                    self.export_thread_spin.setValue(
-                        settings.get('export_threads', 4))
+                if hasattr(self, 'export_cpu_budget_spin'):
+                    # 旧版的 export_threads 只是界面上的数值、从未作用于编码，不沿用
+                    self.export_cpu_budget_spin.setValue(
+                        settings.get('export_cpu_budget', 0))
+                if hasattr(self, 'export_all_res_check'):
+                    self.export_all_res_check.setChecked(
+                        settings.get('export_all_resolutions', False))
+                if hasattr(self, 'export_segment_spin'):
+                    self.export_segment_spin.setValue(
+                        settings.get('export_segments', 0))
+                if hasattr(self, 'export_i420_check'):
+                    self.export_i420_check.setChecked(
+                        settings.get('export_i420', True))
+                if hasattr(self, 'export_budget_spin'):
+                    self.export_budget_spin.setValue(
+                        settings.get('export_storage_budget_mb', 0))
+                if hasattr(self, 'export_min_vmaf_spin'):
+                    self.export_min_vmaf_spin.setValue(
+                        settings.get('export_min_vmaf', 0))
                 if hasattr(self, 'github_accel_check'):
                     self.github_accel_check.setChecked(
                         settings.get('github_acceleration', True))
@@ -1009,6 +1038,7 @@ class MainWindow(QMainWindow):
         self.transition_preview.clear_image("loop")
         self._loop_image_path = None
         self.timeline.set_total_frames(0)
+        self.timeline.set_thumbnails(None)
         self._loop_in_out = (0, 0)
         self._intro_in_out = (0, 0)
 
@@ -1049,6 +1079,7 @@ class MainWindow(QMainWindow):
             self.transition_preview.clear_image("loop")
             self._loop_image_path = None
             self.timeline.set_total_frames(0)
+            self.timeline.set_thumbnails(None)
             self._loop_in_out = (0, 0)
             self._intro_in_out = (0, 0)
 
@@ -1231,21 +1262,9 @@ class MainWindow(QMainWindow):
             show_error(e, "收集导出数据", self)
             return
 
-        # 处理arknights叠加的自定义图片
-        try:
-            self._process_arknights_custom_images(dir_path)
-        except Exception as e:
-            logger.error(f"处理自定义图片失败: {e}")
-            show_error(e, "处理自定义图片", self)
-
-        # 处理 ImageOverlay 路径
-        try:
-            self._process_image_overlay(dir_path)
-        except Exception as e:
-            logger.error(f"处理 ImageOverlay 失败: {e}")
-
         # 创建导出服务和进度对话框
         from core.export_service import ExportService
+        from core.export_engine import ExportOptions
         from gui.dialogs.export_progress_dialog import ExportProgressDialog
 
         self._export_service = ExportService(self)
@@ -1255,30 +1274,112 @@ class MainWindow(QMainWindow):
         self._export_service.progress_updated.connect(
             self._export_dialog.update_progress
         )
+        self._export_service.cache_stats_updated.connect(
+            self._export_dialog.update_cache_stats
+        )
+        self._export_service.encode_stats_updated.connect(
+            self._export_dialog.update_encode_stats
+        )
         self._export_service.export_completed.connect(
             lambda msg: self._on_export_completed(True, msg)
         )
         self._export_service.export_failed.connect(
             lambda msg: self._on_export_completed(False, msg)
         )
+        self._export_service.estimate_completed.connect(
+            self._export_dialog.show_estimate
+        )
+        self._export_service.estimate_failed.connect(
+            self._export_dialog.show_estimate_failed
+        )
         self._export_dialog.cancel_requested.connect(
             self._export_service.cancel
         )
 
-        # 启动导出
-        self._export_service.export_all(
+        # 估算和导出使用同一组参数
+        export_kwargs = dict(
             output_dir=dir_path,
             epconfig=self._config,
             logo_mat=export_data.get('logo_mat'),
             overlay_mat=export_data.get('overlay_mat'),
             loop_video_params=export_data.get('loop_video_params'),
             intro_video_params=export_data.get('intro_video_params'),
-            loop_image_path=export_data.get('loop_image_path')
+            loop_image_path=export_data.get('loop_image_path'),
+            options=ExportOptions(
+                cpu_budget=self._get_export_thread_budget(),
+                screens=self._get_export_screens(),
+                segment_count=self._get_export_segment_count(),
+                pixel_format=self._get_export_pixel_format(),
+                rate_target=self._get_export_rate_target()
+            )
         )
+        self._export_dialog.start_requested.connect(
+            lambda: self._start_export(dir_path, export_kwargs)
+        )
+
+        # 先试运行估算，用户在对话框中确认后再开始导出
+        self._export_dialog.begin_estimate()
+        self._export_service.estimate_all(**export_kwargs)
 
         # 显示进度对话框
         self._export_dialog.exec()
 
+    def _start_export(self, dir_path: str, export_kwargs: dict):
+        """用户确认估算结果后开始导出（试运行阶段不向导出目录写入任何文件）"""
+        # 处理arknights叠加的自定义图片
+        try:
+            self._process_arknights_custom_images(dir_path)
+        except Exception as e:
+            logger.error(f"处理自定义图片失败: {e}")
+            show_error(e, "处理自定义图片", self)
+
+        # 处理 ImageOverlay 路径
+        try:
+            self._process_image_overlay(dir_path)
+        except Exception as e:
+            logger.error(f"处理 ImageOverlay 失败: {e}")
+
+        self._export_service.export_all(**export_kwargs)
+
+    def _get_export_thread_budget(self) -> int:
+        """设置中所有编码任务共用的CPU预算（线程数），0 表示全部核心"""
+        if hasattr(self, 'export_cpu_budget_spin'):
+            return self.export_cpu_budget_spin.value()
+        return 0
+
+    def _get_export_segment_count(self) -> int:
+        """设置中的分段编码段数，0 表示不分段"""
+        if hasattr(self, 'export_segment_spin'):
+            return self.export_segment_spin.value()
+        return 0
+
+    def _get_export_pixel_format(self):
+        """设置中送入编码器的像素格式"""
+        from core.export_engine import EncoderPixelFormat
+        if hasattr(self, 'export_i420_check') and not self.export_i420_check.isChecked():
+            return EncoderPixelFormat.BGR24
+        return EncoderPixelFormat.I420
+
+    def _get_export_rate_target(self):
+        """设置中的自动码率目标（存储预算 / VMAF 下限），都未设置时为 None"""
+        from core.rate_tuner import RateTarget, QualityMetric
+        budget_mb = self.export_budget_spin.value() if hasattr(self, 'export_budget_spin') else 0
+        min_vmaf = self.export_min_vmaf_spin.value() if hasattr(self, 'export_min_vmaf_spin') else 0
+        if budget_mb <= 0 and min_vmaf <= 0:
+            return None
+        return RateTarget(
+            storage_budget_bytes=budget_mb * 1024 * 1024,
+            quality_floor=float(min_vmaf),
+            metric=QualityMetric.VMAF
+        )
+
+    def _get_export_screens(self) -> list:
+        """设置了导出全部分辨率时返回所有屏幕类型，否则为空（只导出当前分辨率）"""
+        from config.epconfig import ScreenType
+        if hasattr(self, 'export_all_res_check') and self.export_all_res_check.isChecked():
+            return list(ScreenType)
+        return []
+
     def _on_simulator(self):
         """打开模拟器预览"""
         import subprocess
@@ -1311,14 +1412,17 @@ class MainWindow(QMainWindow):
         )
 
         if not os.path.exists(simulator_path):
-            QMessageBox.information(
+            reply = QMessageBox.question(
                 self, "提示",
                 f"模拟器未找到\n\n"
                 f"模拟器功能需要先编译 Rust 模拟器:\n"
                 f"cd simulator && cargo build --release\n\n"
                 f"路径: {simulator_path}\n\n"
-                f"如果您不需要使用模拟器预览功能，可以忽略此提示。"
+                f"是否改为生成完整播放流程的预览视频？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
+            if reply == QMessageBox.StandardButton.Yes:
+                self._start_sequence_preview()
             return
 
         try:
@@ -1358,6 +1462,54 @@ class MainWindow(QMainWindow):
             logger.error(f"启动模拟器失败: {e}")
             show_error(e, "启动模拟器", self)
 
+    def _start_sequence_preview(self):
+        """在后台渲染完整播放流程（入场过渡 → 入场 → 循环过渡 → 循环）的预览视频，完成后用系统播放器打开"""
+        import threading
+        from core.export_engine import VideoExportParams
+        from core.sequence_preview import load_sequence_preview
+        from core.video_processor import VideoProcessor
+
+        ffmpeg_path = VideoProcessor().find_ffmpeg()
+        if not ffmpeg_path:
+            QMessageBox.warning(self, "警告", "未找到ffmpeg，无法生成预览视频")
+            return
+
+        # 素材、裁剪框和旋转与导出相同
+        data = self._collect_export_data()
+        loop = data.get('loop_video_params')
+        if data.get('is_loop_image'):
+            loop = VideoExportParams(
+                video_path=data['loop_image_path'],
+                cropbox=(0, 0, 0, 0),
+                start_frame=0,
+                end_frame=1,
+                fps=30.0,
+                resolution=self._config.screen.value,
+                is_image=True
+            )
+        if loop is None:
+            QMessageBox.warning(self, "警告", "请先加载循环视频")
+            return
+        intro = data.get('intro_video_params')
+        config = self._config.copy()
+        base_dir = self._base_dir
+
+        def run():
+            path = load_sequence_preview(config, loop, ffmpeg_path, intro, base_dir)
+            self._sequence_preview_finished.emit(path or "")
+
+        self.status_bar.showMessage("正在生成预览视频...")
+        threading.Thread(target=run, name="sequence-preview", daemon=True).start()
+
+    def _on_sequence_preview_finished(self, path: str):
+        """序列预览视频渲染完成"""
+        if not path:
+            self.status_bar.showMessage("生成预览视频失败")
+            QMessageBox.warning(self, "警告", "生成预览视频失败，详情请查看日志")
+            return
+        self.status_bar.showMessage(f"预览视频: {path}")
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
     def _on_flasher(self):
         """启动固件烧录工具"""
         if sys.platform != 'win32':
@@ -2799,6 +2951,62 @@ class MainWindow(QMainWindow):
         hwaccel_layout.addStretch()
         video_card_layout.addLayout(hwaccel_layout)
 
+        # 预览帧缓存
+        frame_cache_layout = QHBoxLayout()
+        frame_cache_layout.setSpacing(16)
+        frame_cache_label = QLabel("预览帧缓存:")
+        frame_cache_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.frame_cache_spin = QSpinBox()
+        self.frame_cache_spin.setRange(32, 4096)
+        self.frame_cache_spin.setSingleStep(64)
+        self.frame_cache_spin.setValue(DEFAULT_FRAME_CACHE_BYTES // (1024 * 1024))
+        self.frame_cache_spin.setSuffix(" MB")
+        self.frame_cache_spin.setToolTip(
+            "每个视频缓存已解码帧的内存上限，拖动时间轴和逐帧步进时直接复用")
+        setCustomStyleSheet(
+            self.frame_cache_spin,
+            """QSpinBox {
+                background-color: white;
+                border: 1px solid #ddd;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #f0f0f0;
+            }""",
+            """QSpinBox {
+                background-color: #333;
+                color: #ddd;
+                border: 1px solid #555;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+                background-color: #444;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #555;
+            }"""
+        )
+        frame_cache_layout.addWidget(frame_cache_label)
+        frame_cache_layout.addWidget(self.frame_cache_spin)
+        frame_cache_layout.addStretch()
+        video_card_layout.addLayout(frame_cache_layout)
+
         scroll_layout.addWidget(video_card)
 
         # 导出设置卡片
@@ -2881,16 +3089,19 @@ class MainWindow(QMainWindow):
         export_quality_layout.addStretch()
         export_card_layout.addLayout(export_quality_layout)
 
-        # 导出线程数
+        # 编码CPU预算
         export_thread_layout = QHBoxLayout()
         export_thread_layout.setSpacing(16)
-        export_thread_label = QLabel("导出线程数:")
+        export_thread_label = QLabel("编码CPU预算:")
         export_thread_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
-        self.export_thread_spin = QSpinBox()
-        self.export_thread_spin.setRange(1, 8)
-        self.export_thread_spin.setValue(4)
+        self.export_cpu_budget_spin = QSpinBox()
+        self.export_cpu_budget_spin.setRange(0, os.cpu_count() or 1)
+        self.export_cpu_budget_spin.setValue(0)
+        self.export_cpu_budget_spin.setSpecialValueText("全部核心")
+        self.export_cpu_budget_spin.setToolTip(
+            "同时进行的所有编码共用的线程数上限，按任务分配给各个FFmpeg进程")
         setCustomStyleSheet(
-            self.export_thread_spin,
+            self.export_cpu_budget_spin,
             """QSpinBox {
                 background-color: white;
                 border: 1px solid #ddd;
@@ -2929,10 +3140,299 @@ class MainWindow(QMainWindow):
             }"""
         )
         export_thread_layout.addWidget(export_thread_label)
-        export_thread_layout.addWidget(self.export_thread_spin)
+        export_thread_layout.addWidget(self.export_cpu_budget_spin)
         export_thread_layout.addStretch()
         export_card_layout.addLayout(export_thread_layout)
 
+        # 分段并行编码
+        export_segment_layout = QHBoxLayout()
+        export_segment_layout.setSpacing(16)
+        export_segment_label = QLabel("分段编码数:")
+        export_segment_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.export_segment_spin = QSpinBox()
+        self.export_segment_spin.setRange(0, 8)
+        self.export_segment_spin.setValue(0)
+        self.export_segment_spin.setSpecialValueText("关闭")
+        self.export_segment_spin.setToolTip(
+            "较长的视频按关键帧间隔切成多段并行编码后无损拼接，适合核心数较多的电脑")
+        setCustomStyleSheet(
+            self.export_segment_spin,
+            """QSpinBox {
+                background-color: white;
+                border: 1px solid #ddd;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #f0f0f0;
+            }""",
+            """QSpinBox {
+                background-color: #333;
+                color: #ddd;
+                border: 1px solid #555;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+                background-color: #444;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #555;
+            }"""
+        )
+        export_segment_layout.addWidget(export_segment_label)
+        export_segment_layout.addWidget(self.export_segment_spin)
+        export_segment_layout.addStretch()
+        export_card_layout.addLayout(export_segment_layout)
+
+        # 自动码率：设备存储预算
+        export_budget_layout = QHBoxLayout()
+        export_budget_layout.setSpacing(16)
+        export_budget_label = QLabel("设备存储预算:")
+        export_budget_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.export_budget_spin = QSpinBox()
+        self.export_budget_spin.setRange(0, 65536)
+        self.export_budget_spin.setValue(0)
+        self.export_budget_spin.setSuffix(" MB")
+        self.export_budget_spin.setSpecialValueText("不限制")
+        self.export_budget_spin.setToolTip(
+            f"整台设备可用的存储空间，按 {get_device_slot_count()} 个槽位均分；"
+            "导出前试编码选择码率，使每套素材放得进一个槽位")
+        setCustomStyleSheet(
+            self.export_budget_spin,
+            """QSpinBox {
+                background-color: white;
+                border: 1px solid #ddd;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #f0f0f0;
+            }""",
+            """QSpinBox {
+                background-color: #333;
+                color: #ddd;
+                border: 1px solid #555;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+                background-color: #444;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #555;
+            }"""
+        )
+        export_budget_layout.addWidget(export_budget_label)
+        export_budget_layout.addWidget(self.export_budget_spin)
+        export_budget_layout.addStretch()
+        export_card_layout.addLayout(export_budget_layout)
+
+        # 自动码率：画质下限
+        export_min_vmaf_layout = QHBoxLayout()
+        export_min_vmaf_layout.setSpacing(16)
+        export_min_vmaf_label = QLabel("最低画质 (VMAF):")
+        export_min_vmaf_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.export_min_vmaf_spin = QSpinBox()
+        self.export_min_vmaf_spin.setRange(0, 100)
+        self.export_min_vmaf_spin.setValue(0)
+        self.export_min_vmaf_spin.setSpecialValueText("不限制")
+        self.export_min_vmaf_spin.setToolTip(
+            "导出前试编码，选择达到该 VMAF 分数的最低码率（与存储预算冲突时以预算为准）")
+        setCustomStyleSheet(
+            self.export_min_vmaf_spin,
+            """QSpinBox {
+                background-color: white;
+                border: 1px solid #ddd;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #f0f0f0;
+            }""",
+            """QSpinBox {
+                background-color: #333;
+                color: #ddd;
+                border: 1px solid #555;
+                border-radius: 8px;
+                padding: 8px 12px;
+            }
+            QSpinBox:hover {
+                border-color: #ff6b8b;
+            }
+            QSpinBox::up-button, QSpinBox::down-button {
+                width: 24px;
+                height: 24px;
+                border-radius: 4px;
+                background-color: #444;
+            }
+            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+                background-color: #555;
+            }"""
+        )
+        export_min_vmaf_layout.addWidget(export_min_vmaf_label)
+        export_min_vmaf_layout.addWidget(self.export_min_vmaf_spin)
+        export_min_vmaf_layout.addStretch()
+        export_card_layout.addLayout(export_min_vmaf_layout)
+
+        # 导出全部分辨率
+        export_all_res_layout = QHBoxLayout()
+        export_all_res_layout.setSpacing(16)
+        export_all_res_label = QLabel("导出全部分辨率:")
+        export_all_res_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.export_all_res_check = QCheckBox()
+        self.export_all_res_check.setChecked(False)
+        self.export_all_res_check.setToolTip(
+            "为 360x640 / 480x854 / 720x1080 各导出一套素材到同名子目录，视频只解码一次")
+        setCustomStyleSheet(
+            self.export_all_res_check,
+            """QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 40px;
+                height: 20px;
+                border-radius: 10px;
+                background-color: #ddd;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #ff6b8b;
+            }
+            QCheckBox::indicator::text {
+                width: 16px;
+                height: 16px;
+                border-radius: 8px;
+                background-color: white;
+                margin: 2px;
+            }
+            QCheckBox::indicator:checked::text {
+                margin-left: 22px;
+            }""",
+            """QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 40px;
+                height: 20px;
+                border-radius: 10px;
+                background-color: #555;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #ff6b8b;
+            }
+            QCheckBox::indicator::text {
+                width: 16px;
+                height: 16px;
+                border-radius: 8px;
+                background-color: white;
+                margin: 2px;
+            }
+            QCheckBox::indicator:checked::text {
+                margin-left: 22px;
+            }"""
+        )
+        export_all_res_layout.addWidget(export_all_res_label)
+        export_all_res_layout.addWidget(self.export_all_res_check)
+        export_all_res_layout.addStretch()
+        export_card_layout.addLayout(export_all_res_layout)
+
+        # 编码器输入像素格式
+        export_i420_layout = QHBoxLayout()
+        export_i420_layout.setSpacing(16)
+        export_i420_label = QLabel("YUV直送编码器:")
+        export_i420_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.export_i420_check = QCheckBox()
+        self.export_i420_check.setChecked(True)
+        self.export_i420_check.setToolTip(
+            "逐帧处理模式下直接把 yuv420p 帧送入编码器，省去FFmpeg的格式转换，管道数据量减半")
+        setCustomStyleSheet(
+            self.export_i420_check,
+            """QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 40px;
+                height: 20px;
+                border-radius: 10px;
+                background-color: #ddd;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #ff6b8b;
+            }
+            QCheckBox::indicator::text {
+                width: 16px;
+                height: 16px;
+                border-radius: 8px;
+                background-color: white;
+                margin: 2px;
+            }
+            QCheckBox::indicator:checked::text {
+                margin-left: 22px;
+            }""",
+            """QCheckBox {
+                spacing: 8px;
+            }
+            QCheckBox::indicator {
+                width: 40px;
+                height: 20px;
+                border-radius: 10px;
+                background-color: #555;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #ff6b8b;
+            }
+            QCheckBox::indicator::text {
+                width: 16px;
+                height: 16px;
+                border-radius: 8px;
+                background-color: white;
+                margin: 2px;
+            }
+            QCheckBox::indicator:checked::text {
+                margin-left: 22px;
+            }"""
+        )
+        export_i420_layout.addWidget(export_i420_label)
+        export_i420_layout.addWidget(self.export_i420_check)
+        export_i420_layout.addStretch()
+        export_card_layout.addLayout(export_i420_layout)
+
         scroll_layout.addWidget(export_card)
 
         # 网络设置卡片
@@ -3387,8 +3887,14 @@ class MainWindow(QMainWindow):
                 "auto_save": self.autosave_check.isChecked(),
                 "preview_quality": self.preview_combo.currentText(),
                 "hardware_acceleration": self.hwaccel_check.isChecked(),
+                "frame_cache_mb": self.frame_cache_spin.value(),
                 "export_quality": self.export_quality_combo.currentText(),
-                "export_threads": self.export_thread_spin.value(),
+                "export_cpu_budget": self.export_cpu_budget_spin.value(),
+                "export_all_resolutions": self.export_all_res_check.isChecked(),
+                "export_segments": self.export_segment_spin.value(),
+                "export_i420": self.export_i420_check.isChecked(),
+                "export_storage_budget_mb": self.export_budget_spin.value(),
+                "export_min_vmaf": self.export_min_vmaf_spin.value(),
                 "github_acceleration": self.github_accel_check.isChecked(),
                 "use_proxy": self.proxy_check.isChecked()}
 
@@ -3685,13 +4191,41 @@ class MainWindow(QMainWindow):
                     'hardware_acceleration',
                     self.hwaccel_check.isChecked()))
 
+        if hasattr(self, 'frame_cache_spin'):
+            self.frame_cache_spin.valueChanged.connect(
+                lambda value: self._apply_settings('frame_cache_mb', value))
+
         if hasattr(self, 'export_quality_combo'):
             self.export_quality_combo.currentTextChanged.connect(
                 lambda text: self._apply_settings('export_quality', text))
 
-        if hasattr(self, 'export_thread_spin'):
-            self.export_thread_spin.valueChanged.connect(
-                lambda value: self._apply_settings('export_threads', value))
+        if hasattr(self, 'export_cpu_budget_spin'):
+            self.export_cpu_budget_spin.valueChanged.connect(
+                lambda value: self._apply_settings('export_cpu_budget', value))
+
+        if hasattr(self, 'export_segment_spin'):
+            self.export_segment_spin.valueChanged.connect(
+                lambda value: self._apply_settings('export_segments', value))
+
+        if hasattr(self, 'export_budget_spin'):
+            self.export_budget_spin.valueChanged.connect(
+                lambda value: self._apply_settings('export_storage_budget_mb', value))
+
+        if hasattr(self, 'export_min_vmaf_spin'):
+            self.export_min_vmaf_spin.valueChanged.connect(
+                lambda value: self._apply_settings('export_min_vmaf', value))
+
+        if hasattr(self, 'export_i420_check'):
+            self.export_i420_check.stateChanged.connect(
+                lambda: self._apply_settings(
+                    'export_i420',
+                    self.export_i420_check.isChecked()))
+
+        if hasattr(self, 'export_all_res_check'):
+            self.export_all_res_check.stateChanged.connect(
+                lambda: self._apply_settings(
+                    'export_all_resolutions',
+                    self.export_all_res_check.isChecked()))
 
         if hasattr(self, 'github_accel_check'):
             self.github_accel_check.stateChanged.connect(
@@ -3770,6 +4304,10 @@ class MainWindow(QMainWindow):
         if setting_name == 'scale':
             logger.info(f"界面缩放已设置为: {value}")
 
+        # 预览帧缓存预算（对已打开的视频同样生效）
+        if setting_name == 'frame_cache_mb':
+            set_frame_cache_budget(value * 1024 * 1024)
+
         # 其他需要即时生效的设置可以在这里添加
 
     def _apply_theme_change(self, theme_name):
@@ -4027,6 +4565,7 @@ class MainWindow(QMainWindow):
 
         # 记录当前连接的预览器
         self._timeline_preview = preview
+        self.timeline.set_thumbnails(preview.get_thumbnail_strip())
 
         # 更新时间轴显示
         if hasattr(preview, 'total_frames') and preview.total_frames > 0:
@@ -4045,14 +4584,34 @@ class MainWindow(QMainWindow):
         except TypeError:
             pass
         preview.frame_changed.connect(self._on_video_frame_changed)
+        try:
+            preview.playback_state_changed.disconnect(self._on_video_playback_state_changed)
+        except TypeError:
+            pass
+        preview.playback_state_changed.connect(self._on_video_playback_state_changed)
 
     def _on_video_frame_changed(self, frame):
         """视频帧变更时更新截取帧编辑页面"""
+        # 播放中不更新：显示代理时每帧都要从源视频定位并全分辨率解码，会在界面线程上造成卡顿；
+        # 暂停后再按停下的那一帧更新
+        preview = getattr(self, '_current_video_preview', None)
+        if preview is not None and preview.is_playing:
+            return
+        self._refresh_frame_capture()
+
+    def _on_video_playback_state_changed(self, playing: bool):
+        """播放暂停时把截取帧编辑页面更新到当前帧"""
+        if not playing:
+            self._refresh_frame_capture()
+
+    def _refresh_frame_capture(self):
+        """截取帧编辑页面显示源视频当前帧"""
         # 如果当前在截取帧编辑标签页，自动更新图片
         if self.preview_tabs.currentIndex() == 1 and hasattr(self,
                                                              '_current_video_preview'):
             source_preview = self._current_video_preview
-            frame = source_preview.current_frame
+            # 预览可能在显示代理，截取帧始终读取源视频
+            frame = source_preview.read_original_frame()
             if frame is not None:
                 import cv2
                 # 应用旋转变换
@@ -4120,6 +4679,7 @@ class MainWindow(QMainWindow):
             self.timeline.set_fps(fps)
             self.timeline.set_in_point(0)
             self.timeline.set_out_point(total_frames - 1)
+            self.timeline.set_thumbnails(self.intro_preview.get_thumbnail_strip())
         # 更新存储
         self._intro_in_out = (0, total_frames - 1)
         self.status_bar.showMessage(
@@ -4227,6 +4787,7 @@ class MainWindow(QMainWindow):
 
         # 清空时间轴
         self.timeline.set_total_frames(0)
+        self.timeline.set_thumbnails(None)
         self._loop_in_out = (0, 0)
 
         logger.info(f"循环模式切换为: {'图片' if is_image else '视频'}")
@@ -4300,10 +4861,16 @@ class MainWindow(QMainWindow):
         self.timeline.set_fps(fps)
         self.timeline.set_in_point(0)
         self.timeline.set_out_point(total_frames - 1)
+        self.timeline.set_thumbnails(self.video_preview.get_thumbnail_strip())
         # 更新存储
         self._loop_in_out = (0, total_frames - 1)
         self.status_bar.showMessage(f"视频已加载: {total_frames} 帧, {fps:.1f} FPS")
 
+    def _on_preview_thumbnails_ready(self, preview: VideoPreviewWidget, strip):
+        """预览的缩略图在后台生成完成"""
+        if self._timeline_preview is preview:
+            self.timeline.set_thumbnails(strip)
+
     def _on_frame_changed(self, frame: int):
         """帧变更"""
         self.timeline.set_current_frame(frame)
@@ -4332,16 +4899,17 @@ class MainWindow(QMainWindow):
 
         logger.info(f"选择视频预览器: {type(source_preview).__name__}")
 
-        frame = source_preview.current_frame
+        # 预览可能在显示代理，截取帧始终读取源视频
+        frame = source_preview.read_original_frame()
         logger.info(f"当前帧: {frame}")
 
         if frame is None:
             # 尝试另一个预览
             logger.info("当前帧为 None，尝试另一个预览器")
             other = self.video_preview if source_preview is self.intro_preview else self.intro_preview
-            frame = other.current_frame
+            frame = other.read_original_frame()
             logger.info(f"另一个预览器的当前帧: {frame}")
-            if other.current_frame is not None:
+            if frame is not None:
                 source_preview = other
                 logger.info(f"切换到另一个预览器: {type(source_preview).__name__}")
 
@@ -4455,7 +5023,7 @@ class MainWindow(QMainWindow):
 
     def _collect_export_data(self) -> dict:
         """收集导出所需的数据"""
-        from core.export_service import VideoExportParams
+        from core.export_engine import VideoExportParams
         from core.image_processor import ImageProcessor
 
         data = {}
@@ -4548,13 +5116,7 @@ class MainWindow(QMainWindow):
                 if os.path.exists(img_path):
                     overlay_img = ImageProcessor.load_image(img_path)
                     if overlay_img is not None:
-                        # 获取目标分辨率
-                        spec = get_resolution_spec(self._config.screen.value)
-                        target_size = (spec['width'], spec['height'])
-
-                        # 缩放到目标分辨率
-                        import cv2
-                        overlay_img = cv2.resize(overlay_img, target_size)
+                        # 由导出服务按各目标分辨率缩放
                         data['overlay_mat'] = overlay_img
 
         return data
@@ -4564,93 +5126,30 @@ class MainWindow(QMainWindow):
         处理arknights叠加的自定义图片
 
         将自定义的logo和operator_class_icon缩放后复制到导出目录
+        （导出全部分辨率时复制到各分辨率子目录）
 
         Args:
             output_dir: 导出目录
         """
-        from config.epconfig import OverlayType
-        from config.constants import ARK_CLASS_ICON_SIZE, ARK_LOGO_SIZE
-        from core.image_processor import ImageProcessor
-        import cv2
+        from core.project_export import export_arknights_custom_images, output_dirs
 
         if not self._config:
             return
-
-        # 检查是否为arknights类型叠加
-        if self._config.overlay.type != OverlayType.ARKNIGHTS:
-            return
-
-        ark_opts = self._config.overlay.arknights_options
-        if not ark_opts:
-            return
-
-        # 处理职业图标 (50x50)
-        if ark_opts.operator_class_icon:
-            src_path = ark_opts.operator_class_icon
-            if not os.path.isabs(src_path):
-                src_path = os.path.join(self._base_dir, src_path)
-
-            if os.path.exists(src_path):
-                img = ImageProcessor.load_image(src_path)
-                if img is not None:
-                    # 缩放到目标尺寸
-                    img = cv2.resize(img, ARK_CLASS_ICON_SIZE)
-                    # 保存到导出目录
-                    dst_filename = "class_icon.png"
-                    dst_path = os.path.join(output_dir, dst_filename)
-                    success, encoded = cv2.imencode('.png', img)
-                    if success:
-                        with open(dst_path, 'wb') as f:
-                            f.write(encoded.tobytes())
-                        logger.info(f"已导出职业图标: {dst_path}")
-
-        # 处理Logo (75x35)
-        if ark_opts.logo:
-            src_path = ark_opts.logo
-            if not os.path.isabs(src_path):
-                src_path = os.path.join(self._base_dir, src_path)
-
-            if os.path.exists(src_path):
-                img = ImageProcessor.load_image(src_path)
-                if img is not None:
-                    # 缩放到目标尺寸
-                    img = cv2.resize(img, ARK_LOGO_SIZE)
-                    # 保存到导出目录
-                    dst_filename = "ark_logo.png"
-                    dst_path = os.path.join(output_dir, dst_filename)
-                    success, encoded = cv2.imencode('.png', img)
-                    if success:
-                        with open(dst_path, 'wb') as f:
-                            f.write(encoded.tobytes())
-                        logger.info(f"已导出Logo: {dst_path}")
+        export_arknights_custom_images(
+            self._config, self._base_dir,
+            output_dirs(output_dir, self._get_export_screens())
+        )
 
     def _process_image_overlay(self, output_dir: str):
         """处理 ImageOverlay 的图片导出和路径标准化"""
-        from config.epconfig import OverlayType
-        from core.image_processor import ImageProcessor
-        import cv2
+        from core.project_export import export_image_overlay, output_dirs
 
         if not self._config:
             return
-
-        if self._config.overlay.type != OverlayType.IMAGE:
-            return
-
-        if self._config.overlay.image_options and self._config.overlay.image_options.image:
-            src_path = self._config.overlay.image_options.image
-            if not os.path.isabs(src_path):
-                src_path = os.path.join(self._base_dir, src_path)
-
-            if os.path.exists(src_path):
-                img = ImageProcessor.load_image(src_path)
-                if img is not None:
-                    dst_filename = "overlay.png"
-                    dst_path = os.path.join(output_dir, dst_filename)
-                    success, encoded = cv2.imencode('.png', img)
-                    if success:
-                        with open(dst_path, 'wb') as f:
-                            f.write(encoded.tobytes())
-                        logger.info(f"已导出叠加图片: {dst_path}")
+        export_image_overlay(
+            self._config, self._base_dir,
+            output_dirs(output_dir, self._get_export_screens())
+        )
 
     def _on_export_completed(self, success: bool, message: str):
         """导出完成回调"""
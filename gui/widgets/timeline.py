@@ -1,12 +1,21 @@
 """
 时间轴组件 - 播放控制和时间标记
 """
+from typing import Dict, Optional
+
+import numpy as np
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QSizePolicy
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QRect, QPoint
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QMouseEvent, QPaintEvent
+from PyQt6.QtCore import Qt, pyqtSignal, QRect, QRectF, QPoint
+from PyQt6.QtGui import (
+    QPainter, QPainterPath, QColor, QPen, QBrush, QImage, QPixmap, QMouseEvent, QPaintEvent
+)
+
+from core.preview_decoder import rotate_frame
+from core.thumbnail_strip import ThumbnailStrip
 
 
 class TimelineSlider(QWidget):
@@ -34,6 +43,14 @@ class TimelineSlider(QWidget):
         self._out_color = QColor(254, 77, 64)  # 亮红色
         self._current_color = QColor(255, 255, 255)  # 白色
         self._current_color_hover = QColor(86, 154, 243)  # 亮蓝色
+        self._strip_shade_color = QColor(0, 0, 0, 90)  # 压暗缩略图，保证标记清晰
+
+        # 缩略图轨道：按轨道宽度拼好的整条图缓存为 QPixmap，重绘时只贴图
+        self._thumbnails: Optional[ThumbnailStrip] = None
+        self._rotation = 0
+        self._strip_pixmap: Optional[QPixmap] = None
+        self._hover_pixmaps: Dict[int, QPixmap] = {}
+        self._hover_label: Optional[QLabel] = None
 
         self.setMinimumHeight(50)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
@@ -52,6 +69,7 @@ class TimelineSlider(QWidget):
         self._in_point = min(self._in_point, max_frame)
         self._out_point = min(self._out_point, max_frame)
         self._current_frame = min(self._current_frame, max_frame)
+        self._strip_pixmap = None
         self.update()
 
     def set_current_frame(self, index: int):
@@ -77,6 +95,49 @@ class TimelineSlider(QWidget):
         """获取入点"""
         return self._in_point
 
+    def set_thumbnails(self, strip: Optional[ThumbnailStrip]):
+        """设置缩略图（None 表示清除）"""
+        self._thumbnails = strip
+        self._invalidate_thumbnails()
+
+    def set_rotation(self, degrees: int):
+        """设置缩略图的旋转角度（与预览一致）"""
+        if degrees != self._rotation:
+            self._rotation = degrees
+            self._invalidate_thumbnails()
+
+    def _invalidate_thumbnails(self):
+        self._strip_pixmap = None
+        self._hover_pixmaps.clear()
+        self._hide_hover()
+        self.update()
+
+    def _thumbnail_image(self, index: int) -> QImage:
+        """第 index 张缩略图（已按预览旋转）"""
+        image = np.ascontiguousarray(rotate_frame(self._thumbnails.images[index], self._rotation))
+        h, w = image.shape[:2]
+        return QImage(image.data, w, h, 3 * w, QImage.Format.Format_BGR888).copy()
+
+    def _build_strip_pixmap(self, track_width: int) -> QPixmap:
+        """按轨道宽度平铺缩略图，每一格显示格中心位置之前最近的缩略图"""
+        pixmap = QPixmap(track_width, self._track_height)
+        pixmap.fill(self._track_color)
+        aspect = self._thumbnails.aspect_ratio
+        if self._rotation in (90, 270):
+            aspect = 1 / aspect
+        tile_w = max(1, round(self._track_height * aspect))
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        images: Dict[int, QImage] = {}
+        for x in range(0, track_width, tile_w):
+            index = self._thumbnails.nearest(self._x_to_frame(self._margin + x + tile_w // 2))
+            if index not in images:
+                images[index] = self._thumbnail_image(index)
+            painter.drawImage(QRect(x, 0, tile_w, self._track_height), images[index])
+        painter.end()
+        return pixmap
+
     def get_out_point(self) -> int:
         """获取出点"""
         return self._out_point
@@ -110,9 +171,20 @@ class TimelineSlider(QWidget):
 
         # 轨道 - 圆角矩形
         track_rect = QRect(self._margin, track_y, track_width, self._track_height)
-        painter.setBrush(QBrush(self._track_color))
         painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawRoundedRect(track_rect, 4, 4)
+        if self._thumbnails is not None and track_width > 0:
+            if self._strip_pixmap is None or self._strip_pixmap.width() != track_width:
+                self._strip_pixmap = self._build_strip_pixmap(track_width)
+            clip = QPainterPath()
+            clip.addRoundedRect(QRectF(track_rect), 4, 4)
+            painter.save()
+            painter.setClipPath(clip)
+            painter.drawPixmap(track_rect.topLeft(), self._strip_pixmap)
+            painter.fillRect(track_rect, self._strip_shade_color)
+            painter.restore()
+        else:
+            painter.setBrush(QBrush(self._track_color))
+            painter.drawRoundedRect(track_rect, 4, 4)
 
         # 选中范围 - 圆角矩形
         if self._total_frames > 1:
@@ -166,12 +238,45 @@ class TimelineSlider(QWidget):
         """鼠标按下"""
         if event.button() == Qt.MouseButton.LeftButton:
             self._dragging = True
+            self._hide_hover()
             self.seek_requested.emit(self._x_to_frame(int(event.position().x())))
 
     def mouseMoveEvent(self, event: QMouseEvent):
         """鼠标移动"""
         if self._dragging:
             self.seek_requested.emit(self._x_to_frame(int(event.position().x())))
+        else:
+            self._show_hover(int(event.position().x()))
+
+    def leaveEvent(self, event):
+        """鼠标离开时隐藏悬停缩略图"""
+        self._hide_hover()
+        super().leaveEvent(event)
+
+    def _show_hover(self, x: int):
+        """在指针上方显示该位置的缩略图（只用已生成的缩略图，不解码）"""
+        if self._thumbnails is None:
+            return
+        index = self._thumbnails.nearest(self._x_to_frame(x))
+        pixmap = self._hover_pixmaps.get(index)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self._thumbnail_image(index))
+            self._hover_pixmaps[index] = pixmap
+
+        if self._hover_label is None:
+            self._hover_label = QLabel(self, Qt.WindowType.ToolTip)
+            self._hover_label.setStyleSheet("border: 1px solid #555555; background-color: #121212;")
+        label = self._hover_label
+        label.setPixmap(pixmap)
+        label.adjustSize()
+        track_y = (self.height() - self._track_height) // 2
+        pos = self.mapToGlobal(QPoint(x - label.width() // 2, track_y - label.height() - 12))
+        label.move(pos)
+        label.show()
+
+    def _hide_hover(self):
+        if self._hover_label is not None:
+            self._hover_label.hide()
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         """鼠标释放"""
@@ -388,6 +493,11 @@ class TimelineWidget(QWidget):
         """更新帧标签"""
         self.label_frame.setText(f"{self._current_frame} / {self._total_frames}")
 
+    def set_thumbnails(self, strip: Optional[ThumbnailStrip]):
+        """设置时间轴缩略图（None 表示清除）"""
+        self.timeline_slider.set_thumbnails(strip)
+
     def set_rotation(self, degrees: int):
-        """更新旋转按钮显示"""
+        """更新旋转按钮显示和缩略图方向"""
         self.btn_rotate.setText(f"旋转 {degrees}°")
+        self.timeline_slider.set_rotation(degrees)
@@ -2,6 +2,7 @@
 视频预览组件 - 支持视频播放和裁剪框交互
 """
 import logging
+import threading
 from typing import Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
@@ -13,10 +14,19 @@ except ImportError:
     HAS_CV2 = False
 
 from PyQt6.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QSizePolicy
+    QApplication, QWidget, QLabel, QVBoxLayout, QSizePolicy
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPoint
-from PyQt6.QtGui import QImage, QPixmap, QMouseEvent, QKeyEvent
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPoint, QPointF, QRectF
+from PyQt6.QtGui import QColor, QImage, QPainter, QPen, QPixmap, QMouseEvent, QKeyEvent
+
+from core.frame_cache import FrameCache, acquire_frame_cache, release_frame_cache
+from core.keyframe_index import KeyframeIndex, load_keyframe_index
+from core.proxy_media import load_proxy, needs_proxy
+from core.preview_decoder import (
+    PlaybackStats, PreviewDecoder, fit_size, resize_to_fit, rotate_frame, seek_capture
+)
+from core.thumbnail_strip import ThumbnailStrip, load_thumbnail_strip
+from core.video_processor import VideoProcessor
 
 if TYPE_CHECKING:
     from config.epconfig import EPConfig
@@ -27,6 +37,25 @@ logger = logging.getLogger(__name__)
 DEFAULT_TARGET_WIDTH = 360
 DEFAULT_TARGET_HEIGHT = 640
 
+# 退出时等待后台元数据线程（关键帧索引/缩略图/代理）结束的最长时间（秒）
+METADATA_JOIN_TIMEOUT = 3.0
+
+
+class _PreviewLabel(QLabel):
+    """视频显示标签：在帧画面之上绘制叠加层，叠加层变化时不必重新生成帧画面"""
+
+    def __init__(self, paint_overlay):
+        super().__init__()
+        self._paint_overlay = paint_overlay
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self)
+        try:
+            self._paint_overlay(painter)
+        finally:
+            painter.end()
+
 
 class VideoPreviewWidget(QWidget):
     """视频预览组件，支持裁剪框交互"""
@@ -37,6 +66,8 @@ class VideoPreviewWidget(QWidget):
     playback_state_changed = pyqtSignal(bool)  # 播放状态
     video_loaded = pyqtSignal(int, float)  # 总帧数, fps
     rotation_changed = pyqtSignal(int)  # 旋转角度 (0, 90, 180, 270)
+    thumbnails_ready = pyqtSignal(object)  # ThumbnailStrip（后台生成完成）
+    proxy_ready = pyqtSignal(str, str)  # 源视频路径, 代理路径（后台生成完成，切换到代理显示）
 
     # 拖拽模式
     DRAG_NONE = 0
@@ -57,11 +88,31 @@ class VideoPreviewWidget(QWidget):
         self.video_height: int = 0
         self.total_frames: int = 0
         self.current_frame_index: int = 0
-        self.current_frame = None
-
-        # 播放状态
+        # 当前帧及其已经应用的旋转角度（播放时解码线程送来的帧是预先旋转过的）
+        self._frame: Optional[np.ndarray] = None
+        self._frame_rotation: int = 0
+        # 当前帧缩小到显示区域后的画面（不含裁剪框），拖动裁剪框时复用
+        self._frame_pixmap: Optional[QPixmap] = None
+
+        # 定位状态：cap 下一次 read() 将返回的帧号；关键帧索引在后台线程中建立
+        self._cap_position: int = 0
+        self._keyframe_index: Optional[KeyframeIndex] = None
+        # 时间轴缩略图，在关键帧索引之后于同一后台线程中生成
+        self._thumbnail_strip: Optional[ThumbnailStrip] = None
+        # 代理：大尺寸源视频在后台生成低分辨率全帧内代理，就绪后 cap 改读代理，
+        # 源视频的 cap 保留用于读取原始帧；裁剪框等坐标始终是源视频坐标
+        self._proxy_path: Optional[str] = None
+        self._original_cap = None
+        self._original_cap_position: int = 0
+        self._metadata_thread: Optional[threading.Thread] = None
+
+        # 播放状态：解码在后台线程进行，定时器只按时钟取帧显示
         self.is_playing: bool = False
+        self._decoder: Optional[PreviewDecoder] = None
+        # 定位/步进用的解码帧缓存，同一文件的多个预览共享
+        self._frame_cache: Optional[FrameCache] = None
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self._on_timer_tick)
 
         # 裁剪框
@@ -91,6 +142,33 @@ class VideoPreviewWidget(QWidget):
 
         self._setup_ui()
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.proxy_ready.connect(self._on_proxy_ready)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._on_app_about_to_quit)
+
+    @property
+    def current_frame(self) -> Optional[np.ndarray]:
+        """当前帧（未旋转的原始画面）"""
+        if self._frame is None or self._frame_rotation == 0:
+            return self._frame
+        return rotate_frame(self._frame, (360 - self._frame_rotation) % 360)
+
+    @current_frame.setter
+    def current_frame(self, frame: Optional[np.ndarray]):
+        self._frame = frame
+        self._frame_rotation = 0
+
+    @property
+    def dropped_frames(self) -> int:
+        """本次（或最近一次）播放中因解码跟不上而丢弃的帧数"""
+        return self.get_playback_stats().dropped
+
+    def get_playback_stats(self) -> PlaybackStats:
+        """本次（或最近一次）播放的统计"""
+        if self._decoder is None:
+            return PlaybackStats()
+        return self._decoder.stats
 
     def _setup_ui(self):
         """设置UI"""
@@ -99,7 +177,7 @@ class VideoPreviewWidget(QWidget):
         layout.setSpacing(5)
 
         # 视频显示标签
-        self.video_label = QLabel()
+        self.video_label = _PreviewLabel(self._paint_overlay)
         self.video_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_label.setMinimumSize(320, 180)
         self.video_label.setStyleSheet(
@@ -140,9 +218,9 @@ class VideoPreviewWidget(QWidget):
         self.target_width = width
         self.target_height = height
         self.target_aspect_ratio = width / height
-        if self.current_frame is not None:
+        if self._frame is not None:
             self._init_cropbox()
-            self._display_frame(self.current_frame)
+            self._redraw()
 
     def load_video(self, path: str) -> bool:
         """加载视频"""
@@ -162,6 +240,7 @@ class VideoPreviewWidget(QWidget):
         if self.cap is not None:
             self.cap.release()
         self.pause()
+        self._release_source_workers()
 
         # 处理中文路径问题
         try:
@@ -191,6 +270,15 @@ class VideoPreviewWidget(QWidget):
         self.video_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self.current_frame_index = 0
+        self._cap_position = 0
+        self._keyframe_index = None
+        self._thumbnail_strip = None
+        self._attach_display_source(path, self.video_width * self.video_height * 3)
+        self._metadata_thread = threading.Thread(
+            target=self._load_source_metadata, args=(path, self.total_frames),
+            name="preview-metadata", daemon=True
+        )
+        self._metadata_thread.start()
 
         logger.info(
             f"视频已加载: {self.video_width}x{self.video_height}, "
@@ -241,6 +329,8 @@ class VideoPreviewWidget(QWidget):
         """内部方法：设置静态图片到预览"""
         # 释放之前的视频（如果有）
         self.pause()
+        self._release_source_workers()
+        self._thumbnail_strip = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
@@ -307,10 +397,112 @@ class VideoPreviewWidget(QWidget):
         """更新信息标签"""
         x, y, w, h = self.cropbox
         rotation_str = f" | 旋转: {self._rotation}°" if self._rotation != 0 else ""
+        dropped = self.dropped_frames if self.is_playing else 0
+        dropped_str = f" | 丢帧: {dropped}" if dropped else ""
         self.info_label.setText(
             f"帧: {self.current_frame_index}/{self.total_frames} | "
-            f"裁剪: ({x}, {y}, {w}, {h}){rotation_str}"
+            f"裁剪: ({x}, {y}, {w}, {h}){rotation_str}{dropped_str}"
+        )
+
+    def _attach_display_source(self, path: str, frame_bytes: int):
+        """为显示用的视频（源视频或代理）创建播放解码器和共享帧缓存"""
+        self._decoder = PreviewDecoder(path, self.video_fps, self.total_frames, frame_bytes)
+        self._frame_cache = acquire_frame_cache(path, self.total_frames)
+        self._sync_decoder_display_size()
+
+    def _load_source_metadata(self, path: str, total_frames: int):
+        """
+        后台线程：建立关键帧索引（建立完成前按原方式定位），再生成时间轴缩略图，
+        源视频尺寸或帧率过大时最后生成代理
+
+        缩略图和代理都用独立的解码器，不占用预览本身的解码器。
+        """
+        index = None
+        ffmpeg_path = VideoProcessor().find_ffmpeg()
+        if ffmpeg_path:
+            try:
+                index = load_keyframe_index(path, ffmpeg_path)
+            except (RuntimeError, OSError) as e:
+                logger.warning(f"无法建立关键帧索引: {e}")
+        if path != self.video_path:
+            return
+        if index is not None:
+            self._keyframe_index = index
+            for worker in (self._decoder, self._frame_cache):
+                if worker is not None:
+                    worker.keyframe_index = index
+
+        strip = load_thumbnail_strip(
+            path, total_frames, index, is_cancelled=lambda: path != self.video_path
+        )
+        if strip is not None and path == self.video_path:
+            self._thumbnail_strip = strip
+            # 跨线程发射，槽函数在界面线程中执行
+            self.thumbnails_ready.emit(strip)
+
+        if ffmpeg_path and needs_proxy(self.video_width, self.video_height, self.video_fps):
+            proxy_path = load_proxy(path, ffmpeg_path, is_cancelled=lambda: path != self.video_path)
+            if proxy_path is not None and path == self.video_path:
+                self.proxy_ready.emit(path, proxy_path)
+
+    def _on_proxy_ready(self, source_path: str, proxy_path: str):
+        """代理就绪：显示、播放和帧缓存改用代理，保持当前帧和播放状态"""
+        if source_path != self.video_path or self._proxy_path is not None:
+            return
+        cap = cv2.VideoCapture(proxy_path)
+        if not cap.isOpened() or int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) != self.total_frames:
+            logger.warning(f"代理不可用，继续使用源视频: {proxy_path}")
+            cap.release()
+            return
+
+        was_playing = self.is_playing
+        self.pause()
+        self._release_source_workers()
+        self._original_cap, self._original_cap_position = self.cap, self._cap_position
+        self.cap, self._cap_position = cap, 0
+        self._proxy_path = proxy_path
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._attach_display_source(proxy_path, width * height * 3)
+        logger.info(f"预览已切换到代理: {width}x{height}")
+
+        self._read_and_display_frame()
+        if was_playing:
+            self.play()
+
+    def is_using_proxy(self) -> bool:
+        """预览是否正在显示代理"""
+        return self._proxy_path is not None
+
+    def read_original_frame(self) -> Optional[np.ndarray]:
+        """
+        读取当前帧的源视频画面（未旋转）
+
+        显示代理时从源视频解码，否则直接返回当前帧；截取帧等需要原始画质的场合使用。
+        """
+        if self._proxy_path is None or self._original_cap is None:
+            return self.current_frame
+        index = self.current_frame_index
+        self._original_cap_position = seek_capture(
+            self._original_cap, self._original_cap_position, index, self._keyframe_index
         )
+        ret, frame = self._original_cap.read()
+        if not ret:
+            logger.warning(f"无法从源视频读取帧 {index}")
+            self._original_cap_position = -1
+            return None
+        self._original_cap_position = index + 1
+        return frame
+
+    def get_thumbnail_strip(self) -> Optional[ThumbnailStrip]:
+        """时间轴缩略图（尚未生成时为 None）"""
+        return self._thumbnail_strip
+
+    def _seek(self, index: int):
+        """使 cap 下一次 read() 返回第 index 帧（定位策略见 seek_capture）"""
+        # 代理每一帧都是关键帧，直接按帧号定位；源视频的关键帧索引只用于源视频
+        keyframe_index = None if self._proxy_path is not None else self._keyframe_index
+        self._cap_position = seek_capture(self.cap, self._cap_position, index, keyframe_index)
 
     def _read_and_display_frame(self):
         """读取并显示当前帧"""
@@ -318,11 +510,29 @@ class VideoPreviewWidget(QWidget):
             logger.warning("_read_and_display_frame: cap 为 None")
             return
 
-        ret, frame = self.cap.read()
-        if not ret:
-            logger.warning(f"无法读取帧 {self.current_frame_index}")
-            self.pause()
-            return
+        index = self.current_frame_index
+        cache = self._frame_cache
+        frame = None
+        if cache is not None:
+            # 未命中但正在预热这一帧时等待预热线程，避免重复解码同一个 GOP
+            frame = cache.get(index)
+            if frame is None:
+                frame = cache.wait(index)
+        if frame is None:
+            self._seek(index)
+            ret, frame = self.cap.read()
+            if not ret:
+                logger.warning(f"无法读取帧 {index}")
+                # 位置未知，下次强制重新定位
+                self._cap_position = -1
+                self.pause()
+                return
+            self._cap_position = index + 1
+            if cache is not None:
+                cache.put(index, frame)
+        if cache is not None and not self.is_playing:
+            # 后台解码相邻帧，之后的逐帧步进直接命中缓存
+            cache.warm(index)
 
         self.current_frame = frame
         logger.debug(f"读取帧 {self.current_frame_index}, 尺寸: {frame.shape}")
@@ -330,102 +540,136 @@ class VideoPreviewWidget(QWidget):
         self.frame_changed.emit(self.current_frame_index)
         self._update_info_label()
 
-    def _display_frame(self, frame):
-        """显示帧"""
+    def _redraw(self):
+        """重绘当前帧（裁剪框、旋转、模式或窗口大小变化后）"""
+        self._display_frame(self._frame, self._frame_rotation)
+
+    def _display_box(self) -> Tuple[int, int]:
+        """显示区域（标签内容区）的尺寸 (宽, 高)"""
+        contents = self.video_label.contentsRect()
+        return max(1, contents.width()), max(1, contents.height())
+
+    def _sync_decoder_display_size(self):
+        """让解码线程按当前显示区域预先缩小帧（预览模式需要整帧裁剪，不缩小）"""
+        if self._decoder is not None:
+            self._decoder.set_display_size(None if self._preview_mode else self._display_box())
+
+    def _display_frame(self, frame, applied_rotation: int = 0, display: Optional[np.ndarray] = None):
+        """
+        显示帧
+
+        帧先缩小到显示区域（INTER_AREA），再直接以 BGR 数据构造 QImage，不做颜色转换；
+        裁剪框、手柄和文字由 _paint_overlay 在画面之上绘制。
+
+        Args:
+            frame: 帧图像
+            applied_rotation: frame 已经应用过的旋转角度，只补上与当前角度的差值
+            display: 解码线程已缩小到显示区域的 frame（尺寸不符时忽略）
+        """
         if frame is None or not HAS_CV2:
             return
 
         # 应用旋转
-        rotated_frame = self._apply_rotation(frame)
-
-        x, y, w, h = self.cropbox
+        rotated_frame = rotate_frame(frame, (self._rotation - applied_rotation) % 360)
+        box = self._display_box()
+        rotated_width = self._get_rotated_video_size()[0]
+        # 显示代理时帧比源视频小，裁剪框（源视频坐标）按比例换算
+        frame_scale = rotated_frame.shape[1] / rotated_width if rotated_width > 0 else 1.0
+        # 源视频（旋转后）坐标在缩小后画面中的缩放和偏移
+        image_scale = 1.0
+        inner_x = inner_y = 0
 
         if self._preview_mode:
             # 预览模式：显示裁剪后的最终效果
-            display_frame = self._render_preview_frame(rotated_frame)
-        else:
-            # 编辑模式：显示完整帧+裁剪框
-            display_frame = rotated_frame.copy()
-
-            # cropbox 已经在旋转后坐标系中，直接使用
-            cv2.rectangle(display_frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-            # 绘制角落手柄
-            hs = 8
-            handle_color = (0, 200, 255)
-            for px, py in [(x, y), (x + w, y), (x, y + h), (x + w, y + h)]:
-                cv2.rectangle(
-                    display_frame,
-                    (px - hs, py - hs), (px + hs, py + hs),
-                    handle_color, -1
-                )
-
-            # 信息叠加
-            cv2.putText(
-                display_frame,
-                f"Frame: {self.current_frame_index}/{self.total_frames}",
-                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1
-            )
-            cv2.putText(
-                display_frame,
-                f"Crop: x={x} y={y} w={w} h={h}",
-                (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 1
-            )
-
-        # 如果是静态图片（total_frames == 1），创建黑色背景并将图片居中显示
-        if self.total_frames == 1 and not self._preview_mode:
-            # 创建黑色背景（目标尺寸）
+            image = resize_to_fit(self._render_preview_frame(rotated_frame, frame_scale), box)
+        elif self.total_frames == 1:
+            # 静态图片：放在目标尺寸的黑色背景中居中显示
             black_bg = np.zeros((self.target_height, self.target_width, 3), dtype=np.uint8)
-
-            # 计算缩放后的图片尺寸和位置
-            frame_h, frame_w = display_frame.shape[:2]
-            scale_w = self.target_width / frame_w
-            scale_h = self.target_height / frame_h
-            scale = min(scale_w, scale_h)
-
-            scaled_w = int(frame_w * scale)
-            scaled_h = int(frame_h * scale)
-
-            # 缩放图片
-            if scale != 1.0:
-                display_frame = cv2.resize(display_frame, (scaled_w, scaled_h))
-
-            # 计算居中位置
+            frame_h, frame_w = rotated_frame.shape[:2]
+            scaled_w, scaled_h = fit_size(frame_w, frame_h, self.target_width, self.target_height)
             offset_x = (self.target_width - scaled_w) // 2
             offset_y = (self.target_height - scaled_h) // 2
-
-            # 将缩放后的图片放置在黑色背景上
-            black_bg[offset_y:offset_y+scaled_h, offset_x:offset_x+scaled_w] = display_frame
-            display_frame = black_bg
-
-        # 转换为QPixmap
-        rgb_frame = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-        h_frame, w_frame, ch = rgb_frame.shape
+            black_bg[offset_y:offset_y+scaled_h, offset_x:offset_x+scaled_w] = resize_to_fit(
+                rotated_frame, (scaled_w, scaled_h)
+            )
+            image = resize_to_fit(black_bg, box)
+            bg_scale = image.shape[1] / self.target_width
+            image_scale = scaled_w / frame_w * frame_scale * bg_scale
+            inner_x, inner_y = round(offset_x * bg_scale), round(offset_y * bg_scale)
+        else:
+            # 编辑模式：显示完整帧，播放时直接使用解码线程缩小好的帧
+            expected = fit_size(rotated_frame.shape[1], rotated_frame.shape[0], *box)
+            if (display is None or applied_rotation != self._rotation
+                    or display.shape[1::-1] != expected):
+                display = resize_to_fit(rotated_frame, box)
+            image = display
+            image_scale = image.shape[1] / rotated_width if rotated_width > 0 else 1.0
+
+        image = np.ascontiguousarray(image)
+        h_image, w_image = image.shape[:2]
         q_image = QImage(
-            rgb_frame.data, w_frame, h_frame,
-            ch * w_frame, QImage.Format.Format_RGB888
-        )
-
-        label_size = self.video_label.size()
-        pixmap = QPixmap.fromImage(q_image).scaled(
-            label_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
+            image.data, w_image, h_image, image.strides[0], QImage.Format.Format_BGR888
         )
+        # fromImage 复制像素，之后 image 可以释放
+        self._frame_pixmap = QPixmap.fromImage(q_image)
 
         # 更新显示参数（仅编辑模式需要用于坐标转换）
         if not self._preview_mode:
-            # 使用旋转后的帧宽度计算缩放比例
-            rotated_width = self.video_height if self._rotation in (90, 270) else self.video_width
-            self.display_scale = pixmap.width() / rotated_width if rotated_width > 0 else 1.0
-            self.display_offset_x = (label_size.width() - pixmap.width()) // 2
-            self.display_offset_y = (label_size.height() - pixmap.height()) // 2
+            contents = self.video_label.contentsRect()
+            self.display_scale = image_scale
+            self.display_offset_x = contents.x() + (contents.width() - w_image) // 2 + inner_x
+            self.display_offset_y = contents.y() + (contents.height() - h_image) // 2 + inner_y
 
-        self.video_label.setPixmap(pixmap)
+        self.video_label.setPixmap(self._frame_pixmap)
+
+    def _paint_overlay(self, painter: QPainter):
+        """在帧画面之上绘制裁剪框、角落手柄和信息文字（编辑模式）"""
+        if self._preview_mode or self._frame_pixmap is None:
+            return
+        # 标签显示的是其他内容（文字、外部设置的图片）时不绘制
+        if self.video_label.pixmap().cacheKey() != self._frame_pixmap.cacheKey():
+            return
 
-    def _render_preview_frame(self, frame) -> np.ndarray:
-        """渲染预览帧（裁剪+叠加UI）"""
+        scale = self.display_scale
+        ox, oy = self.display_offset_x, self.display_offset_y
         x, y, w, h = self.cropbox
+        left, top = ox + x * scale, oy + y * scale
+        right, bottom = left + w * scale, top + h * scale
+
+        painter.setPen(QPen(QColor(0, 255, 0), 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(QRectF(left, top, right - left, bottom - top))
+
+        # 绘制角落手柄
+        hs = max(3.0, 8 * scale)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 200, 0))
+        for px, py in [(left, top), (right, top), (left, bottom), (right, bottom)]:
+            painter.drawRect(QRectF(px - hs, py - hs, 2 * hs, 2 * hs))
+
+        # 信息叠加（文字显示的是源视频坐标）
+        font = painter.font()
+        font.setPixelSize(12)
+        painter.setFont(font)
+        painter.setPen(QColor(0, 255, 0))
+        painter.drawText(
+            QPointF(ox + 8, oy + 18),
+            f"Frame: {self.current_frame_index}/{self.total_frames}"
+        )
+        painter.drawText(QPointF(ox + 8, oy + 34), f"Crop: x={x} y={y} w={w} h={h}")
+
+    def _update_cropbox_display(self):
+        """裁剪框变化后刷新显示：编辑模式只重绘叠加层，预览模式重新渲染裁剪结果"""
+        if self._frame is None:
+            return
+        if self._preview_mode:
+            self._redraw()
+        else:
+            self.video_label.update()
+
+    def _render_preview_frame(self, frame, frame_scale: float = 1.0) -> np.ndarray:
+        """渲染预览帧（裁剪+叠加UI）；frame_scale 为帧相对源视频的缩放（显示代理时小于 1）"""
+        x, y, w, h = (round(v * frame_scale) for v in self.cropbox)
 
         # 裁剪
         cropped = frame[y:y+h, x:x+w].copy()
@@ -445,21 +689,26 @@ class VideoPreviewWidget(QWidget):
         return preview_frame
 
     def _on_timer_tick(self):
-        """定时器回调"""
-        if self.cap is None:
+        """定时器回调：只取出解码线程按时钟备好的帧，没有新帧时保持当前画面"""
+        if self._decoder is None:
             return
-        self.current_frame_index += 1
-        if self.current_frame_index >= self.total_frames:
-            self.current_frame_index = 0
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        self._read_and_display_frame()
+        entry = self._decoder.take_due_frame()
+        if entry is None:
+            return
+        self.current_frame_index, self._frame, display = entry
+        self._frame_rotation = self._rotation
+        self._display_frame(self._frame, self._frame_rotation, display)
+        self.frame_changed.emit(self.current_frame_index)
+        self._update_info_label()
 
     def play(self):
         """播放"""
-        if self.cap is None or self.is_playing:
+        if self.cap is None or self._decoder is None or self.is_playing:
             return
-        # 使用 round() 减少截断误差
-        interval = round(1000 / self.video_fps)
+        self._sync_decoder_display_size()
+        self._decoder.start(self.current_frame_index, self._rotation)
+        # 帧的取舍由时钟决定，定时器以半帧间隔轮询以减小显示时刻的抖动
+        interval = max(1, round(500 / self.video_fps))
         self.timer.start(interval)
         self.is_playing = True
         self.playback_state_changed.emit(True)
@@ -467,9 +716,35 @@ class VideoPreviewWidget(QWidget):
     def pause(self):
         """暂停"""
         self.timer.stop()
+        if self._decoder is not None:
+            if self.is_playing:
+                stats = self._decoder.stats
+                logger.debug(
+                    f"播放统计: 显示 {stats.presented} 帧, 丢帧 {stats.dropped}, "
+                    f"解码 {stats.decoded} 帧"
+                )
+            self._decoder.stop()
         self.is_playing = False
         self.playback_state_changed.emit(False)
 
+    def _release_source_workers(self, wait: bool = False):
+        """
+        结束当前视频的解码线程，释放共享的帧缓存和代理切换前保留的源视频 cap
+
+        Args:
+            wait: 是否等待后台线程退出
+        """
+        if self._decoder is not None:
+            self._decoder.close(wait)
+            self._decoder = None
+        if self._frame_cache is not None:
+            release_frame_cache(self._frame_cache, wait)
+            self._frame_cache = None
+        if self._original_cap is not None:
+            self._original_cap.release()
+            self._original_cap = None
+        self._proxy_path = None
+
     def toggle_play(self):
         """切换播放/暂停"""
         if self.is_playing:
@@ -483,7 +758,6 @@ class VideoPreviewWidget(QWidget):
             return
         self.pause()
         self.current_frame_index = min(self.current_frame_index + 1, self.total_frames - 1)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame_index)
         self._read_and_display_frame()
 
     def prev_frame(self):
@@ -492,7 +766,6 @@ class VideoPreviewWidget(QWidget):
             return
         self.pause()
         self.current_frame_index = max(self.current_frame_index - 1, 0)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame_index)
         self._read_and_display_frame()
 
     def seek_to_frame(self, index: int):
@@ -501,8 +774,10 @@ class VideoPreviewWidget(QWidget):
             return
         index = max(0, min(index, self.total_frames - 1))
         self.current_frame_index = index
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
         self._read_and_display_frame()
+        if self.is_playing:
+            # 播放中跳转：丢弃已缓冲的帧，从新位置重新计时
+            self._decoder.start(self.current_frame_index, self._rotation)
 
     def get_current_frame(self) -> int:
         """获取当前帧号"""
@@ -535,8 +810,7 @@ class VideoPreviewWidget(QWidget):
         self.cropbox = [x, y, w, h]
         self._bound_cropbox()
         self._emit_cropbox_changed()
-        if self.current_frame is not None:
-            self._display_frame(self.current_frame)
+        self._update_cropbox_display()
 
     def get_video_info(self) -> Tuple[float, int, int, int]:
         """获取视频信息 (fps, total_frames, width, height)"""
@@ -545,8 +819,9 @@ class VideoPreviewWidget(QWidget):
     def set_preview_mode(self, enabled: bool):
         """设置预览模式"""
         self._preview_mode = enabled
-        if self.current_frame is not None:
-            self._display_frame(self.current_frame)
+        self._sync_decoder_display_size()
+        if self._frame is not None:
+            self._redraw()
 
     def is_preview_mode(self) -> bool:
         """获取预览模式状态"""
@@ -564,8 +839,11 @@ class VideoPreviewWidget(QWidget):
             # 这样 cropbox 在屏幕上的视觉位置保持不变
             if self.video_width > 0 and self.video_height > 0:
                 self._bound_cropbox()  # 只验证边界，确保在新尺寸范围内
-            if self.current_frame is not None:
-                self._display_frame(self.current_frame)
+            if self.is_playing:
+                # 缓冲区中的帧按旧角度预先旋转，需要重新解码
+                self._decoder.start(self.current_frame_index, degrees)
+            if self._frame is not None:
+                self._redraw()
 
     def get_rotation(self) -> int:
         """获取视频旋转角度"""
@@ -581,18 +859,6 @@ class VideoPreviewWidget(QWidget):
         new_rotation = (self._rotation - 90) % 360
         self.set_rotation(new_rotation)
 
-    def _apply_rotation(self, frame: np.ndarray) -> np.ndarray:
-        """应用旋转到帧"""
-        if self._rotation == 0:
-            return frame
-        elif self._rotation == 90:
-            return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-        elif self._rotation == 180:
-            return cv2.rotate(frame, cv2.ROTATE_180)
-        elif self._rotation == 270:
-            return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        return frame
-
     def _get_rotated_video_size(self) -> Tuple[int, int]:
         """获取旋转后的视频尺寸"""
         if self._rotation in (90, 270):
@@ -606,8 +872,8 @@ class VideoPreviewWidget(QWidget):
         if self._overlay_renderer is None:
             from core.overlay_renderer import OverlayRenderer
             self._overlay_renderer = OverlayRenderer()
-        if self.current_frame is not None:
-            self._display_frame(self.current_frame)
+        if self._frame is not None:
+            self._redraw()
 
     def _display_to_rotated_coords(self, pos: QPoint) -> Tuple[int, int]:
         """将显示坐标转换为旋转后视频坐标"""
@@ -635,7 +901,7 @@ class VideoPreviewWidget(QWidget):
 
     def mousePressEvent(self, event: QMouseEvent):
         """鼠标按下"""
-        if event.button() == Qt.MouseButton.LeftButton and self.current_frame is not None:
+        if event.button() == Qt.MouseButton.LeftButton and self._frame is not None:
             rx, ry = self._display_to_rotated_coords(event.pos())
             self.drag_mode = self._get_drag_mode(rx, ry)
             if self.drag_mode != self.DRAG_NONE:
@@ -671,10 +937,9 @@ class VideoPreviewWidget(QWidget):
 
             self._bound_cropbox()
             self._emit_cropbox_changed()
-            if self.current_frame is not None:
-                self._display_frame(self.current_frame)
+            self._update_cropbox_display()
 
-        elif self.current_frame is not None:
+        elif self._frame is not None:
             rx, ry = self._display_to_rotated_coords(event.pos())
             mode = self._get_drag_mode(rx, ry)
             cursors = {
@@ -697,7 +962,7 @@ class VideoPreviewWidget(QWidget):
 
     def keyPressEvent(self, event: QKeyEvent):
         """键盘事件"""
-        if self.current_frame is None:
+        if self._frame is None:
             super().keyPressEvent(event)
             return
 
@@ -726,32 +991,49 @@ class VideoPreviewWidget(QWidget):
 
         self._bound_cropbox()
         self._emit_cropbox_changed()
-        if self.current_frame is not None:
-            self._display_frame(self.current_frame)
+        self._update_cropbox_display()
 
     def resizeEvent(self, event):
         """窗口大小变化时重绘当前帧"""
         super().resizeEvent(event)
-        if self.current_frame is not None:
-            self._display_frame(self.current_frame)
+        self._sync_decoder_display_size()
+        if self._frame is not None:
+            self._redraw()
 
     def closeEvent(self, event):
         """关闭事件"""
         self.pause()
+        self._release_source_workers(wait=True)
         if self.cap is not None:
             self.cap.release()
         super().closeEvent(event)
 
+    def _on_app_about_to_quit(self):
+        """
+        应用退出前结束后台线程
+
+        清空视频路径使缩略图/代理任务中止（代理的 ffmpeg 进程随之结束），
+        并等待解码线程退出，避免进程退出时仍有线程在解码。
+        """
+        self.pause()
+        self.video_path = ""
+        self._release_source_workers(wait=True)
+        if self._metadata_thread is not None:
+            self._metadata_thread.join(timeout=METADATA_JOIN_TIMEOUT)
+
     def clear(self):
         """清空预览状态"""
         self.pause()
+        self._release_source_workers()
         if self.cap is not None:
             self.cap.release()
             self.cap = None
         self.video_path = ""
+        self._thumbnail_strip = None
         self.total_frames = 0
         self.current_frame_index = 0
         self.current_frame = None
+        self._frame_pixmap = None
         self.video_label.clear()
         self.video_label.setText("未加载视频")
         self.info_label.setText("帧: 0/0 | 裁剪: (0, 0, 0, 0)")
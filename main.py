@@ -2,6 +2,9 @@
 """
 明日方舟通行证素材制作器
 Arknights Pass Material Maker
+
+命令行批量导出（不启动界面）:
+    python main.py export PROJECT [PROJECT ...] [-o OUTPUT] [--jobs N] [--report report.json]
 """
 import sys
 import os
@@ -129,4 +132,12 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中进程池的工作进程也从这里启动
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        # 命令行批量导出：不启动界面，不导入 PyQt6
+        from core.batch_export import main as export_main
+        sys.exit(export_main(sys.argv[2:]))
     main()
@@ -3,6 +3,7 @@
 """
 import os
 import sys
+import tempfile
 from typing import Optional, Tuple
 
 from config.constants import SUPPORTED_VIDEO_FORMATS, SUPPORTED_IMAGE_FORMATS
@@ -202,3 +203,30 @@ def get_app_dir() -> str:
     else:
         # 开发环境，返回项目根目录
         return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_cache_dir(subdir: str = "") -> str:
+    """
+    获取当前用户的缓存目录（不存在则创建）
+
+    按 LOCALAPPDATA → XDG_CACHE_HOME / ~/.cache → 临时目录 的顺序降级。
+
+    Args:
+        subdir: 缓存子目录名
+
+    Returns:
+        缓存目录的绝对路径
+    """
+    dirs_to_try = []
+    appdata = os.getenv('LOCALAPPDATA')
+    if appdata:
+        dirs_to_try.append(os.path.join(appdata, 'ArknightsPassMaker', 'cache'))
+    xdg_cache = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    dirs_to_try.append(os.path.join(xdg_cache, 'ArknightsPassMaker'))
+    dirs_to_try.append(os.path.join(tempfile.gettempdir(), 'ArknightsPassMaker_cache'))
+
+    for base_dir in dirs_to_try:
+        cache_dir = os.path.join(base_dir, subdir) if subdir else base_dir
+        if ensure_directory(cache_dir):
+            return cache_dir
+    raise OSError("无法创建缓存目录")